@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Prebuilt bundle of every icon's embedded logo data URI.
+
+The data URI embedded for an icon is a pure function of its SVG, the fill
+colour and the compressor settings, and only three fills are ever used: white,
+black and the icon's own brand colour. This module precomputes all three for
+the whole catalog at build time and stores them next to the icon catalog:
+
+    datauris.json  slug -> {fill: [offset, length]} plus the build fingerprint
+    datauris.bin   every data URI concatenated into a single ASCII blob
+
+``svg_to_base64_data_uri`` consults the bundle first, so on default settings
+embedding a logo is a dictionary lookup and a slice of a memory-mapped file.
+The fingerprint (bundle format, simpleicons version, compressor settings and
+size limit) must match the running code, otherwise the bundle is ignored.
+
+Build it with ``python -m badgesort.bundle`` after building the catalog. It
+compresses every icon three times, so the Dockerfile only builds it for the
+published image (``--build-arg PREBUILD_DATA=true``), not on every action run.
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import sys
+
+from .catalog import _atomic_write, catalog_dir, simpleicons_version
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+INDEX_FILE = 'datauris.json'
+BLOB_FILE = 'datauris.bin'
+
+# Fill colours precomputed per icon; the brand colour is stored under ORIGINAL
+ORIGINAL = 'original'
+FILLS = ('white', 'black', ORIGINAL)
+
+
+def _fill_variant(icon_hex, fill_color):
+    """Map a fill colour to its bundle variant name, or None if it isn't bundled."""
+    if fill_color in ('white', 'black'):
+        return fill_color
+    if fill_color is not None and fill_color.lstrip('#').lower() == icon_hex.lower():
+        return ORIGINAL
+    return None
+
+
+class DataUriBundle(object):
+    """Lazily opened, memory-mapped view of the prebuilt data URI bundle."""
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._entries = None
+        self._blob = None
+        self._fingerprint = None
+        self._loaded = False
+        # max_url_length -> whether the fingerprint matches the running code
+        self._usable = {}
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        directory = self._directory or catalog_dir()
+        try:
+            with open(os.path.join(directory, INDEX_FILE), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            with open(os.path.join(directory, index.get('blob', BLOB_FILE)), 'rb') as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.debug(f'Data URI bundle unavailable: {e}')
+            return
+        self._entries = index['icons']
+        self._fingerprint = index.get('fingerprint')
+        logger.debug(f'Loaded data URI bundle from {directory} ({len(self._entries)} icons)')
+
+    def lookup(self, slug, icon_hex, fill_color, max_url_length):
+        """Return the prebuilt data URI for an icon, or None if the bundle can't serve it.
+
+        The bundle is only used when its fingerprint matches the running code for
+        the requested max_url_length.
+        """
+        self._load()
+        if self._entries is None or slug not in self._entries:
+            return None
+        if max_url_length not in self._usable:
+            self._usable[max_url_length] = self._fingerprint == bundle_fingerprint(max_url_length)
+            if not self._usable[max_url_length]:
+                logger.debug(f'Data URI bundle ignored: built with {self._fingerprint}')
+        if not self._usable[max_url_length]:
+            return None
+        variant = _fill_variant(icon_hex, fill_color)
+        if variant is None or variant not in self._entries[slug]:
+            return None
+        offset, length = self._entries[slug][variant]
+        return self._blob[offset:offset + length].decode('ascii')
+
+
+def bundle_fingerprint(max_url_length):
+    """Return the settings a bundle must have been built with to be usable."""
+    from .icons import _compressor_id
+    return {
+        'format': BUNDLE_FORMAT,
+        'simpleicons': simpleicons_version(),
+        'compressor': _compressor_id(),
+        'max_url_length': max_url_length,
+    }
+
+
+def build_bundle(directory=None, source=None, max_url_length=3550):
+    """Compute every icon's white, black and brand-colour data URIs and write the bundle.
+
+    PNG fallbacks depend on the rasterizer backend selected at runtime, so icons
+    whose SVG data URI doesn't fit max_url_length are left out without being
+    rasterized, and get their fallback computed and cached at runtime instead.
+
+    Args:
+        directory: Output directory (defaults to the catalog directory)
+        source: Mapping of slug -> icon to build from (defaults to the icon catalog)
+        max_url_length: Size limit the bundle is built for
+
+    Returns:
+        Number of data URIs written
+    """
+    from .icons import _compute_data_uri, icons
+
+    directory = directory or catalog_dir()
+    source = icons if source is None else source
+    os.makedirs(directory, exist_ok=True)
+
+    entries = {}
+    chunks = []
+    offset = 0
+    # Always compute from scratch, bypassing the artifact cache and any existing bundle
+    for slug in source:
+        icon = source[slug]
+        svg = icon.svg
+        variants = {}
+        for variant in FILLS:
+            fill_color = f'#{icon.hex}' if variant == ORIGINAL else variant
+            data_uri, fallback_svg = _compute_data_uri(svg, fill_color, max_url_length)
+            if fallback_svg is not None:
+                logger.debug(f'Skipping oversized {variant} data URI for {slug}')
+                continue
+            data = data_uri.encode('ascii')
+            variants[variant] = [offset, len(data)]
+            chunks.append(data)
+            offset += len(data)
+        entries[slug] = variants
+
+    index = {
+        'fingerprint': bundle_fingerprint(max_url_length),
+        'blob': BLOB_FILE,
+        'icons': entries,
+    }
+    _atomic_write(os.path.join(directory, BLOB_FILE), b''.join(chunks))
+    _atomic_write(os.path.join(directory, INDEX_FILE),
+                  json.dumps(index, separators=(',', ':')).encode('utf-8'))
+    return len(chunks)
+
+
+# Shared lazily-loaded bundle used by badgesort.icons
+bundle = DataUriBundle()
+
+
+def main(raw_args=None):
+    parser = argparse.ArgumentParser(description='Build the prebuilt data URI bundle used by BadgeSort.')
+    parser.add_argument('-o', '--output', type=str, default='', help='Output directory (defaults to the packaged data directory).')
+    parser.add_argument('--max-url-length', type=int, default=3550, help='Data URI size limit to build the bundle for.')
+    args = parser.parse_args(raw_args)
+
+    directory = args.output or catalog_dir()
+    count = build_bundle(directory, max_url_length=args.max_url_length)
+    logger.info(f'Wrote {count} data URIs to {directory}')
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    main()
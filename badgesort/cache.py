@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Content-addressed on-disk cache for generated badge artifacts.
+
+Compressed SVG and rasterized PNG data URIs are pure functions of their inputs
+(icon SVG, fill colour, size limits and compressor settings), so they are stored
+under a SHA-256 of those inputs and reused across runs:
+
+    <cache dir>/<namespace>/<first two hex chars>/<sha256>
+
+Writes go through a temporary file and ``os.replace`` so concurrent runs never
+see partial entries. Reads bump the entry's mtime, which makes mtime the
+recency signal for least-recently-used eviction once the namespace grows past
+its size cap.
+
+The cache directory defaults to ``$BADGESORT_CACHE_DIR``, then
+``$XDG_CACHE_HOME/badgesort``, then ``~/.cache/badgesort``. Hit and miss
+counts are accumulated across runs in ``stats.json`` at its top level.
+
+Manage it with ``python -m badgesort.icons cache {warm,stats,prune}`` (or
+``python -m badgesort.cache``):
+
+    warm   precompute data URIs for some slugs, or the whole catalog with --all
+    stats  report entries, size, age and hit rate per namespace
+    prune  evict least-recently-used entries beyond --max-size or --max-age
+
+Shields.io logo availability probes and HTTP validators (ETag/Last-Modified
+per URL) are kept in separate, smaller ``probes`` and ``validators``
+namespaces (see ``get_probe_cache`` and ``get_validator_cache``); the freshness
+of probes is checked by the reader.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from .catalog import _atomic_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+ARTIFACTS = 'artifacts'
+PROBES = 'probes'
+VALIDATORS = 'validators'
+# Size cap for each of the small probes and validators namespaces
+PROBE_MAX_BYTES = 4 * 1024 * 1024
+# Fraction of the size cap a full namespace is evicted down to, so writes to a
+# full cache only rescan the directory once every (1 - EVICT_LOW_WATER) of the cap
+EVICT_LOW_WATER = 0.9
+STATS_FILE = 'stats.json'
+
+
+def default_cache_dir():
+    """Return the default cache directory, honouring BADGESORT_CACHE_DIR and XDG_CACHE_HOME."""
+    if os.environ.get('BADGESORT_CACHE_DIR'):
+        return os.environ['BADGESORT_CACHE_DIR']
+    xdg_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(xdg_cache, 'badgesort')
+
+
+def cache_key(*parts):
+    """Return a hex SHA-256 digest identifying the given key parts.
+
+    Parts may be str, bytes, numbers, None or (nested) lists/tuples of those.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, bytes):
+            encoded = part
+        elif isinstance(part, str):
+            encoded = part.encode('utf-8')
+        else:
+            encoded = json.dumps(part, separators=(',', ':')).encode('utf-8')
+        # Length-prefix every part so ('ab', 'c') and ('a', 'bc') never collide
+        digest.update(len(encoded).to_bytes(8, 'big'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ArtifactCache(object):
+    """A size-capped, LRU-evicted directory of text entries addressed by cache_key().
+
+    Safe to share between threads, and between processes using the same directory.
+    """
+
+    def __init__(self, directory, namespace=ARTIFACTS, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.root = os.path.join(directory, namespace)
+        self.hits = 0
+        self.misses = 0
+        # Running size of the namespace, computed on the first write
+        self._size = None
+        # Guards the counters and running size when probes write from several threads
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = f.read()
+        except (OSError, UnicodeDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # Mark the entry as recently used for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Atomically store text under key, evicting old entries if the size cap is exceeded.
+
+        Eviction goes down to EVICT_LOW_WATER of the cap rather than the cap itself.
+
+        Failures to write are logged and otherwise ignored: the cache is an optimisation.
+        """
+        path = self._path(key)
+        data = value.encode('utf-8')
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            logger.debug(f'Failed to write cache entry {key}: {e}')
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.total_bytes()
+            else:
+                self._size += len(data) - previous_size
+            if self.max_bytes is not None and self._size > self.max_bytes:
+                self.evict(int(self.max_bytes * EVICT_LOW_WATER))
+
+    def entries(self):
+        """Return a list of (path, size, mtime) for every entry in the namespace."""
+        found = []
+        try:
+            buckets = os.listdir(self.root)
+        except OSError:
+            return found
+        for bucket in buckets:
+            bucket_path = os.path.join(self.root, bucket)
+            try:
+                names = os.listdir(bucket_path)
+            except OSError:
+                continue
+            for name in names:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(bucket_path, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((path, st.st_size, st.st_mtime))
+        return found
+
+    def total_bytes(self):
+        """Return the total size in bytes of all entries in the namespace."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes):
+        """Delete least-recently-used entries until the namespace fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        found = self.entries()
+        total = sum(size for _, size, _ in found)
+        removed = 0
+        for path, size, _ in sorted(found, key=lambda entry: entry[2]):
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        if removed:
+            logger.debug(f'Evicted {removed} cache entries from {self.root} to stay under {max_bytes} bytes')
+        return removed
+
+    def evict_older_than(self, max_age):
+        """Delete entries not used in the last max_age seconds.
+
+        Returns:
+            Number of entries removed
+        """
+        cutoff = time.time() - max_age
+        removed = 0
+        for path, _, mtime in self.entries():
+            if mtime >= cutoff:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            removed += 1
+        self._size = None
+        if removed:
+            logger.debug(f'Evicted {removed} cache entries from {self.root} unused for {max_age:.0f} s')
+        return removed
+
+    def flush_stats(self):
+        """Add this process's hit and miss counts to the totals persisted in stats.json.
+
+        Concurrent runs may occasionally lose each other's counts; the totals are
+        for reporting only.
+        """
+        if not (self.hits or self.misses):
+            return
+        stats = read_stats(self.directory)
+        totals = stats.setdefault(self.namespace, {'hits': 0, 'misses': 0})
+        totals['hits'] = totals.get('hits', 0) + self.hits
+        totals['misses'] = totals.get('misses', 0) + self.misses
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _atomic_write(os.path.join(self.directory, STATS_FILE), json.dumps(stats, sort_keys=True).encode('utf-8'))
+        except OSError as e:
+            logger.debug(f'Failed to write cache stats: {e}')
+            return
+        self.hits = self.misses = 0
+
+
+def read_stats(directory):
+    """Return the persisted {namespace: {'hits': n, 'misses': n}} totals for a cache directory."""
+    try:
+        with open(os.path.join(directory, STATS_FILE), 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return stats if isinstance(stats, dict) else {}
+
+
+def namespaces(directory):
+    """Return the names of the namespaces present in a cache directory."""
+    try:
+        return sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+    except OSError:
+        return []
+
+
+# Process-wide caches, created lazily by get_artifact_cache() and _namespace_cache()
+_artifact_cache = None
+_namespace_caches = {}
+_cache_settings = {'directory': None, 'max_bytes': DEFAULT_MAX_BYTES, 'enabled': True}
+
+
+def configure(directory=None, max_bytes=None, enabled=True):
+    """Configure the process-wide artifact cache.
+
+    Args:
+        directory: Cache directory (defaults to default_cache_dir())
+        max_bytes: Size cap for the artifacts namespace (defaults to DEFAULT_MAX_BYTES)
+        enabled: Set False to disable caching entirely
+    """
+    global _artifact_cache, _namespace_caches
+    _cache_settings['directory'] = directory or None
+    _cache_settings['max_bytes'] = max_bytes if max_bytes is not None else DEFAULT_MAX_BYTES
+    _cache_settings['enabled'] = enabled
+    _artifact_cache = None
+    _namespace_caches = {}
+
+
+def get_artifact_cache():
+    """Return the process-wide ArtifactCache, or None if caching is disabled."""
+    global _artifact_cache
+    if not _cache_settings['enabled']:
+        return None
+    if _artifact_cache is None:
+        _artifact_cache = ArtifactCache(_cache_settings['directory'] or default_cache_dir(),
+                                        max_bytes=_cache_settings['max_bytes'])
+    return _artifact_cache
+
+
+def _namespace_cache(namespace):
+    if not _cache_settings['enabled']:
+        return None
+    found = _namespace_caches.get(namespace)
+    if found is None:
+        # setdefault keeps a single instance when probe threads race to create it
+        found = _namespace_caches.setdefault(namespace, ArtifactCache(
+            _cache_settings['directory'] or default_cache_dir(), namespace=namespace, max_bytes=PROBE_MAX_BYTES))
+    return found
+
+
+def get_probe_cache():
+    """Return the process-wide cache of logo availability probes, or None if caching is disabled."""
+    return _namespace_cache(PROBES)
+
+
+def get_validator_cache():
+    """Return the process-wide cache of HTTP validators, or None if caching is disabled."""
+    return _namespace_cache(VALIDATORS)
+
+
+def active_caches():
+    """Return the process-wide caches created so far."""
+    return [found for found in [_artifact_cache] + list(_namespace_caches.values()) if found is not None]
+
+
+@contextmanager
+def disabled():
+    """Temporarily disable the process-wide caches."""
+    global _artifact_cache, _namespace_caches
+    saved_settings, saved_caches = dict(_cache_settings), (_artifact_cache, _namespace_caches)
+    _cache_settings['enabled'] = False
+    try:
+        yield
+    finally:
+        _cache_settings.update(saved_settings)
+        _artifact_cache, _namespace_caches = saved_caches
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GiB'
+
+
+def _format_age(seconds):
+    for unit, length in (('d', 86400), ('h', 3600), ('min', 60)):
+        if seconds >= length:
+            return f'{seconds / length:.1f} {unit}'
+    return f'{seconds:.0f} s'
+
+
+def warm(slugs, fills=('white', 'black'), compression='fixed', encoding='base64', jobs=0):
+    """Precompute and cache the embedded logo data URIs for the given slugs and fills.
+
+    Data URIs served by the prebuilt bundle are not duplicated into the cache.
+
+    Returns:
+        Number of new cache entries written
+    """
+    from .icons import icons, svg_to_base64_data_uris
+
+    artifact_cache = get_artifact_cache()
+    if artifact_cache is None:
+        raise ValueError('the artifact cache is disabled')
+    items = []
+    for slug in slugs:
+        icon = icons.get(slug)
+        if icon is None:
+            logger.warning(f'Skipping unknown slug "{slug}"')
+            continue
+        items.extend((icon.svg, fill, 3550, icon.slug) for fill in fills)
+    entries_before = len(artifact_cache.entries())
+    svg_to_base64_data_uris(items, compression=compression, encoding=encoding, jobs=jobs)
+    # Warming shouldn't count towards the hit rate of real runs
+    artifact_cache.hits = artifact_cache.misses = 0
+    return len(artifact_cache.entries()) - entries_before
+
+
+def main(raw_args=None):
+    from .icons import COMPRESSION_MODES, LOGO_ENCODINGS
+    from .raster import RASTER_BACKENDS, configure as configure_rasterizer
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--cache-dir', type=str, default='', help='Cache directory (default: $BADGESORT_CACHE_DIR or ~/.cache/badgesort).')
+
+    parser = argparse.ArgumentParser(prog='badgesort cache', description='Manage the BadgeSort artifact cache.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    warm_parser = commands.add_parser('warm', parents=[common], help='Precompute embedded logo data URIs.')
+    warm_parser.add_argument('slugs', nargs='*', help='SimpleIcons.org slugs to warm (comma or space separated).')
+    warm_parser.add_argument('--all', action='store_true', help='Warm every icon in the catalog.')
+    warm_parser.add_argument('--fill', action='append', choices=('white', 'black'), help='Logo fill colors to warm (default: white and black).')
+    warm_parser.add_argument('-j', '--jobs', type=int, default=0, help='Worker processes (default: one per CPU).')
+    warm_parser.add_argument('--compression', type=str, default='fixed', choices=COMPRESSION_MODES, help='SVG compression mode to warm for.')
+    warm_parser.add_argument('--logo-encoding', type=str, default='base64', choices=LOGO_ENCODINGS, help='Logo encoding to warm for.')
+    warm_parser.add_argument('--raster-backend', type=str, default='auto', choices=RASTER_BACKENDS, help='PNG rasterizer to warm for.')
+    warm_parser.add_argument('--cache-max-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help='Maximum cache size in MiB.')
+
+    commands.add_parser('stats', parents=[common], help='Report entries, size, age and hit rate.')
+
+    prune_parser = commands.add_parser('prune', parents=[common], help='Evict least-recently-used entries.')
+    prune_parser.add_argument('--max-size', type=float, default=None, help='Maximum size in MiB per namespace (default: 64 unless --max-age is given).')
+    prune_parser.add_argument('--max-age', type=float, default=None, help='Evict entries unused for this many days.')
+    args = parser.parse_args(raw_args)
+
+    directory = args.cache_dir or default_cache_dir()
+
+    if args.command == 'warm':
+        slugs = [slug for slug in ','.join(args.slugs).split(',') if slug]
+        if args.all:
+            from .catalog import icons
+            slugs = list(icons)
+        if not slugs:
+            parser.error('warm needs slugs or --all')
+        configure(directory, max_bytes=args.cache_max_size * 1024 * 1024)
+        configure_rasterizer(args.raster_backend)
+        start = time.perf_counter()
+        written = warm(slugs, fills=args.fill or ('white', 'black'), compression=args.compression,
+                       encoding=args.logo_encoding, jobs=args.jobs)
+        print(f'Warmed {len(slugs)} icons in {time.perf_counter() - start:.1f} s: {written} new cache entries')
+
+    elif args.command == 'stats':
+        print(f'Cache directory: {directory}')
+        stats = read_stats(directory)
+        now = time.time()
+        for namespace in namespaces(directory):
+            found = ArtifactCache(directory, namespace).entries()
+            size = sum(entry_size for _, entry_size, _ in found)
+            line = f'{namespace}: {len(found)} entries, {_format_bytes(size)}'
+            if found:
+                mtimes = [mtime for _, _, mtime in found]
+                line += f', last used {_format_age(now - max(mtimes))} to {_format_age(now - min(mtimes))} ago'
+            totals = stats.get(namespace, {})
+            lookups = totals.get('hits', 0) + totals.get('misses', 0)
+            if lookups:
+                line += f', hit rate {totals.get("hits", 0) / lookups:.1%} ({totals.get("hits", 0)} of {lookups} lookups)'
+            print(line)
+
+    elif args.command == 'prune':
+        max_bytes = args.max_size * 1024 * 1024 if args.max_size is not None else None
+        if max_bytes is None and args.max_age is None:
+            max_bytes = DEFAULT_MAX_BYTES
+        for namespace in namespaces(directory):
+            artifact_cache = ArtifactCache(directory, namespace)
+            removed = 0
+            if args.max_age is not None:
+                removed += artifact_cache.evict_older_than(args.max_age * 86400)
+            if max_bytes is not None:
+                removed += artifact_cache.evict(max_bytes)
+            print(f'{namespace}: removed {removed} entries, {_format_bytes(artifact_cache.total_bytes())} left')
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Lazy, memory-mapped Simple Icons catalog.
+
+Importing ``simpleicons.all`` builds an ``Icon`` object (SVG string included)
+for every icon in the package, even though a typical run only needs a handful.
+This module replaces it with a prebuilt catalog made of two files:
+
+    catalog.json  slug -> [title, hex, offset, length] plus the simpleicons version
+    catalog.svg   every icon's SVG markup concatenated into a single UTF-8 blob
+
+The index is only read on first access and the blob is memory-mapped, so an
+icon's SVG is decoded from the page cache when ``icon.svg`` is first touched.
+
+Build the catalog with ``python -m badgesort.catalog`` (the Docker image does
+this at build time). When no catalog is available, or it was built against a
+different simpleicons version, ``icons`` transparently falls back to the eager
+``simpleicons.all`` dictionary.
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import sys
+import tempfile
+from collections.abc import Mapping
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FORMAT = 1
+INDEX_FILE = 'catalog.json'
+BLOB_FILE = 'catalog.svg'
+
+# Packaged location of the prebuilt catalog, overridable for tests and benchmarks
+DEFAULT_CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+@lru_cache(maxsize=None)
+def simpleicons_version():
+    """Return the installed simpleicons version, or None if it can't be determined."""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:  # pragma: no cover - Python < 3.8
+        return None
+    try:
+        return version('simpleicons')
+    except PackageNotFoundError:
+        return None
+
+
+def catalog_dir():
+    """Return the directory the catalog is read from (``BADGESORT_CATALOG_DIR`` overrides)."""
+    return os.environ.get('BADGESORT_CATALOG_DIR') or DEFAULT_CATALOG_DIR
+
+
+class CatalogIcon(object):
+    """A Simple Icons entry whose SVG markup is read from the catalog blob on demand."""
+
+    __slots__ = ('title', 'slug', 'hex', '_catalog', '_offset', '_length')
+
+    def __init__(self, catalog, slug, title, hex, offset, length):
+        self.title = title
+        self.slug = slug
+        self.hex = hex
+        self._catalog = catalog
+        self._offset = offset
+        self._length = length
+
+    @property
+    def svg(self):
+        return self._catalog._read_svg(self._offset, self._length)
+
+    def __repr__(self):
+        return f'CatalogIcon(slug={self.slug!r}, title={self.title!r}, hex={self.hex!r})'
+
+
+class Catalog(Mapping):
+    """Read-only slug -> icon mapping backed by the prebuilt catalog files.
+
+    Nothing is read from disk until the mapping is first used. Lookups return
+    ``CatalogIcon`` objects exposing the same ``title``, ``slug``, ``hex`` and
+    ``svg`` attributes as ``simpleicons.icon.Icon``.
+    """
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._entries = None
+        self._fallback = None
+        self._blob = None
+        self._titles = None
+        self.metadata = {}
+
+    def _load(self):
+        if self._entries is not None or self._fallback is not None:
+            return
+        directory = self._directory or catalog_dir()
+        try:
+            self._entries, self._blob, self.metadata = _open_catalog(directory)
+            logger.debug(f'Loaded icon catalog from {directory} ({len(self._entries)} icons)')
+        except (OSError, ValueError) as e:
+            logger.debug(f'Icon catalog unavailable ({e}), falling back to simpleicons.all')
+            from simpleicons.all import icons as all_icons
+            self._fallback = all_icons
+
+    @property
+    def is_prebuilt(self):
+        """True when icons are served from the prebuilt catalog rather than simpleicons.all."""
+        self._load()
+        return self._fallback is None
+
+    def _read_svg(self, offset, length):
+        return self._blob[offset:offset + length].decode('utf-8')
+
+    def _icon(self, slug, entry):
+        title, hex_color, offset, length = entry
+        return CatalogIcon(self, slug, title, hex_color, offset, length)
+
+    def __getitem__(self, slug):
+        self._load()
+        if self._fallback is not None:
+            return self._fallback[slug]
+        return self._icon(slug, self._entries[slug])
+
+    def __contains__(self, slug):
+        self._load()
+        if self._fallback is not None:
+            return slug in self._fallback
+        return slug in self._entries
+
+    def __iter__(self):
+        self._load()
+        return iter(self._fallback if self._fallback is not None else self._entries)
+
+    def __len__(self):
+        self._load()
+        return len(self._fallback if self._fallback is not None else self._entries)
+
+    def get(self, target_name, default=None):
+        """Look up an icon by slug, falling back to a case-insensitive slug or title match.
+
+        Mirrors ``simpleicons.all.icons.get``.
+        """
+        self._load()
+        if self._fallback is not None:
+            icon = self._fallback.get(target_name)
+            return default if icon is None else icon
+        if target_name in self._entries:
+            return self[target_name]
+        normalized_name = target_name.lower()
+        if normalized_name in self._entries:
+            return self[normalized_name]
+        if self._titles is None:
+            self._titles = {}
+            for slug, entry in self._entries.items():
+                self._titles.setdefault(entry[0].lower(), slug)
+        slug = self._titles.get(normalized_name)
+        return self[slug] if slug is not None else default
+
+
+def _open_catalog(directory):
+    """Read and validate a catalog index and memory-map its SVG blob."""
+    with open(os.path.join(directory, INDEX_FILE), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    if index.get('format') != CATALOG_FORMAT:
+        raise ValueError(f'unsupported catalog format {index.get("format")!r}')
+    installed = simpleicons_version()
+    if installed is not None and index.get('simpleicons') != installed:
+        raise ValueError(f'catalog built for simpleicons {index.get("simpleicons")}, found {installed}')
+
+    with open(os.path.join(directory, index.get('blob', BLOB_FILE)), 'rb') as f:
+        blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    metadata = {k: v for k, v in index.items() if k != 'icons'}
+    return index['icons'], blob, metadata
+
+
+def _atomic_write(path, data):
+    """Write bytes to path via a temporary file and rename, so readers never see partial files."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def build_catalog(directory=None, source=None):
+    """Build the catalog index and SVG blob from simpleicons.all.
+
+    Args:
+        directory: Output directory (defaults to the packaged data directory)
+        source: Mapping of slug -> icon to build from (defaults to simpleicons.all.icons)
+
+    Returns:
+        Number of icons written
+    """
+    directory = directory or catalog_dir()
+    if source is None:
+        from simpleicons.all import icons as source
+
+    os.makedirs(directory, exist_ok=True)
+
+    entries = {}
+    chunks = []
+    offset = 0
+    for slug, icon in source.items():
+        svg_bytes = icon.svg.encode('utf-8')
+        entries[slug] = [icon.title, icon.hex, offset, len(svg_bytes)]
+        chunks.append(svg_bytes)
+        offset += len(svg_bytes)
+
+    index = {
+        'format': CATALOG_FORMAT,
+        'simpleicons': simpleicons_version(),
+        'blob': BLOB_FILE,
+        'icons': entries,
+    }
+
+    # Write the blob first so a reader that sees the new index always finds matching offsets
+    _atomic_write(os.path.join(directory, BLOB_FILE), b''.join(chunks))
+    _atomic_write(os.path.join(directory, INDEX_FILE),
+                  json.dumps(index, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+    return len(entries)
+
+
+# Shared lazily-loaded catalog used by badgesort.icons
+icons = Catalog()
+
+
+def main(raw_args=None):
+    parser = argparse.ArgumentParser(description='Build the prebuilt Simple Icons catalog used by BadgeSort.')
+    parser.add_argument('-o', '--output', type=str, default='', help='Output directory (defaults to the packaged data directory).')
+    args = parser.parse_args(raw_args)
+
+    directory = args.output or catalog_dir()
+    count = build_catalog(directory)
+    logger.info(f'Wrote catalog of {count} icons to {directory}')
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    main()
@@ -6,6 +6,10 @@
 #        int_to_Hilbert( 0, nD ) ==> ( 0, 0, 0, ... 0 ) Start at origin.
 #        int_to_Hilbert( 1, nD ) ==> ( 1, 0, 0, ... 0 ) 1st step is along x.
 #    Hilbert_to_int( ( x, y, z ) ) ==> i
+#    Both take an optional nChunks, the curve depth in bits per coordinate;
+#    by default it is the fewest bits that hold the index or largest coordinate.
+#    Hilbert_to_int_rgb( ( r, g, b ) ) ==> i is a table-driven 3D codec for
+#    8-bit channels, equal to Hilbert_to_int( ( r, g, b ), nChunks=8 ).
 # Steve Witham ess doubleyou at tiac remove-this dot net.
 # http://www.tiac.net/~sw/2008/10/Hilbert
 
@@ -13,8 +17,8 @@ from math import log, ceil
 from functools import reduce
 
 
-def int_to_Hilbert( i, nD=2 ):  # Default is the 2D Hilbert walk.
-    index_chunks = unpack_index( i, nD )
+def int_to_Hilbert( i, nD=2, nChunks=None ):  # Default is the 2D Hilbert walk.
+    index_chunks = unpack_index( i, nD, nChunks )
     nChunks = len( index_chunks )
     mask = 2 ** nD - 1
     start, end = initial_start_end( nChunks, nD )
@@ -26,9 +30,9 @@ def int_to_Hilbert( i, nD=2 ):  # Default is the 2D Hilbert walk.
     return pack_coords( coord_chunks, nD )
 
 
-def Hilbert_to_int( coords ):
+def Hilbert_to_int( coords, nChunks=None ):
     nD = len( coords )
-    coord_chunks = unpack_coords( coords )
+    coord_chunks = unpack_coords( coords, nChunks )
     nChunks = len( coord_chunks )
     mask = 2 ** nD - 1
     start, end = initial_start_end( nChunks, nD )
@@ -58,9 +62,12 @@ def initial_start_end( nChunks, nD ):
 
 ## unpack_index( int index, nD ) --> list of index chunks.
 #
-def unpack_index( i, nD ):
+def unpack_index( i, nD, nChunks=None ):
     p = 2**nD     # Chunks are like digits in base 2**nD.
-    nChunks = max( 1, int( ceil( log( i + 1, p ) ) ) ) #   # of digits
+    if nChunks is None:
+        nChunks = max( 1, int( ceil( log( i + 1, p ) ) ) ) #   # of digits
+    elif i >= p ** nChunks:
+        raise ValueError( f'index {i} needs more than {nChunks} chunks' )
     chunks = [ 0 ] * nChunks
     for j in range( nChunks - 1, -1, -1 ):
         chunks[ j ] = i % p
@@ -73,10 +80,13 @@ def pack_index( chunks, nD ):
 
 
 ## unpack_coords( list of nD coords ) --> list of coord chunks each nD bits.
-def unpack_coords( coords ):
+def unpack_coords( coords, nChunks=None ):
     nD = len( coords )
     biggest = reduce( max, coords )  # the max of all coords
-    nChunks = max( 1, int( ceil( log( biggest + 1, 2 ) ) ) ) # max # of bits
+    if nChunks is None:
+        nChunks = max( 1, int( ceil( log( biggest + 1, 2 ) ) ) ) # max # of bits
+    elif biggest >= 2 ** nChunks:
+        raise ValueError( f'coordinate {biggest} needs more than {nChunks} bits' )
     return transpose_bits( coords, nChunks )
 
 def pack_coords( chunks, nD ):
@@ -195,3 +205,84 @@ def child_start_end( parent_start, parent_end, mask, i ):
     child_start = gray_encode_travel( parent_start, parent_end, mask, start_i )
     child_end   = gray_encode_travel( parent_start, parent_end, mask, end_i )
     return child_start, child_end
+
+
+## Fixed-depth 3D codec for 8-bit colour channels.
+#    Hilbert_to_int( ( r, g, b ) ) works out the curve depth from the largest
+#    channel with floats, builds chunk lists and walks them bit by bit on every
+#    call. initial_start_end() orients each depth so a smaller curve is the
+#    first sub-cube of the next larger one, so the index doesn't depend on the
+#    depth; a sort key can use one fixed 8-bit curve and skip all that work:
+#        Hilbert_to_int_rgb( ( r, g, b ) ) == Hilbert_to_int( ( r, g, b ), nChunks=8 )
+#        int_to_Hilbert_rgb( i )           == int_to_Hilbert( i, 3, nChunks=8 )
+#    A state is a sub-cube's ( start, end ) pair. _RGB_ENCODE maps a state and
+#    two levels of coordinate chunks (6 bits, the higher level first) to the two
+#    index chunks and the next state, both packed in one int; _RGB_DECODE is
+#    the inverse. _RGB_SPREAD Morton-spreads a channel, so the 6-bit groups of
+#    SPREAD[ r ] << 2 | SPREAD[ g ] << 1 | SPREAD[ b ] are exactly those chunk
+#    pairs. Encoding is 3 + 4 table lookups, with no floats or bignums.
+#    States are stored premultiplied by 64, so "state | group" is the table index.
+RGB_BITS = 8
+
+def _build_rgb_tables():
+    mask = 7
+    first = initial_start_end( RGB_BITS, 3 )
+    states = { first: 0 }
+    pending = [ first ]
+    encode = {}
+    decode = {}
+    while pending:
+        start, end = state = pending.pop()
+        for coords in range( 64 ):
+            hi = gray_decode_travel( start, end, mask, coords >> 3 )
+            child = child_start_end( start, end, mask, hi )
+            lo = gray_decode_travel( child[ 0 ], child[ 1 ], mask, coords & 7 )
+            grandchild = child_start_end( child[ 0 ], child[ 1 ], mask, lo )
+            if grandchild not in states:
+                states[ grandchild ] = len( states )
+                pending.append( grandchild )
+            encode[ state, coords ] = grandchild, hi << 3 | lo
+            decode[ state, hi << 3 | lo ] = grandchild, coords
+    encode_table = [ 0 ] * ( 64 * len( states ) )
+    decode_table = [ 0 ] * ( 64 * len( states ) )
+    for ( state, group ), ( next_state, digits ) in encode.items():
+        encode_table[ states[ state ] * 64 | group ] = states[ next_state ] * 64 << 6 | digits
+    for ( state, group ), ( next_state, coords ) in decode.items():
+        decode_table[ states[ state ] * 64 | group ] = states[ next_state ] * 64 << 6 | coords
+    spread = [ 0 ] * 256
+    for v in range( 256 ):
+        for bit in range( RGB_BITS ):
+            spread[ v ] |= ( v >> bit & 1 ) << ( 3 * bit )
+    return tuple( encode_table ), tuple( decode_table ), tuple( spread ), states[ first ] * 64
+
+_RGB_ENCODE, _RGB_DECODE, _RGB_SPREAD, _RGB_START = _build_rgb_tables()
+
+
+def Hilbert_to_int_rgb( rgb ):
+    """Hilbert index in [0, 2**24) of an ( r, g, b ) colour with 8-bit channels."""
+    r, g, b = rgb
+    m = _RGB_SPREAD[ r ] << 2 | _RGB_SPREAD[ g ] << 1 | _RGB_SPREAD[ b ]
+    e = _RGB_ENCODE[ _RGB_START | m >> 18 ]
+    i = e & 63
+    e = _RGB_ENCODE[ e >> 6 | m >> 12 & 63 ]
+    i = i << 6 | e & 63
+    e = _RGB_ENCODE[ e >> 6 | m >> 6 & 63 ]
+    i = i << 6 | e & 63
+    e = _RGB_ENCODE[ e >> 6 | m & 63 ]
+    return i << 6 | e & 63
+
+
+def int_to_Hilbert_rgb( i ):
+    """( r, g, b ) colour at Hilbert index i, 0 <= i < 2**24; inverse of Hilbert_to_int_rgb."""
+    if not 0 <= i < 1 << ( 3 * RGB_BITS ):
+        raise ValueError( f'index {i} is outside the 8-bit RGB cube' )
+    state = _RGB_START
+    r = g = b = 0
+    for shift in ( 18, 12, 6, 0 ):
+        e = _RGB_DECODE[ state | i >> shift & 63 ]
+        state = e >> 6
+        for chunk in ( e >> 3 & 7, e & 7 ):
+            r = r << 1 | chunk >> 2
+            g = g << 1 | chunk >> 1 & 1
+            b = b << 1 | chunk & 1
+    return r, g, b
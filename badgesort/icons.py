@@ -3,26 +3,68 @@
 
 from __future__ import print_function
 from urllib.parse import quote, parse_qs, urlparse
-from colorsys import rgb_to_hsv
 
 import argparse
+import asyncio
 import base64
+import copy
+import json
 import logging
-import math
 import random
 import sys
 import re
 import requests
 import tempfile
+import time
 import os
 import subprocess
 
-from simpleicons.all import icons
-from .hilbert import Hilbert_to_int
+from .bundle import bundle
+from .cache import active_caches, cache_key, configure as configure_cache, get_artifact_cache, get_probe_cache, main as cache_main, DEFAULT_MAX_BYTES
+from .catalog import icons, simpleicons_version
+from .colorpath import path_order
+from .incremental import block_settings, encode_manifest, insert_entries, make_entry, parse_block, split_entries
+from .manifest import main as manifest_main, manifest as logo_manifest
+from .network import (DEFAULT_CONCURRENCY, PROVIDER_URLS, CircuitOpenError, cached_verdict, conditional_get, configure as configure_network,
+                      count, get_guard, get_stats, is_offline, provider_url, remember_verdict, thread_map)
+from .parallel import process_map
+from .raster import RASTER_BACKENDS, configure as configure_rasterizer, get_rasterizer
+from .sorting import SORT_METHODS, sort_order
+from .sortkeys import sort_keys_table
+from .svgpath import parse_path, serialize_path
 
-# Cache for logo availability checks to avoid repeated requests
+# Cache for logo availability checks to avoid repeated requests, keyed by slug
 _logo_availability_cache = {}
 
+# How long a logo probe outcome stays valid in the on-disk probe cache, in seconds
+LOGO_PROBE_TTLS = {
+    'present': 7 * 24 * 3600,
+    'missing': 24 * 3600,
+    # Timeouts, connection failures and non-200 responses are retried soon
+    'error': 5 * 60,
+}
+
+# Logo probes stream the sample badge in chunks and stop at the first logo marker, reading at
+# most PROBE_MAX_BYTES. After a marker, up to PROBE_DRAIN_BYTES more are read to finish the body
+# so the keep-alive connection can be reused; a longer body is abandoned with its connection.
+PROBE_CHUNK_BYTES = 1024
+PROBE_MAX_BYTES = 64 * 1024
+PROBE_DRAIN_BYTES = 16 * 1024
+LOGO_MARKERS = (b'<image', b'<use')
+
+# What to do for the remaining icons once the network budget is spent or the circuit breaker trips:
+# embed their logos, use Shields.io logo slugs blindly, or use cached verdicts (expired ones too)
+DEGRADE_POLICIES = ('embed', 'slug', 'cache')
+
+# Badge pipelines selectable with --engine; both produce identical output
+ENGINES = ('phased', 'async')
+
+# Badge verification: per-request timeout in seconds, and retries of 5xx/429/connection errors
+VERIFY_TIMEOUT = 10
+VERIFY_RETRIES = 3
+# Delay before the first retry, doubled for every retry after it
+VERIFY_BACKOFF = 0.5
+
 # GitHub camo proxy constants
 CAMO_URL_LIMIT = 8192
 CAMO_OVERHEAD = 76  # base URL (35) + digest (40) + slash (1)
@@ -37,7 +79,24 @@ def _calculate_camo_url_length(badge_url):
     """
     return CAMO_OVERHEAD + (len(badge_url.encode('utf-8')) * 2)
 
-def svg_to_base64_data_uri(svg_content, fill_color='white', max_url_length=3550):
+# SVG compression modes: 'fixed' compresses at scour's precision only, 'adaptive'
+# retries oversized icons at ADAPTIVE_PRECISIONS before falling back to PNG
+COMPRESSION_MODES = ('fixed', 'adaptive')
+ADAPTIVE_PRECISIONS = (4, 3, 2)
+
+_PATH_DATA = re.compile(r'(<path\b[^>]*?\bd=")([^"]*)(")')
+
+# Logo encodings: 'base64' always embeds base64 SVG data URIs, 'shortest' also
+# considers percent-encoded UTF-8 and keeps whichever is shorter once quoted
+LOGO_ENCODINGS = ('base64', 'shortest')
+
+# Characters left as-is in percent-encoded SVG data URIs: the URI characters that
+# are valid unencoded in a query. '%', '#', whitespace (which Shields.io strips from
+# logo data URIs) and '"<>', which would end an HTML attribute, are always encoded
+_DATA_URI_SAFE = "!$&'()*+,/:;=?@"
+
+def svg_to_base64_data_uri(svg_content, fill_color='white', max_url_length=3550, slug=None, compression='fixed',
+                           encoding='base64'):
     """Convert an SVG to a compressed base64-encoded data URI with specified fill color optimized for 14x14px badges.
     
     Args:
@@ -48,9 +107,99 @@ def svg_to_base64_data_uri(svg_content, fill_color='white', max_url_length=3550)
                        8192 char limit (which hex-encodes URLs: 76 + url_len*2 <= 8192).
                        Calculation: (8192 - 76 camo_overhead) / 2 hex_encoding - ~109 badge_url_overhead = 3949, with 10% margin = 3550
                        (~109 char badge_url_overhead is the badge URL structure: domain, path, parameters, excluding the data URI payload)
+        slug: Simple Icons slug the SVG belongs to. When given, the prebuilt data URI bundle is
+              consulted before anything is compressed.
+        compression: 'fixed' to use scour's output as-is, or 'adaptive' to retry oversized SVGs
+                     at progressively lower path precision before falling back to PNG.
+        encoding: 'base64' for a base64 SVG data URI, or 'shortest' to also consider a
+                  percent-encoded UTF-8 data URI and use whichever is shorter once the data
+                  URI is quoted into the badge URL (and therefore through camo as well).
     
     Uses scour-based SVG compression for optimal file size. For very large SVGs that would exceed
     URL length limits, falls back to PNG rasterization at 14x14px.
+    
+    Results are stored in the persistent artifact cache, keyed by the SVG, fill color,
+    max_url_length, compression mode, encoding, compressor settings and rasterizer, so unchanged
+    icons are never recompressed.
+    """
+    prepared = _prepare_data_uri(svg_content, fill_color, max_url_length, slug, compression, encoding)
+    if prepared['fallback_svg'] is None:
+        return prepared['data_uri']
+    # Fall back to PNG rasterization for oversized SVGs
+    return _finish_data_uri(prepared, _svg_to_png_data_uri(prepared['fallback_svg'], size=14))
+
+def svg_to_base64_data_uris(items, size=14, compression='fixed', encoding='base64', jobs=None):
+    """Convert a batch of SVGs to data URIs, rasterizing every PNG fallback in a single batch.
+    
+    Args:
+        items: List of (svg_content, fill_color, max_url_length, slug) tuples, with the
+                       same meaning as the svg_to_base64_data_uri arguments
+        size: PNG fallback size in pixels
+        compression: SVG compression mode applied to every item
+        encoding: Logo encoding applied to every item
+        jobs: Worker processes for compressing and rasterizing icons that aren't cached
+              (None for a sequential run, 0 for one per CPU)
+    
+    Returns:
+        List of data URIs in input order, identical to calling svg_to_base64_data_uri on each
+    """
+    prepared_list = [_lookup_data_uri(*item, compression=compression, encoding=encoding) for item in items]
+    misses = [(prepared, item) for prepared, item in zip(prepared_list, items) if prepared['data_uri'] is None]
+    if misses:
+        computed = process_map(_compute_data_uri, [(svg_content, fill_color, max_url_length, compression, encoding)
+                                                   for _, (svg_content, fill_color, max_url_length, _) in misses], jobs)
+        for (prepared, _), result in zip(misses, computed):
+            _store_data_uri(prepared, *result)
+    
+    pending = [prepared for prepared in prepared_list if prepared['fallback_svg'] is not None]
+    if pending:
+        png_data_uris = _svg_to_png_data_uris([prepared['fallback_svg'] for prepared in pending], size=size,
+                                              labels=[prepared['slug'] for prepared in pending], jobs=jobs)
+        for prepared, png_data_uri in zip(pending, png_data_uris):
+            prepared['data_uri'] = _finish_data_uri(prepared, png_data_uri)
+    return [prepared['data_uri'] for prepared in prepared_list]
+
+def _prepare_data_uri(svg_content, fill_color, max_url_length, slug=None, compression='fixed', encoding='base64'):
+    """Build the compressed SVG data URI, deferring any PNG fallback to the caller.
+    
+    Returns a dict whose 'data_uri' is final when 'fallback_svg' is None. Otherwise
+    'fallback_svg' must be rasterized and passed to _finish_data_uri().
+    """
+    prepared = _lookup_data_uri(svg_content, fill_color, max_url_length, slug, compression, encoding)
+    if prepared['data_uri'] is None:
+        _store_data_uri(prepared, *_compute_data_uri(svg_content, fill_color, max_url_length, compression, encoding))
+    return prepared
+
+def _lookup_data_uri(svg_content, fill_color, max_url_length, slug=None, compression='fixed', encoding='base64'):
+    """Look a data URI up in the prebuilt bundle and the artifact cache.
+    
+    Returns the prepared dict used by _prepare_data_uri, with 'data_uri' left as None on a miss.
+    """
+    prepared = {'slug': slug, 'data_uri': None, 'fallback_svg': None, 'max_url_length': max_url_length, 'cache_key': None}
+    
+    # The bundle only holds base64 data URIs that fit at full precision, which adaptive
+    # compression leaves unchanged, so it serves both compression modes
+    if slug is not None and slug in icons and encoding == 'base64':
+        bundled_data_uri = bundle.lookup(slug, icons[slug].hex, fill_color, max_url_length)
+        if bundled_data_uri is not None:
+            prepared['data_uri'] = bundled_data_uri
+            return prepared
+    
+    artifact_cache = get_artifact_cache()
+    if artifact_cache is not None:
+        # The rasterizer is part of the key because oversized icons cache their PNG fallback here
+        prepared['cache_key'] = cache_key('svg-data-uri', svg_content, fill_color, max_url_length, _compressor_id(),
+                                          compression, encoding if encoding == 'base64' else [encoding, _DATA_URI_SAFE],
+                                          get_rasterizer().name)
+        prepared['data_uri'] = artifact_cache.get(prepared['cache_key'])
+    return prepared
+
+def _compute_data_uri(svg_content, fill_color, max_url_length, compression='fixed', encoding='base64'):
+    """Compress and encode an SVG. Pure, so it can run in a worker process.
+    
+    Returns:
+        (data_uri, fallback_svg) where fallback_svg is the filled SVG to rasterize if
+        data_uri is still too long, or None if it fits
     """
     # Add fill color to the path element if fill_color is not None
     # Simple Icons SVGs typically have a single <path> element
@@ -62,25 +211,124 @@ def svg_to_base64_data_uri(svg_content, fill_color='white', max_url_length=3550)
     # Compress SVG for optimal badge usage
     compressed_svg = _compress_svg_for_badge(svg_with_fill)
     
-    # Encode to base64
-    svg_bytes = compressed_svg.encode('utf-8')
-    base64_svg = base64.b64encode(svg_bytes).decode('utf-8')
-    svg_data_uri = f'data:image/svg+xml;base64,{base64_svg}'
+    # Encode as a data URI
+    data_uri, fits = _encode_svg_data_uri(compressed_svg, max_url_length, encoding)
+    
+    if not fits and compression == 'adaptive':
+        reduced_data_uri = _reduce_svg_precision(compressed_svg, max_url_length, encoding)
+        if reduced_data_uri is not None:
+            data_uri, fits = reduced_data_uri, True
     
     # Check if SVG data URI would be too long for URL limits
-    if len(svg_data_uri) > max_url_length:
-        logger.debug(f'SVG data URI too long ({len(svg_data_uri)} chars), falling back to PNG')
-        # Fall back to PNG rasterization for oversized SVGs
-        png_data_uri = _svg_to_png_data_uri(svg_with_fill, size=14)
-        if png_data_uri:
-            return png_data_uri
-        else:
-            logger.warning(f'PNG fallback failed for oversized SVG ({len(svg_data_uri)} chars > {max_url_length} limit). '
-                          f'Using original SVG despite size. Badge may exceed GitHub camo URL limit.')
-            # For now, return the original SVG data URI even if it's too long
-            # This is better than skipping the icon entirely
+    if not fits:
+        logger.debug(f'SVG data URI too long ({len(data_uri)} chars), falling back to PNG')
+        return data_uri, svg_with_fill
+    return data_uri, None
+
+def _store_data_uri(prepared, data_uri, fallback_svg):
+    """Record a computed data URI in a prepared dict, caching it unless it needs a PNG fallback."""
+    prepared['data_uri'] = data_uri
+    prepared['fallback_svg'] = fallback_svg
+    if fallback_svg is None and prepared['cache_key'] is not None:
+        artifact_cache = get_artifact_cache()
+        if artifact_cache is not None:
+            artifact_cache.put(prepared['cache_key'], data_uri)
+
+def _svg_base64_data_uri(svg_content):
+    """Encode SVG markup as a base64 data URI."""
+    base64_svg = base64.b64encode(svg_content.encode('utf-8')).decode('utf-8')
+    return f'data:image/svg+xml;base64,{base64_svg}'
+
+def _svg_utf8_data_uri(svg_content):
+    """Encode SVG markup as a minimally percent-encoded UTF-8 data URI.
+    
+    Path data separators become commas, which survive quoting into a URL as %2C
+    rather than a doubly-encoded %2520.
+    """
+    svg_content = _PATH_DATA.sub(lambda m: m.group(1) + m.group(2).replace(' ', ',') + m.group(3), svg_content)
+    return f'data:image/svg+xml;charset=utf-8,{quote(svg_content, safe=_DATA_URI_SAFE)}'
+
+def _encode_svg_data_uri(svg_content, max_url_length, encoding='base64'):
+    """Encode SVG markup as a data URI, picking the shortest encoding allowed by `encoding`.
+    
+    A base64 data URI fits when its own length is within max_url_length. A percent-encoded
+    data URI expands far more when quoted into the badge URL, so it must fit with that
+    quoting applied. Among the candidates that fit, the shortest quoted length wins.
+    
+    Returns:
+        (data_uri, fits) where data_uri is the base64 data URI if nothing fits
+    """
+    base64_data_uri = _svg_base64_data_uri(svg_content)
+    base64_fits = len(base64_data_uri) <= max_url_length
+    if encoding == 'base64':
+        return base64_data_uri, base64_fits
+    
+    candidates = [base64_data_uri] if base64_fits else []
+    utf8_data_uri = _svg_utf8_data_uri(svg_content)
+    if len(quote(utf8_data_uri, safe='')) <= max_url_length:
+        candidates.append(utf8_data_uri)
+    if not candidates:
+        return base64_data_uri, False
+    return min(candidates, key=lambda data_uri: len(quote(data_uri, safe=''))), True
+
+def _reduce_svg_precision(compressed_svg, max_url_length, encoding='base64'):
+    """Re-serialize a compressed SVG's paths at ADAPTIVE_PRECISIONS until its data URI fits.
+    
+    Path data is parsed once and re-serialized for each attempt, from the highest
+    precision down, so the highest-fidelity result that fits is returned.
     
-    return svg_data_uri
+    Returns:
+        The data URI, or None if no precision fits (or the paths can't be parsed)
+    """
+    try:
+        pieces = _PATH_DATA.split(compressed_svg)
+        # split() yields [text, prefix, d, suffix, text, ...]; parse each d once
+        paths = {i: parse_path(pieces[i]) for i in range(2, len(pieces), 4)}
+    except ValueError as e:
+        logger.debug(f'Adaptive compression could not parse path data: {e}')
+        return None
+    if not paths:
+        return None
+    
+    def data_uri_at(precision):
+        for i, segments in paths.items():
+            pieces[i] = serialize_path(segments, precision)
+        return _encode_svg_data_uri(''.join(pieces), max_url_length, encoding)
+    
+    # Shorter output at lower precision means that if the lowest precision doesn't
+    # fit, nothing will, so check it first and skip the search for hopeless icons
+    lowest = data_uri_at(ADAPTIVE_PRECISIONS[-1])
+    if not lowest[1]:
+        return None
+    for precision in ADAPTIVE_PRECISIONS:
+        data_uri, fits = lowest if precision == ADAPTIVE_PRECISIONS[-1] else data_uri_at(precision)
+        if fits:
+            logger.debug(f'SVG data URI fits at precision {precision} ({len(data_uri)} chars)')
+            return data_uri
+    return None
+
+def _finish_data_uri(prepared, png_data_uri):
+    """Resolve a prepared oversized data URI with its PNG fallback (None if rasterization failed)."""
+    if png_data_uri:
+        artifact_cache = get_artifact_cache()
+        if artifact_cache is not None and prepared['cache_key'] is not None:
+            artifact_cache.put(prepared['cache_key'], png_data_uri)
+        return png_data_uri
+    
+    logger.warning(f'PNG fallback failed for oversized SVG ({len(prepared["data_uri"])} chars > {prepared["max_url_length"]} limit). '
+                  f'Using original SVG despite size. Badge may exceed GitHub camo URL limit.')
+    # For now, return the original SVG data URI even if it's too long
+    # This is better than skipping the icon entirely
+    # Not cached, so the PNG fallback is retried once a rasterizer is available
+    return prepared['data_uri']
+
+def _compressor_id():
+    """Identify the SVG compressor and its settings for artifact cache keys."""
+    try:
+        from scour import __version__ as scour_version
+    except ImportError:
+        scour_version = None
+    return ['scour', scour_version, SCOUR_OPTIONS]
 
 def _compress_svg_for_badge_regex(svg_content):
     """Compress SVG content for small badge usage (14x14px) using regex optimization (for comparison)."""
@@ -126,153 +374,379 @@ def _compress_svg_for_badge_regex(svg_content):
         logger.debug(f'Regex SVG compression failed, using original: {e}')
         return svg_content
 
-def _compress_svg_for_badge(svg_content):
-    """Compress SVG content for small badge usage (14x14px) using scour with aggressive optimization."""
+# Scour settings for 14x14px badges, shared by the in-process and subprocess compressors
+SCOUR_OPTIONS = [
+    '--set-precision=5',              # Low precision (5 significant digits) for 14x14px badges
+    '--set-c-precision=5',            # Low precision for control points too
+    '--strip-xml-prolog',             # Remove XML declaration
+    '--remove-descriptive-elements',  # Remove title, desc, and metadata elements (not needed for badges)
+    '--enable-comment-stripping',     # Remove comments
+    '--enable-viewboxing',            # Optimize viewBox
+    '--enable-id-stripping',          # Remove unreferenced IDs
+    '--shorten-ids',                  # Shorten remaining IDs
+    '--no-line-breaks',               # Minify output
+    '--indent=none',                  # No indentation
+    '--strip-xml-space',              # Remove xml:space attributes
+    '--disable-embed-rasters',        # Don't embed rasters (not relevant for Simple Icons)
+    '--no-renderer-workaround',       # Skip renderer workarounds for smaller output
+]
+
+# Parsed scour options, built once per process by _compress_svg_with_scour_api
+_scour_options = None
+
+def _compress_svg_with_scour_api(svg_content):
+    """Compress SVG content by calling scour's API directly on strings (no temp files, no fork)."""
+    global _scour_options
+    from scour import scour
+
+    if _scour_options is None:
+        _scour_options = scour.parse_args(SCOUR_OPTIONS)
+    return scour.scourString(svg_content, _scour_options).strip()
+
+def _compress_svg_with_scour_subprocess(svg_content):
+    """Compress SVG content by running scour in a separate interpreter. Returns None if scour fails."""
+    # Create temporary files for input and output
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False) as input_file:
+        input_file.write(svg_content)
+        input_path = input_file.name
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False) as output_file:
+        output_path = output_file.name
+    
     try:
-        # Create temporary files for input and output
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False) as input_file:
-            input_file.write(svg_content)
-            input_path = input_file.name
+        # Run scour with aggressive optimization settings for 14x14px badges
+        cmd = ['python', '-m', 'scour.scour'] + SCOUR_OPTIONS + ['-i', input_path, '-o', output_path]
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False) as output_file:
-            output_path = output_file.name
+        # Run scour
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
         
+        if result.returncode == 0:
+            # Read the optimized SVG
+            with open(output_path, 'r') as f:
+                optimized_svg = f.read().strip()
+            return optimized_svg
+        else:
+            logger.debug(f'Scour failed with return code {result.returncode}: {result.stderr}')
+            return None
+    
+    finally:
+        # Clean up temporary files
         try:
-            # Run scour with aggressive optimization settings for 14x14px badges
-            cmd = [
-                'python', '-m', 'scour.scour',
-                '--set-precision=5',              # Low precision (5 significant digits) for 14x14px badges
-                '--set-c-precision=5',            # Low precision for control points too
-                '--strip-xml-prolog',             # Remove XML declaration
-                '--remove-descriptive-elements',  # Remove title, desc, and metadata elements (not needed for badges)
-                '--enable-comment-stripping',     # Remove comments
-                '--enable-viewboxing',            # Optimize viewBox
-                '--enable-id-stripping',          # Remove unreferenced IDs
-                '--shorten-ids',                  # Shorten remaining IDs
-                '--no-line-breaks',               # Minify output
-                '--indent=none',                  # No indentation
-                '--strip-xml-space',              # Remove xml:space attributes
-                '--disable-embed-rasters',        # Don't embed rasters (not relevant for Simple Icons)
-                '--no-renderer-workaround',       # Skip renderer workarounds for smaller output
-                '-i', input_path,
-                '-o', output_path
-            ]
-            
-            # Run scour
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0:
-                # Read the optimized SVG
-                with open(output_path, 'r') as f:
-                    optimized_svg = f.read().strip()
-                return optimized_svg
-            else:
-                logger.debug(f'Scour failed with return code {result.returncode}: {result.stderr}')
-                # Fallback to regex compression
-                return _compress_svg_for_badge_regex(svg_content)
-        
-        finally:
-            # Clean up temporary files
-            try:
-                os.unlink(input_path)
-                os.unlink(output_path)
-            except OSError:
-                pass
-                
+            os.unlink(input_path)
+            os.unlink(output_path)
+        except OSError:
+            pass
+
+def _compress_svg_for_badge(svg_content):
+    """Compress SVG content for small badge usage (14x14px) using scour with aggressive optimization.
+    
+    Scour runs in-process; if that fails it is retried in a scour subprocess, and
+    if that fails too the regex compressor is used.
+    """
+    try:
+        return _compress_svg_with_scour_api(svg_content)
+    except Exception as e:
+        logger.debug(f'In-process scour compression failed, trying scour subprocess: {e}')
+    
+    try:
+        optimized_svg = _compress_svg_with_scour_subprocess(svg_content)
+        if optimized_svg is not None:
+            return optimized_svg
     except Exception as e:
-        # Fallback to regex compression if scour fails
         logger.debug(f'Scour SVG compression failed, using regex fallback: {e}')
-        return _compress_svg_for_badge_regex(svg_content)
+    
+    # Fallback to regex compression
+    return _compress_svg_for_badge_regex(svg_content)
 
 def _svg_to_png_data_uri(svg_content, size=14):
     """Convert SVG to PNG at specified size and create base64 data URI. Returns None if conversion fails."""
-    try:
-        # Create temporary files
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.svg', delete=False) as svg_file:
-            svg_file.write(svg_content)
-            svg_path = svg_file.name
-        
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as png_file:
-            png_path = png_file.name
-        
-        try:
-            # Use rsvg-convert directly for better SVG support than ImageMagick's internal parser
-            cmd = [
-                'rsvg-convert',
-                f'--width={size}',
-                f'--height={size}',
-                '--format=png',
-                f'--output={png_path}',
-                svg_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-            if result.returncode == 0:
-                # Read PNG and encode as base64
-                with open(png_path, 'rb') as f:
-                    png_bytes = f.read()
-                base64_png = base64.b64encode(png_bytes).decode('utf-8')
-                logger.debug(f'PNG conversion successful: {len(png_bytes)} bytes -> {len(base64_png)} base64 chars')
-                return f'data:image/png;base64,{base64_png}'
-            else:
-                logger.debug(f'SVG to PNG conversion failed: {result.stderr}')
-                return None
-        
-        finally:
-            # Clean up temporary files
-            try:
-                os.unlink(svg_path)
-                os.unlink(png_path)
-            except OSError:
-                pass
-                
-    except Exception as e:
-        logger.debug(f'PNG conversion error: {e}')
-        return None
+    return _svg_to_png_data_uris([svg_content], size=size)[0]
+
+def _svg_to_png_data_uris(svgs, size=14, labels=None, jobs=None):
+    """Convert a batch of SVGs to PNG data URIs at the specified size in one rasterizer batch.
+    
+    Successful conversions are stored in the persistent artifact cache; only cache misses
+    are rasterized, with `jobs` workers (None for the rasterizer's default). Per-icon and
+    total rasterization times are logged.
+    
+    Returns:
+        List of PNG data URIs (or None where conversion failed) in input order
+    """
+    rasterizer = get_rasterizer()
+    artifact_cache = get_artifact_cache()
+    labels = labels or [None] * len(svgs)
+    results = [None] * len(svgs)
+    keys = [None] * len(svgs)
+    misses = []
+    
+    for i, svg_content in enumerate(svgs):
+        if artifact_cache is not None:
+            keys[i] = cache_key('png-data-uri', svg_content, size, rasterizer.name)
+            results[i] = artifact_cache.get(keys[i])
+        if results[i] is None:
+            misses.append(i)
+    
+    if not misses:
+        return results
+    
+    start = time.perf_counter()
+    rasterized = rasterizer.rasterize_batch([svgs[i] for i in misses], size, jobs=jobs)
+    total_time = time.perf_counter() - start
+    
+    for i, (png_bytes, elapsed) in zip(misses, rasterized):
+        label = labels[i] or f'icon {i}'
+        if not png_bytes:
+            logger.debug(f'Rasterizing {label} with {rasterizer.name} failed after {elapsed * 1000:.1f} ms')
+            continue
+        base64_png = base64.b64encode(png_bytes).decode('utf-8')
+        logger.debug(f'PNG conversion successful for {label} in {elapsed * 1000:.1f} ms: '
+                     f'{len(png_bytes)} bytes -> {len(base64_png)} base64 chars')
+        results[i] = f'data:image/png;base64,{base64_png}'
+        if artifact_cache is not None:
+            artifact_cache.put(keys[i], results[i])
+    
+    logger.info(f'Rasterized {len(misses)} PNG fallback(s) with {rasterizer.name} in {total_time * 1000:.1f} ms '
+                f'({total_time * 1000 / len(misses):.1f} ms/icon)')
+    return results
 
 
 def _is_logo_missing_from_shields(icon_slug, icon_hex, badge_style):
     """Check if a logo is missing from Shields.io by testing a sample badge.
     
-    Returns True if the logo appears to be missing (no <image> or <use> elements in SVG).
-    Uses caching to avoid repeated HTTP requests for the same icon.
+    Returns True if the logo appears to be missing (no <image> or <use> elements in SVG),
+    or if it couldn't be checked.
+    Logo presence doesn't depend on the badge style, so results are cached per slug: in
+    memory for the rest of the run, and on disk across runs for LOGO_PROBE_TTLS. Errors
+    are only cached on disk, briefly, so a transient failure doesn't stick.
+    In offline mode nothing is probed: slugs that aren't cached are looked up in the
+    missing-logo manifest, and treated as missing if it doesn't know them either.
     """
     # Check cache first
-    cache_key = f"{icon_slug}_{badge_style}"
-    if cache_key in _logo_availability_cache:
-        return _logo_availability_cache[cache_key]
-    
+    if icon_slug in _logo_availability_cache:
+        return _logo_availability_cache[icon_slug]
+
+    status = _load_logo_probe(icon_slug)
+    if status is None and is_offline():
+        is_missing = logo_manifest.is_missing(icon_slug)
+        status = 'error' if is_missing is None else 'missing' if is_missing else 'present'
+        logger.debug(f'Offline logo check for {icon_slug} from the manifest: {status}')
+    elif status is None:
+        try:
+            status = _probe_logo(icon_slug, icon_hex, badge_style)
+        except CircuitOpenError:
+            return _degraded_logo_check(icon_slug)
+        _store_logo_probe(icon_slug, status)
+
+    is_missing = status != 'present'
+    if status != 'error':
+        _logo_availability_cache[icon_slug] = is_missing
+    return is_missing
+
+def _scan_probe_body(resp):
+    """Stream a probe response until a logo marker, the end of the body or PROBE_MAX_BYTES, then close it.
+
+    Returns:
+        (has_logo, bytes_read): has_logo is None if the cap was reached without a marker or the end
+    """
+    chunks = resp.iter_content(chunk_size=PROBE_CHUNK_BYTES)
+    # Keep the end of the previous chunk so markers split across chunks are found
+    overlap = max(len(marker) for marker in LOGO_MARKERS) - 1
+    window = b''
+    bytes_read = 0
+    has_logo = False
+    try:
+        for chunk in chunks:
+            bytes_read += len(chunk)
+            window = window[-overlap:] + chunk.lower()
+            if any(marker in window for marker in LOGO_MARKERS):
+                has_logo = True
+                break
+            if bytes_read >= PROBE_MAX_BYTES:
+                return None, bytes_read
+        if has_logo:
+            # Finish a short body so the connection goes back to the pool, or abandon a long one
+            drain_limit = bytes_read + PROBE_DRAIN_BYTES
+            if int(resp.headers.get('Content-Length') or 0) <= drain_limit:
+                for chunk in chunks:
+                    bytes_read += len(chunk)
+                    if bytes_read > drain_limit:
+                        break
+                else:
+                    return has_logo, bytes_read
+            count(probes_stopped_early=1)
+    finally:
+        resp.close()
+    return has_logo, bytes_read
+
+def _probe_logo(icon_slug, icon_hex, badge_style):
+    """Request a sample badge with the logo; returns 'present', 'missing' or 'error'."""
     try:
         # Create a test badge URL
-        test_url = f'https://img.shields.io/badge/Test-{icon_hex}.svg?style={badge_style}&logo={icon_slug}&logoColor=white'
+        test_url = f'{provider_url("shields")}/badge/Test-{icon_hex}.svg?style={badge_style}&logo={icon_slug}&logoColor=white'
         
-        # Request the badge SVG
-        resp = requests.get(test_url, timeout=5)
-        if resp.status_code != 200:
+        # Request the badge SVG over the shared keep-alive session, revalidating the last verdict,
+        # and stream it: a logo shows up as an <image> or <use> element near the start
+        resp, cached_status = conditional_get(test_url, timeout=5, stream=True, stage='probe')
+        if cached_status is not None or resp.status_code != 200:
+            # Neither a 304 nor an error page says anything about the logo, so don't read them
+            resp.close()
+            if cached_status is not None:
+                return cached_status
             logger.debug(f'Failed to fetch test badge for {icon_slug}: HTTP {resp.status_code}')
-            _logo_availability_cache[cache_key] = True
-            return True  # Assume missing if we can't fetch it
-        
-        svg_content = resp.text.lower()
+            return 'error'
+        has_logo, bytes_read = _scan_probe_body(resp)
+        count(probe_bytes=bytes_read)
+        if has_logo is None:
+            logger.debug(f'No logo marker in the first {bytes_read} bytes of the test badge for {icon_slug}')
+            return 'error'
         
-        # Check for indicators that a logo is present
-        has_image = '<image' in svg_content
-        has_use = '<use' in svg_content
-        
-        # A badge with a logo should have image or use elements
-        has_logo = has_image or has_use
-        
-        is_missing = not has_logo
-        logger.debug(f'Logo check for {icon_slug}: has_image={has_image}, has_use={has_use}, has_logo={has_logo}, is_missing={is_missing}')
-        
-        # Cache the result
-        _logo_availability_cache[cache_key] = is_missing
-        return is_missing
+        logger.debug(f'Logo check for {icon_slug}: has_logo={has_logo}, is_missing={not has_logo}, read {bytes_read} bytes')
+        status = 'present' if has_logo else 'missing'
+        remember_verdict(test_url, resp, status)
+        return status
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.debug(f'Error checking logo for {icon_slug}: {e}')
-        _logo_availability_cache[cache_key] = True
-        return True  # Assume missing on error
+        return 'error'
+
+def _degraded_logo_check(icon_slug):
+    """Decide whether a logo is missing without probing, by the network guard's policy."""
+    guard = get_guard()
+    guard.note_degraded('logo checks', icon_slug)
+    if guard.policy == 'slug':
+        return False
+    if guard.policy == 'cache':
+        status = _load_logo_probe(icon_slug, ignore_ttl=True)
+        if status in ('present', 'missing'):
+            return status == 'missing'
+        is_missing = logo_manifest.is_missing(icon_slug)
+        if is_missing is not None:
+            return is_missing
+    # Embedding always renders, whatever Shields.io supports
+    return True
+
+def _logo_probe_key(icon_slug):
+    # Shields.io logos follow Simple Icons releases, so a new version re-probes every slug
+    origin = provider_url('shields')
+    if origin != PROVIDER_URLS['shields']:
+        # verdicts from a stand-in server never answer for the real Shields.io
+        return cache_key('logo-probe', icon_slug, simpleicons_version(), origin)
+    return cache_key('logo-probe', icon_slug, simpleicons_version())
+
+def _load_logo_probe(icon_slug, ignore_ttl=False):
+    """Return the cached probe status for a slug if it is still fresh (or at all, with ignore_ttl), else None."""
+    probe_cache = get_probe_cache()
+    if probe_cache is None:
+        return None
+    cached = probe_cache.get(_logo_probe_key(icon_slug))
+    if cached is None:
+        return None
+    try:
+        record = json.loads(cached)
+        status, checked = record['status'], record['checked']
+        ttl = LOGO_PROBE_TTLS[status]
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not ignore_ttl and not 0 <= time.time() - checked < ttl:
+        return None
+    return status
+
+def _store_logo_probe(icon_slug, status):
+    probe_cache = get_probe_cache()
+    if probe_cache is not None:
+        probe_cache.put(_logo_probe_key(icon_slug), json.dumps({'status': status, 'checked': time.time()}))
+
+def _prefetch_logo_availability(plans, badge_style):
+    """Check every logo in plans concurrently.
+
+    Results land in _logo_availability_cache (and the on-disk probe cache), and
+    only slugs that aren't cached are probed over the network.
+
+    Returns:
+        Dict of slug -> whether its logo is missing from Shields.io
+    """
+    pending = {}
+    for plan in plans:
+        pending.setdefault(plan['slug'], plan['hex'])
+    if not pending:
+        return {}
+    start_time = time.perf_counter()
+    results = thread_map(_is_logo_missing_from_shields, [(slug, icon_hex, badge_style) for slug, icon_hex in pending.items()])
+    logger.info(f'Checked {len(pending)} Shields.io logo(s) in {(time.perf_counter() - start_time) * 1000:.0f} ms')
+    return dict(zip(pending, results))
+
+def _verify_badge_url(url, timeout=VERIFY_TIMEOUT, retries=VERIFY_RETRIES):
+    """Request a badge URL, retrying server errors and dropped connections.
+
+    Timeouts aren't retried so one slow provider can't multiply the wait. Rate limits
+    are retried by network.conditional_get once the host's pause is over, so a 429
+    that gets here has used those retries up and isn't retried again.
+
+    Returns:
+        None if the badge rendered, otherwise a description of the failure
+    """
+    for attempt in range(retries + 1):
+        try:
+            resp, verified = conditional_get(url, timeout=timeout, stage='verify')
+        except CircuitOpenError:
+            # Unverifiable badges aren't failures; the run summary reports them
+            if not (get_guard().policy == 'cache' and cached_verdict(url) == 'ok'):
+                get_guard().note_degraded('badge verifications', url)
+            return None
+        except requests.Timeout:
+            return f'timed out after {timeout} s'
+        except requests.RequestException as e:
+            error, retryable = f'{type(e).__name__}: {e}', True
+        else:
+            if verified is not None:
+                return None
+            if resp.status_code == 200:
+                remember_verdict(url, resp, 'ok')
+                return None
+            error, retryable = f'HTTP {resp.status_code}', resp.status_code >= 500
+        if not retryable or attempt == retries:
+            return error
+        delay = VERIFY_BACKOFF * 2 ** attempt
+        logger.debug(f'Retrying badge verification in {delay:.1f} s after {error}: {url}')
+        get_guard().sleep(delay)
+
+def _verify_badges(icon_list, timeout=VERIFY_TIMEOUT, retries=VERIFY_RETRIES):
+    """Verify every distinct badge URL concurrently.
+
+    Returns:
+        List of (icon, error) for every badge that failed, in icon_list order
+    """
+    urls = list(dict.fromkeys(icon['url'] for icon in icon_list))
+    start_time = time.perf_counter()
+    errors = dict(zip(urls, thread_map(_verify_badge_url, [(url, timeout, retries) for url in urls])))
+    logger.info(f'Verified {len(urls)} badge URL(s) in {(time.perf_counter() - start_time) * 1000:.0f} ms')
+    return [(icon, errors[icon['url']]) for icon in icon_list if errors[icon['url']] is not None]
+
+def _log_network_degradation():
+    """Summarize what fell back to the degradation policy after the guard gave out, if anything."""
+    guard = get_guard()
+    if not guard.degraded:
+        return
+    parts = []
+    for kind, items in sorted(guard.degraded.items()):
+        if kind == 'logo checks':
+            parts.append(f'{len(items)} logo checks used the {guard.policy!r} policy ({", ".join(sorted(items))})')
+        else:
+            parts.append(f'{len(items)} {kind} skipped')
+    logger.warning(f'Network degraded ({guard.tripped}): {"; ".join(parts)}')
+
+def _log_network_stats():
+    """Summarize the run's requests and the bytes logo probes read, if any requests were made."""
+    stats = get_stats()
+    if not stats['requests']:
+        return
+    summary = f'Network: {stats["requests"]} request(s), {stats["not_modified"]} not modified, {stats["rate_limited"]} rate limited'
+    if stats['probe_bytes']:
+        summary += (f'; logo checks read {stats["probe_bytes"] / 1024:.1f} KiB, '
+                    f'{stats["probes_stopped_early"]} stopped early')
+    logger.info(summary)
 
 def _parse_slug_with_params(slug_spec):
     """Parse a slug specification with optional custom parameters using standard URL parsing.
@@ -306,6 +780,40 @@ def _parse_slug_with_params(slug_spec):
     
     return slug, params
 
+def _codeblock_checker(content):
+    """Return a function telling whether a position in content is inside a markdown codeblock."""
+    # Find all codeblock boundaries (triple backticks)
+    codeblock_pattern = r'^```'
+    codeblock_positions = []
+    in_codeblock = False
+    
+    for match in re.finditer(codeblock_pattern, content, re.MULTILINE):
+        pos = match.start()
+        in_codeblock = not in_codeblock
+        codeblock_positions.append((pos, in_codeblock))
+    
+    def is_in_codeblock(position):
+        """Check if a given position is inside a codeblock using binary search."""
+        import bisect
+        if not codeblock_positions:
+            return False
+        # Find the rightmost codeblock boundary at or before this position
+        idx = bisect.bisect_right([pos for pos, _ in codeblock_positions], position)
+        if idx == 0:
+            return False  # Before any codeblock
+        return codeblock_positions[idx - 1][1]  # Return the state after that boundary
+    
+    return is_in_codeblock
+
+def _find_badge_block(content, badges_header, badges_footer):
+    """Return the text between the first pair of badge markers outside codeblocks, or None if there is none."""
+    is_in_codeblock = _codeblock_checker(content)
+    pattern = fr"{re.escape(badges_header)}(.*?){re.escape(badges_footer)}"
+    for match in re.finditer(pattern, content, re.S):
+        if not is_in_codeblock(match.start()):
+            return match.group(1)
+    return None
+
 def _replace_badges_outside_codeblocks(content, badges_header, badges_footer, badges):
     """Replace badge markers with new badges, but skip markers inside markdown codeblocks.
     
@@ -327,26 +835,7 @@ def _replace_badges_outside_codeblocks(content, badges_header, badges_footer, ba
         - modified_content: Content with badges replaced only outside codeblocks
         - markers_found: Boolean indicating if any markers were found outside codeblocks
     """
-    # Find all codeblock boundaries (triple backticks)
-    codeblock_pattern = r'^```'
-    codeblock_positions = []
-    in_codeblock = False
-    
-    for match in re.finditer(codeblock_pattern, content, re.MULTILINE):
-        pos = match.start()
-        in_codeblock = not in_codeblock
-        codeblock_positions.append((pos, in_codeblock))
-    
-    def is_in_codeblock(position):
-        """Check if a given position is inside a codeblock using binary search."""
-        import bisect
-        if not codeblock_positions:
-            return False
-        # Find the rightmost codeblock boundary at or before this position
-        idx = bisect.bisect_right([pos for pos, _ in codeblock_positions], position)
-        if idx == 0:
-            return False  # Before any codeblock
-        return codeblock_positions[idx - 1][1]  # Return the state after that boundary
+    is_in_codeblock = _codeblock_checker(content)
     
     # Find all badge marker pairs
     pattern = fr"({re.escape(badges_header)}.*?{re.escape(badges_footer)})"
@@ -370,7 +859,231 @@ def _replace_badges_outside_codeblocks(content, badges_header, badges_footer, ba
     
     return result, markers_found
 
+def _plan_badge(slug_config, args):
+    """Work out everything about a badge except its embedded logo data URI.
+    
+    Returns a plan dict; 'embed' says whether the logo must be embedded as a data URI,
+    in which case 'logo_fill' is the fill color to embed it with.
+    """
+    slug = slug_config['slug']
+    custom_params = slug_config['params']
+    
+    logger.debug('slug: %s, custom_params: %s' % (slug, custom_params))
+    icon = icons.get(slug)
+    
+    # Allow custom text parameter to override the icon title
+    display_text = custom_params.get('text', icon.title) if 'text' in custom_params else icon.title
+    icon_title_safe = quote(display_text.encode('utf8'), safe='').replace('-', '--') if display_text else ''
+    
+    # Allow custom color parameter to override the icon hex color
+    badge_color = custom_params.get('color', icon.hex)
+    # Ensure color starts without # symbol for consistency
+    if badge_color.startswith('#'):
+        badge_color = badge_color[1:]
+    
+    icon_rgb = [int(badge_color[0:2], 16), int(badge_color[2:4], 16), int(badge_color[4:6], 16)]
+    icon_brightness = (icon_rgb[0] * 299 + icon_rgb[1] * 587 + icon_rgb[2] * 114) / 255000
+    icon_hex_comp = 'white' if icon_brightness < 0.695 else 'black'
+    
+    plan = {
+        'slug': icon.slug,
+        'hex': icon.hex,
+        'title': display_text if display_text else icon.title,
+        'title_safe': icon_title_safe,
+        'color': badge_color,
+        'rgb': icon_rgb,
+        'hex_comp': icon_hex_comp,
+        # Store custom URL if provided
+        'custom_url': custom_params.get('url', None),
+        'embed': False,
+        'logo_fill': icon_hex_comp,
+        'logo_data_uri': None,
+    }
+    
+    if args.provider == 'shields':
+        # Shields.io format - embed the SVG if forced, otherwise only if the logo turns out to be missing
+        plan['embed'] = args.embed_svg
+    elif args.provider == 'badgen':
+        # Badgen.net format
+        # Convert SVG to base64 data URI (with automatic PNG fallback for large SVGs)
+        # Cap background brightness at 0.7 since Badgen.net doesn't support black text
+        if icon_brightness > 0.7:
+            # Scale down RGB values to achieve 0.7 brightness for background
+            scale_factor = 0.7 / icon_brightness
+            capped_rgb = [int(c * scale_factor) for c in icon_rgb]
+            capped_hex = f"{capped_rgb[0]:02x}{capped_rgb[1]:02x}{capped_rgb[2]:02x}"
+            plan['background_color'] = capped_hex
+            logger.debug(f'Capping bright background {icon.slug} from #{badge_color} (brightness {icon_brightness:.3f}) to #{capped_hex} (brightness 0.7) for Badgen visibility')
+        else:
+            # Use original color for normal brightness backgrounds
+            plan['background_color'] = badge_color
+        
+        # Always use white icons for good contrast against any background
+        plan['embed'] = True
+        plan['logo_fill'] = 'white'
+    else:
+        logger.fatal(f'Unknown provider: {args.provider}. Supported providers are: shields, badgen')
+        sys.exit(1)
+    
+    return plan
+
+def _badge_entry(plan, icon_base, args):
+    """Build the badge URL for a planned badge and return its icon_list entry."""
+    icon_title_safe = plan['title_safe']
+    badge_color = plan['color']
+    
+    if args.provider == 'shields':
+        icon_url = f'{icon_base}/{icon_title_safe}-{badge_color}.svg' if icon_title_safe else f'{icon_base}/-{badge_color}.svg'
+        if plan['embed']:
+            icon_data_uri_encoded = quote(plan['logo_data_uri'], safe='')
+            icon_url += f'?style={args.badge_style}&logo={icon_data_uri_encoded}'
+        else:
+            # Use standard Shields.io logo parameter
+            icon_url += f'?style={args.badge_style}&logo={plan["slug"]}&logoColor={plan["hex_comp"]}'
+    else:
+        icon_data_uri_encoded = quote(plan['logo_data_uri'], safe='')
+        background_color = plan['background_color']
+        icon_url = f'{icon_base}/icon/{icon_title_safe}?icon={icon_data_uri_encoded}&label&color={background_color}&labelColor={background_color}' if icon_title_safe else f'{icon_base}/icon/?icon={icon_data_uri_encoded}&label&color={background_color}&labelColor={background_color}'
+    
+    # Check if badge URL would exceed GitHub's camo proxy limit and warn
+    camo_length = _calculate_camo_url_length(icon_url)
+    if camo_length > CAMO_URL_LIMIT:
+        logger.warning(f'Badge URL for {plan["slug"]} exceeds GitHub camo limit: {camo_length} > {CAMO_URL_LIMIT} chars. '
+                      f'Badge may not render correctly on GitHub. Consider using a simpler icon or badge style.')
+    
+    return {
+        'rgb': plan['rgb'],
+        'slug': plan['slug'],
+        'title': plan['title'],
+        'url': icon_url,
+        'custom_url': plan['custom_url']
+    }
+
+def _build_badges_phased(plans, icon_base, args, compression, logo_encoding, jobs):
+    """Probe logos, build data URIs and badge entries one stage at a time.
+
+    Returns:
+        icon_list entries in plan order, followed by the BadgeSort badge if enabled
+    """
+    # Shields.io format - check if logos are missing unless explicitly skipped or already embedding
+    if args.provider == 'shields' and not args.skip_logo_check:
+        with get_guard().stage():
+            logo_missing = _prefetch_logo_availability([plan for plan in plans if not plan['embed']], args.badge_style)
+        for plan in plans:
+            if not plan['embed']:
+                plan['embed'] = logo_missing[plan['slug']]
+
+    # build every embedded logo data URI, rasterizing all PNG fallbacks in one batch
+    # Use 3550 char limit to stay under GitHub camo's 8192 char limit
+    embedded = [plan for plan in plans if plan['embed']]
+    for plan in embedded:
+        logger.debug(f'Embedding SVG data URI for {plan["slug"]}')
+    data_uris = svg_to_base64_data_uris([_data_uri_item(plan) for plan in embedded],
+                                        compression=compression, encoding=logo_encoding, jobs=jobs)
+    for plan, data_uri in zip(embedded, data_uris):
+        plan['logo_data_uri'] = data_uri
+
+    # generate badge URLs for each slug
+    icon_list = [_badge_entry(plan, icon_base, args) for plan in plans]
+
+    if args.no_thanks is True:
+        icon_list.append(_thanks_badge(icon_base, args, compression, logo_encoding))
+    return icon_list
+
+def _data_uri_item(plan):
+    """Return the svg_to_base64_data_uris item for a plan's embedded logo."""
+    return (icons[plan['slug']].svg, plan['logo_fill'], 3550, plan['slug'])
+
+def _thanks_badge(icon_base, args, compression, logo_encoding):
+    """Build the icon_list entry for the BadgeSort badge."""
+    if args.provider == 'shields':
+        icon_url = f'{icon_base}/BadgeSort-000000.svg'
+        icon_url += f'?style={args.badge_style}&logo=githubsponsors'
+    elif args.provider == 'badgen':
+        # Badgen with githubsponsors heart icon
+        # Preserve the default color of the githubsponsors icon instead of adapting it
+        sponsor_icon = icons.get('githubsponsors')
+
+        # Convert the githubsponsors SVG to data URI preserving original color
+        sponsor_data_uri = svg_to_base64_data_uri(sponsor_icon.svg, fill_color=f'#{sponsor_icon.hex}', slug=sponsor_icon.slug,
+                                                  compression=compression, encoding=logo_encoding)
+        sponsor_data_uri_encoded = quote(sponsor_data_uri, safe='')
+        icon_url = f'{icon_base}/icon/BadgeSort?icon={sponsor_data_uri_encoded}&label&color=000000&labelColor=000000'
+    else:
+        logger.fatal(f'Unknown provider: {args.provider}. Supported providers are: shields, badgen')
+        sys.exit(1)
+    return { 'rgb': [0, 0, 0], 'slug': 'badgesort', 'title': 'BadgeSort', 'url': icon_url }
+
+def _badge_line(icon, output_format):
+    """Return the markup line for an icon_list entry in the output format."""
+    if output_format == 'markdown':
+        md_badge = f'![{icon["title"]}]({icon["url"]})'
+        if icon["slug"] == 'badgesort':
+            return f'[{md_badge}](https://github.com/ChipWolf/BadgeSort)\n'
+        elif icon.get('custom_url'):
+            # Use custom URL if provided
+            return f'[{md_badge}]({icon["custom_url"]})\n'
+        # Wrap badge with link to # so clicking doesn't open the image
+        return f'[{md_badge}](#)\n'
+    elif output_format == 'html':
+        if icon["slug"] == 'badgesort':
+            link = '  <a href="https://github.com/ChipWolf/BadgeSort">'
+        elif icon.get('custom_url'):
+            # Use custom URL if provided
+            link = f'  <a href="{icon["custom_url"]}">'
+        else:
+            link = '  <a href="#">'
+        return link + f'<img alt="{icon["title"]}" src="{icon["url"]}"></a>\n'
+    logger.fatal('Unknown output format: %s. Exiting.' % output_format)
+    sys.exit(1)
+
+def _sort_icons(icon_list, args):
+    """Return icon_list ordered by the chosen --color-sort method, reversed with --reverse."""
+    # sort the icons by chosen method
+    if args.color_sort == 'random':
+        logger.debug('Sorting icons randomly...')
+        random.shuffle(icon_list)
+    elif args.color_sort == 'oklab':
+        logger.debug('Sorting icons by color along a short path through OKLab...')
+        order = path_order([c['rgb'] for c in icon_list])
+        icon_list = [icon_list[i] for i in order]
+    elif args.color_sort in SORT_METHODS:
+        logger.debug(f'Sorting icons by color using {SORT_METHODS[args.color_sort]}...')
+        colors = [c['rgb'] for c in icon_list]
+        # catalog colours come from the prebuilt key table; custom colours are computed
+        keys = sort_keys_table.lookup(colors, args.color_sort, args.hue_rotate)
+        order = sort_order(colors, args.color_sort, args.hue_rotate, keys=keys)
+        icon_list = [icon_list[i] for i in order]
+
+    # invert the list if args.hue_invert is set
+    if args.reverse:
+        icon_list.reverse()
+    return icon_list
+
+def _read_badge_block(path, badges_header, badges_footer):
+    """Return the existing badge block in the output file, or None if the file or markers are missing."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return _find_badge_block(f.read(), badges_header, badges_footer)
+
 def run(args):
+    # persistent artifact cache settings (may be absent when run() is called programmatically)
+    cache_max_size = getattr(args, 'cache_max_size', None)
+    configure_cache(
+        directory=getattr(args, 'cache_dir', '') or None,
+        max_bytes=cache_max_size * 1024 * 1024 if cache_max_size is not None else None,
+        enabled=not getattr(args, 'no_cache', False),
+    )
+    configure_rasterizer(getattr(args, 'raster_backend', 'auto'))
+    compression = getattr(args, 'compression', 'fixed')
+    logo_encoding = getattr(args, 'logo_encoding', 'base64')
+    jobs = getattr(args, 'jobs', None)
+    offline = getattr(args, 'offline', False)
+    configure_network(getattr(args, 'concurrency', None), offline=offline, budget=getattr(args, 'network_budget', None),
+                      policy=getattr(args, 'degrade_policy', 'embed'), provider_url=getattr(args, 'provider_url', None),
+                      rate_limit=getattr(args, 'rate_limit', None), host_concurrency=getattr(args, 'host_concurrency', None))
+
     # user provided slugs
     if len(args.slugs) > 0:
         slugs_raw = ','.join(args.slugs).split(',')
@@ -381,7 +1094,7 @@ def run(args):
         for slug_spec in slugs_raw:
             slug, params = _parse_slug_with_params(slug_spec)
             if slug in icons:
-                slug_configs.append({'slug': slug, 'params': params})
+                slug_configs.append({'slug': slug, 'params': params, 'spec': slug_spec})
             else:
                 logger.info(f'Slug %s not found in package simpleicons.' % slug)
         
@@ -389,209 +1102,117 @@ def run(args):
     # user requested a random list of slugs of length args.random
     elif args.random > 0:
         slugs = random.sample(list(icons), args.random)
-        slug_configs = [{'slug': slug, 'params': {}} for slug in slugs]
+        slug_configs = [{'slug': slug, 'params': {}, 'spec': slug} for slug in slugs]
         logger.info('Generating %d random badges...' % args.random)
     # user requested all slugs
     elif args.random < 0:
         slugs = list(set(icons))
-        slug_configs = [{'slug': slug, 'params': {}} for slug in slugs]
+        slug_configs = [{'slug': slug, 'params': {}, 'spec': slug} for slug in slugs]
         logger.info('Generating all badges...')
     # user did not provide a required argument
     else:
         logger.fatal('No slugs or random icons specified. Exiting.')
         sys.exit(1)
 
-    icon_base = 'https://img.shields.io/badge' if args.provider == 'shields' else 'https://badgen.net/badge'
-    icon_list = []
+    icon_base = f'{provider_url(args.provider)}/badge'
+    badges_header = f'<!-- start chipwolf/badgesort {args.id} -->\n'
+    badges_footer = f'<!-- end chipwolf/badgesort {args.id} -->\n'
 
-    # generate badge URLs for each slug
-    for slug_config in slug_configs:
-        slug = slug_config['slug']
-        custom_params = slug_config['params']
-        
-        logger.debug('slug: %s, custom_params: %s' % (slug, custom_params))
-        icon = icons.get(slug)
-        
-        # Allow custom text parameter to override the icon title
-        display_text = custom_params.get('text', icon.title) if 'text' in custom_params else icon.title
-        icon_title_safe = quote(display_text.encode('utf8'), safe='').replace('-', '--') if display_text else ''
-        
-        # Allow custom color parameter to override the icon hex color
-        badge_color = custom_params.get('color', icon.hex)
-        # Ensure color starts without # symbol for consistency
-        if badge_color.startswith('#'):
-            badge_color = badge_color[1:]
-        
-        icon_rgb = [int(badge_color[0:2], 16), int(badge_color[2:4], 16), int(badge_color[4:6], 16)]
-        icon_brightness = (icon_rgb[0] * 299 + icon_rgb[1] * 587 + icon_rgb[2] * 114) / 255000
-        icon_hex_comp = 'white' if icon_brightness < 0.695 else 'black'
-        
-        if args.provider == 'shields':
-            # Shields.io format - check if logo is missing and embed SVG if needed
-            should_embed_svg = args.embed_svg
-            
-            # Check for missing logos unless explicitly skipped or already embedding
-            if not should_embed_svg and not args.skip_logo_check:
-                should_embed_svg = _is_logo_missing_from_shields(icon.slug, icon.hex, args.badge_style)
-            
-            if should_embed_svg:
-                logger.debug(f'Embedding SVG data URI for {icon.slug}')
-                # Convert SVG to base64 data URI for embedding
-                # Use 3550 char limit to stay under GitHub camo's 8192 char limit
-                icon_data_uri = svg_to_base64_data_uri(icon.svg, icon_hex_comp, max_url_length=3550)
-                icon_data_uri_encoded = quote(icon_data_uri, safe='')
-                icon_url = f'{icon_base}/{icon_title_safe}-{badge_color}.svg' if icon_title_safe else f'{icon_base}/-{badge_color}.svg'
-                icon_url += f'?style={args.badge_style}&logo={icon_data_uri_encoded}'
-            else:
-                # Use standard Shields.io logo parameter
-                icon_url = f'{icon_base}/{icon_title_safe}-{badge_color}.svg' if icon_title_safe else f'{icon_base}/-{badge_color}.svg'
-                icon_url += f'?style={args.badge_style}&logo={icon.slug}&logoColor={icon_hex_comp}'
-        elif args.provider == 'badgen':
-            # Badgen.net format
-            # Convert SVG to base64 data URI (with automatic PNG fallback for large SVGs)
-            # Cap background brightness at 0.7 since Badgen.net doesn't support black text
-            if icon_brightness > 0.7:
-                # Scale down RGB values to achieve 0.7 brightness for background
-                scale_factor = 0.7 / icon_brightness
-                capped_rgb = [int(c * scale_factor) for c in icon_rgb]
-                capped_hex = f"{capped_rgb[0]:02x}{capped_rgb[1]:02x}{capped_rgb[2]:02x}"
-                background_color = capped_hex
-                logger.debug(f'Capping bright background {icon.slug} from #{badge_color} (brightness {icon_brightness:.3f}) to #{background_color} (brightness 0.7) for Badgen visibility')
-            else:
-                # Use original color for normal brightness backgrounds
-                background_color = badge_color
-            
-            # Always use white icons for good contrast against any background
-            icon_data_uri = svg_to_base64_data_uri(icon.svg, 'white', max_url_length=3550)
-            icon_data_uri_encoded = quote(icon_data_uri, safe='')
-            icon_url = f'{icon_base}/icon/{icon_title_safe}?icon={icon_data_uri_encoded}&label&color={background_color}&labelColor={background_color}' if icon_title_safe else f'{icon_base}/icon/?icon={icon_data_uri_encoded}&label&color={background_color}&labelColor={background_color}'
-        else:
-            logger.fatal(f'Unknown provider: {args.provider}. Supported providers are: shields, badgen')
-            sys.exit(1)
-        
-        # Store custom URL if provided
-        custom_url = custom_params.get('url', None)
-        
-        # Check if badge URL would exceed GitHub's camo proxy limit and warn
-        camo_length = _calculate_camo_url_length(icon_url)
-        if camo_length > CAMO_URL_LIMIT:
-            logger.warning(f'Badge URL for {icon.slug} exceeds GitHub camo limit: {camo_length} > {CAMO_URL_LIMIT} chars. '
-                          f'Badge may not render correctly on GitHub. Consider using a simpler icon or badge style.')
-        
-        icon_list.append({ 
-            'rgb': icon_rgb, 
-            'slug': icon.slug, 
-            'title': display_text if display_text else icon.title, 
-            'url': icon_url,
-            'custom_url': custom_url
-        })
+    # with --incremental, only build the badges the existing block is missing
+    incremental = getattr(args, 'incremental', False)
+    kept = None
+    build_args = args
+    if incremental:
+        settings = block_settings(args, provider_url(args.provider))
+        block = _read_badge_block(args.output, badges_header, badges_footer) if args.output else None
+        entries = parse_block(block, settings) if block is not None else None
+        if entries is not None:
+            kept, added = split_entries(entries, [slug_config['spec'] for slug_config in slug_configs])
+            logger.info(f'Updating badge block "{args.id}": keeping {len(kept)} badges, '
+                        f'dropping {len(entries) - len(kept)}, adding {len(added)}')
+            slug_configs = [slug_configs[i] for i in added]
+            # the BadgeSort badge is already in the block if it is enabled
+            build_args = copy.copy(args)
+            build_args.no_thanks = False
 
-    if args.no_thanks is True:
-        if args.provider == 'shields':
-            icon_url = f'{icon_base}/BadgeSort-000000.svg'
-            icon_url += f'?style={args.badge_style}&logo=githubsponsors'
-        elif args.provider == 'badgen':
-            # Badgen with githubsponsors heart icon
-            # Preserve the default color of the githubsponsors icon instead of adapting it
-            sponsor_icon = icons.get('githubsponsors')
-            
-            # Convert the githubsponsors SVG to data URI preserving original color
-            sponsor_data_uri = svg_to_base64_data_uri(sponsor_icon.svg, fill_color=f'#{sponsor_icon.hex}')
-            sponsor_data_uri_encoded = quote(sponsor_data_uri, safe='')
-            icon_url = f'{icon_base}/icon/BadgeSort?icon={sponsor_data_uri_encoded}&label&color=000000&labelColor=000000'
+    # plan every badge (colors, titles, logo fills) before doing any expensive work
+    plans = [_plan_badge(slug_config, args) for slug_config in slug_configs]
+
+    verify = args.verify and not offline
+    if args.verify and offline:
+        logger.warning('Skipping badge verification in offline mode')
+    if args.provider == 'shields' and not args.skip_logo_check and offline and not logo_manifest.available:
+        logger.warning('Offline without a missing-logo manifest for this simpleicons version: '
+                       'logos that were never probed will be embedded')
+    verify_timeout = getattr(args, 'verify_timeout', VERIFY_TIMEOUT)
+    verify_retries = getattr(args, 'verify_retries', VERIFY_RETRIES)
+
+    # build every badge URL, either in phases or with network and CPU work overlapped
+    verify_errors = None
+    if getattr(args, 'engine', 'phased') == 'async':
+        from .pipeline import build_badges
+        with get_guard().stage():
+            icon_list, verify_errors = asyncio.run(build_badges(
+                plans, icon_base, build_args, compression=compression, encoding=logo_encoding, jobs=jobs,
+                verify=verify, verify_timeout=verify_timeout, verify_retries=verify_retries))
+    else:
+        icon_list = _build_badges_phased(plans, icon_base, build_args, compression, logo_encoding, jobs)
+    # the BadgeSort badge, if any, comes after the slugs and has no spec
+    for icon, slug_config in zip(icon_list, slug_configs):
+        icon['spec'] = slug_config['spec']
+
+    # an incremental update inserts the new badges at their sorted positions later instead
+    if kept is None:
+        icon_list = _sort_icons(icon_list, args)
+
+    # verify every badge renders before writing anything, reporting all failures at once
+    if verify:
+        if verify_errors is None:
+            with get_guard().stage():
+                failures = _verify_badges(icon_list, timeout=verify_timeout, retries=verify_retries)
         else:
-            logger.fatal(f'Unknown provider: {args.provider}. Supported providers are: shields, badgen')
+            # the async engine verified each URL as soon as it was final
+            failures = [(icon, verify_errors[icon['url']]) for icon in icon_list if verify_errors[icon['url']] is not None]
+        if failures:
+            report = '\n'.join(f'  {icon["slug"]}: {error} ({icon["url"]})' for icon, error in failures)
+            logger.fatal(f'Badge verification failed for {len(failures)} of {len(icon_list)} badges:\n{report}')
             sys.exit(1)
-        icon_list.append({ 'rgb': [0, 0, 0], 'slug': 'badgesort', 'title': 'BadgeSort', 'url': icon_url })
-
-    def lum (r,g,b):
-        return math.sqrt( .241 * r + .691 * g + .068 * b )
-
-    def step (r,g,b, repetitions=1, rotate=0, invert=False):
-        l = lum(r,g,b)
-        h, s, v = rgb_to_hsv(r,g,b)
-        h = (h + rotate / 255) % 1
-        h2 = int(h * repetitions)
-        v2 = int(v * repetitions)
-        if h2 % 2 == 1 and invert:
-            v2 = repetitions - v2
-            l = repetitions - l
-        return (h2, l, v2)
 
-    # sort the icons by chosen method
-    if args.color_sort == 'hilbert':
-        logger.debug('Sorting icons by color using a Hilbert walk...')
-        icon_list.sort(key=lambda c:Hilbert_to_int(c['rgb']))
-    elif args.color_sort == 'hsv':
-        logger.debug('Sorting icons by color using HSV...')
-        icon_list.sort(key=lambda c:rgb_to_hsv(*c['rgb']))
-    elif args.color_sort == 'random':
-        logger.debug('Sorting icons randomly...')
-        random.shuffle(icon_list)
-    elif args.color_sort == 'step':
-        logger.debug('Sorting icons by color using a step function...')
-        icon_list.sort(key=lambda c:step(*c['rgb'], 8, args.hue_rotate))
-    elif args.color_sort == 'step_invert':
-        logger.debug('Sorting icons by color using an inverted step function...')
-        icon_list.sort(key=lambda c:step(*c['rgb'], 8, args.hue_rotate, True))
-    elif args.color_sort == 'luminance':
-        logger.debug('Sorting icons by color using luminance...')
-        icon_list.sort(key=lambda c:lum(*c['rgb']))
+    _log_network_degradation()
+    _log_network_stats()
 
-    # invert the list if args.hue_invert is set
-    if args.reverse:
-        icon_list.reverse()
-
-    badges = ''
+    lines = []
 
     # enumerate all icons and generate badges
     for icon in icon_list:
         try:
             logger.debug(icon)
 
-            # verify the badge is valid by requesting it from Shields.io
-            if args.verify:
-                r = requests.get(icon['url'])
-                if r.status_code != 200:
-                    logger.debug(r.text)
-                    logger.fatal('Badge verification failed for %s. Exiting.' % icon['slug'])
-                    sys.exit(1)
-
             # generate the badge markup depending on the output format
-            if args.format == 'markdown':
-                md_badge = f'![{icon["title"]}]({icon["url"]})'
-                if icon["slug"] == 'badgesort':
-                    badges += f'[{md_badge}](https://github.com/ChipWolf/BadgeSort)\n'
-                elif icon.get('custom_url'):
-                    # Use custom URL if provided
-                    badges += f'[{md_badge}]({icon["custom_url"]})\n'
-                else:
-                    # Wrap badge with link to # so clicking doesn't open the image
-                    badges += f'[{md_badge}](#)\n'
-            elif args.format == 'html':
-                if icon["slug"] == 'badgesort':
-                    badges += '  <a href="https://github.com/ChipWolf/BadgeSort">'
-                elif icon.get('custom_url'):
-                    # Use custom URL if provided
-                    badges += f'  <a href="{icon["custom_url"]}">'
-                else:
-                    badges += '  <a href="#">'
-                badges += f'<img alt="{icon["title"]}" src="{icon["url"]}"></a>\n'
-            else:
-                logger.fatal('Unknown output format: %s. Exiting.' % args.format)
-                sys.exit(1)
+            lines.append(_badge_line(icon, args.format))
 
         except Exception as e:
             logger.fatal('Error generating badge for %s. Exiting.' % icon['slug'])
             sys.exit(1)
 
+    # record each line's spec, colour and sort key so the next incremental run can splice into the block
+    if incremental:
+        if kept is None:
+            entries = [make_entry(icon.get('spec'), icon['rgb'], line, settings) for icon, line in zip(icon_list, lines)]
+        else:
+            new_entries = [dict(make_entry(icon['spec'], icon['rgb'], line, settings), index=index)
+                           for icon, line, index in zip(icon_list, lines, added)]
+            entries = insert_entries(kept, new_entries, settings)
+        lines = [entry['line'] for entry in entries]
+    badges = ''.join(lines)
+
     # wrap badges in <p> tags if outputting HTML
     if args.format == 'html':
         badges = '<p>\n' + badges + '</p>\n'
+    if incremental:
+        badges = encode_manifest(settings, entries) + badges
 
     # wrap badges with a header and footer
-    badges_header = f'<!-- start chipwolf/badgesort {args.id} -->\n'
-    badges_footer = f'<!-- end chipwolf/badgesort {args.id} -->\n'
     badges = badges_header + badges + badges_footer
 
     # if output file is specified, write badges to file
@@ -633,10 +1254,22 @@ def run(args):
             else:
                 print(badges.encode('utf8'))
 
+    # accumulate this run's cache hit rate for `cache stats`
+    for run_cache in active_caches():
+        run_cache.flush_stats()
+
 def main(raw_args=None):
+    raw_args = sys.argv[1:] if raw_args is None else raw_args
+    # `badgesort cache ...` manages the artifact cache instead of generating badges
+    if raw_args and raw_args[0] == 'cache':
+        return cache_main(raw_args[1:])
+    # `badgesort manifest ...` regenerates the missing-logo manifest
+    if raw_args and raw_args[0] == 'manifest':
+        return manifest_main(raw_args[1:])
+
     parser = argparse.ArgumentParser(description='Generates branded badges with Shields.io, Badgen.net and SimpleIcons.org.')
     parser.add_argument('-b', '--badge-style', type=str, default='for-the-badge', help='Shields.io badge style.')
-    parser.add_argument('-c', '--color-sort', type=str, default='hilbert', help='Choose color sorting algorithm (hilbert/hsv/step/step_invert/luminance/random).')
+    parser.add_argument('-c', '--color-sort', type=str, default='hilbert', help='Choose color sorting algorithm (hilbert/hsv/step/step_invert/luminance/oklab/random).')
     parser.add_argument('-f', '--format', type=str, default='markdown', help='Output format (markdown/html).')
     parser.add_argument('-i', '--id', type=str, default='default', help='Badge generation ID.')
     parser.add_argument('-p', '--provider', type=str, default='shields', help='Badge provider (shields/badgen).')
@@ -649,6 +1282,24 @@ def main(raw_args=None):
     parser.add_argument('--reverse', action='store_true', help='Reverse the badges sort.')
     parser.add_argument('--embed-svg', action='store_true', help='Always embed SVG data URIs in Shields.io badges instead of using logo slugs.')
     parser.add_argument('--skip-logo-check', action='store_true', help='Skip checking if logos are missing from Shields.io (faster but may result in badges without icons).')
+    parser.add_argument('--cache-dir', type=str, default='', help='Directory for the persistent artifact cache (default: $BADGESORT_CACHE_DIR or ~/.cache/badgesort).')
+    parser.add_argument('--cache-max-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help='Maximum artifact cache size in MiB before least-recently-used entries are evicted.')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the persistent artifact cache.')
+    parser.add_argument('--compression', type=str, default='fixed', choices=COMPRESSION_MODES, help='SVG compression for embedded logos: fixed precision, or adaptive (retry oversized logos at lower precision before falling back to PNG).')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes for compressing and rasterizing embedded logos (0 = one per CPU; default: sequential).')
+    parser.add_argument('--logo-encoding', type=str, default='base64', choices=LOGO_ENCODINGS, help='Data URI encoding for embedded logos: base64, or shortest (percent-encoded UTF-8 SVG when that makes a shorter badge URL).')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Maximum concurrent HTTP requests to the badge provider when probing logos.')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests per second per provider host (default: adapt to 429 responses).')
+    parser.add_argument('--host-concurrency', type=int, default=None, help='Maximum concurrent requests per provider host (default: --concurrency).')
+    parser.add_argument('--verify-timeout', type=float, default=VERIFY_TIMEOUT, help='Seconds to wait for each --verify request.')
+    parser.add_argument('--verify-retries', type=int, default=VERIFY_RETRIES, help='Retries for --verify requests that fail with a server error or dropped connection (rate limits are retried separately).')
+    parser.add_argument('--network-budget', type=float, default=None, help='Seconds of wall time allowed for logo checks and verification; later requests fall back to --degrade-policy.')
+    parser.add_argument('--degrade-policy', type=str, default='embed', choices=DEGRADE_POLICIES, help='When the network budget is spent or Shields.io keeps failing: embed the remaining logos, use their slugs blindly, or use cached results.')
+    parser.add_argument('--engine', type=str, default='phased', choices=ENGINES, help='Badge pipeline: phased stages, or async (overlap logo checks, compression, rasterization and verification). Output is identical.')
+    parser.add_argument('--provider-url', type=str, default='', help='Build badge URLs on this origin instead of the real provider, e.g. a local stand-in server (default: $BADGESORT_PROVIDER_URL).')
+    parser.add_argument('--offline', action='store_true', help='Make no HTTP requests: decide which logos to embed from the missing-logo manifest and cached probes, and skip --verify.')
+    parser.add_argument('--raster-backend', type=str, default='auto', choices=RASTER_BACKENDS, help='PNG rasterizer for oversized logos: rsvg-convert, the built-in Python rasterizer, or auto (rsvg-convert if installed).')
+    parser.add_argument('--incremental', action='store_true', help='Update an existing badge block in the output file in place: keep the badges still requested, drop the others and only generate and insert the new ones. Embeds a manifest comment in the block.')
     args, unknown = parser.parse_known_args(raw_args)
     logger.debug(args)
 
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Incremental updates of an existing badge block.
+
+With ``--incremental``, ``run()`` embeds a manifest comment in the block it
+writes, right after the start marker:
+
+    <!-- start chipwolf/badgesort default -->
+    <!-- badgesort manifest {"version": 1, "settings": {...}, "badges": [[spec, color, key], ...]} -->
+    [![GitHub](https://img.shields.io/badge/...)](#)
+    ...
+    <!-- end chipwolf/badgesort default -->
+
+``badges`` describes every badge line of the block, in order: the slug spec
+it was generated from (slug and params as given on the command line, null
+for the BadgeSort badge), its colour and its sort key. The next incremental
+run with the same settings parses the block and:
+
+- keeps the lines of specs that are still requested, byte for byte (for
+  the keyed sorts, badges with equal keys are reordered to follow the slug
+  list, which may have changed),
+- drops the lines of specs that aren't,
+- generates badges only for new or changed specs, and inserts each at its
+  sorted position: bisected by key (ties go by position in the slug list)
+  for the keyed sorts, at the cheapest spot of the path for oklab, and
+  anywhere for random.
+
+So the probes, compression and verification a run does scale with the
+change, not the block. Different settings, or a block without a valid
+manifest, make ``run()`` regenerate the whole block instead.
+"""
+
+import json
+import logging
+import math
+import random
+from bisect import bisect_left
+
+from .catalog import simpleicons_version
+from .colorpath import rgb_to_oklab
+from .sorting import SORT_METHODS, color_key
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_PREFIX = '<!-- badgesort manifest '
+MANIFEST_SUFFIX = ' -->'
+
+
+def block_settings(args, provider_origin):
+    """Return the settings that shape a block's badge lines; a manifest is only reused when they match."""
+    return {
+        'simpleicons': simpleicons_version(),
+        'format': args.format,
+        'provider': args.provider,
+        'provider_url': provider_origin,
+        'badge_style': args.badge_style,
+        'color_sort': args.color_sort,
+        'hue_rotate': args.hue_rotate,
+        'reverse': args.reverse,
+        'thanks': args.no_thanks is True,
+        'embed_svg': args.embed_svg,
+        'skip_logo_check': args.skip_logo_check,
+        'compression': getattr(args, 'compression', 'fixed'),
+        'logo_encoding': getattr(args, 'logo_encoding', 'base64'),
+    }
+
+
+def sort_key(settings, rgb):
+    """Return a badge's sort key under the block settings, or None for the unkeyed sorts."""
+    if settings['color_sort'] not in SORT_METHODS:
+        return None
+    return color_key(settings['color_sort'], settings['hue_rotate'])(tuple(rgb))
+
+
+def make_entry(spec, rgb, line, settings):
+    """Describe one badge line of a block."""
+    return {'spec': spec, 'color': '%02X%02X%02X' % tuple(rgb), 'key': sort_key(settings, rgb), 'line': line}
+
+
+def _rgb(entry):
+    color = entry['color']
+    return (int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16))
+
+
+def encode_manifest(settings, entries):
+    """Return the manifest comment line for a block of entries."""
+    manifest = json.dumps({
+        'version': MANIFEST_VERSION,
+        'settings': settings,
+        'badges': [[entry['spec'], entry['color'], entry['key']] for entry in entries],
+    }, separators=(',', ':'), ensure_ascii=False)
+    # "--" can't appear in an HTML comment; it can only occur inside JSON strings, where it can be escaped
+    return MANIFEST_PREFIX + manifest.replace('--', '-\\u002d') + MANIFEST_SUFFIX + '\n'
+
+
+def parse_block(block, settings):
+    """Read the entries of a block written by an incremental run.
+
+    Args:
+        block: Text between the start and end markers
+        settings: Current block_settings()
+
+    Returns:
+        List of entries with their original lines, or None if the block has no
+        usable manifest (missing, malformed, other settings, or edited by hand)
+    """
+    lines = block.splitlines(keepends=True)
+    if not lines or not lines[0].startswith(MANIFEST_PREFIX) or not lines[0].rstrip('\n').endswith(MANIFEST_SUFFIX):
+        logger.info('No badge manifest in the existing block; regenerating it')
+        return None
+    try:
+        manifest = json.loads(lines[0].rstrip('\n')[len(MANIFEST_PREFIX):-len(MANIFEST_SUFFIX)])
+        badges = manifest['badges']
+    except (ValueError, KeyError, TypeError) as e:
+        logger.info(f'Unreadable badge manifest in the existing block ({e}); regenerating it')
+        return None
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('settings') != settings:
+        logger.info('Badge settings changed since the block was written; regenerating it')
+        return None
+
+    body = lines[1:]
+    if settings['format'] == 'html':
+        if len(body) < 2 or body[0] != '<p>\n' or body[-1] != '</p>\n':
+            logger.info('The existing block was edited by hand; regenerating it')
+            return None
+        body = body[1:-1]
+    if len(body) != len(badges):
+        logger.info('The existing block was edited by hand; regenerating it')
+        return None
+    return [{'spec': spec, 'color': color, 'key': tuple(key) if isinstance(key, list) else key, 'line': line}
+            for (spec, color, key), line in zip(badges, body)]
+
+
+def split_entries(entries, specs):
+    """Match a block's entries against the requested slug specs.
+
+    Args:
+        entries: Entries from parse_block()
+        specs: Requested slug specs, in command line order
+
+    Returns:
+        (kept, added): the entries still requested, in block order, with their
+        'index' in specs set (the BadgeSort badge comes after every spec), and
+        the indices of the specs that need new badges
+    """
+    positions = {}
+    for index, spec in enumerate(specs):
+        positions.setdefault(spec, []).append(index)
+    kept = []
+    for entry in entries:
+        if entry['spec'] is None:
+            kept.append(dict(entry, index=len(specs)))
+        elif positions.get(entry['spec']):
+            kept.append(dict(entry, index=positions[entry['spec']].pop(0)))
+    added = sorted(index for remaining in positions.values() for index in remaining)
+    return kept, added
+
+
+def insert_entries(entries, new_entries, settings):
+    """Insert new entries (each with an 'index' in the slug list) into a sorted block's entries.
+
+    Returns:
+        The merged list of entries
+    """
+    entries = list(entries)
+    method = settings['color_sort']
+    if method in SORT_METHODS:
+        # A full run sorts by (key, slug list index), descending with --reverse. Kept badges
+        # with equal keys are reordered first, in case the slug list was reordered
+        reverse = settings['reverse']
+        entries.sort(key=lambda e: (e['key'], e['index']), reverse=reverse)
+        ranks = sorted((e['key'], e['index']) for e in entries)
+        for entry in new_entries:
+            rank = (entry['key'], entry['index'])
+            position = bisect_left(ranks, rank)
+            entries.insert(len(ranks) - position if reverse else position, entry)
+            ranks.insert(position, rank)
+        return entries
+    for entry in new_entries:
+        if method == 'oklab':
+            position = _cheapest_position(entries, entry)
+        else:
+            position = random.randint(0, len(entries))
+        entries.insert(position, entry)
+    return entries
+
+
+def _cheapest_position(entries, entry):
+    """Return where inserting entry lengthens the OKLab path through entries the least."""
+    if not entries:
+        return 0
+    point = rgb_to_oklab(*_rgb(entry))
+    path = [rgb_to_oklab(*_rgb(e)) for e in entries]
+    costs = [math.dist(point, path[0])]
+    costs += [math.dist(a, point) + math.dist(point, b) - math.dist(a, b) for a, b in zip(path, path[1:])]
+    costs.append(math.dist(path[-1], point))
+    return costs.index(min(costs))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Manifest of Simple Icons logos that Shields.io can't render.
+
+Shields.io bundles its own copy of Simple Icons, so some slugs in the installed
+catalog render without a logo and have to be embedded as data URIs instead.
+This module probes every catalog slug once and records the result next to the
+icon catalog:
+
+    missing_logos.json  {"format", "simpleicons", "generated", "missing", "unchecked"}
+
+``missing`` lists the slugs Shields.io rendered without a logo, and
+``unchecked`` the slugs whose probe failed (those are treated as missing, like a
+failed live probe). The manifest is only used with the simpleicons version it
+was generated for.
+
+``run()`` consults it in ``--offline`` mode, where no HTTP requests are made,
+and the web generator in ``docs/`` can load a copy of the same file.
+
+Generate it with ``python -m badgesort.manifest`` (or
+``python -m badgesort.icons manifest``).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from .catalog import _atomic_write, catalog_dir, simpleicons_version
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = 1
+MANIFEST_FILE = 'missing_logos.json'
+
+
+class MissingLogoManifest(object):
+    """Lazily loaded view of the missing-logo manifest for the installed simpleicons version."""
+
+    def __init__(self, path=None):
+        self._path = path
+        self._missing = None
+        self._unchecked = None
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        path = self._path or os.path.join(catalog_dir(), MANIFEST_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug(f'Missing-logo manifest unavailable: {e}')
+            return
+        if manifest.get('format') != MANIFEST_FORMAT or manifest.get('simpleicons') != simpleicons_version():
+            logger.warning(f'Ignoring missing-logo manifest {path}: generated for simpleicons '
+                           f'{manifest.get("simpleicons")}, installed {simpleicons_version()}')
+            return
+        self._missing = frozenset(manifest.get('missing', ()))
+        self._unchecked = frozenset(manifest.get('unchecked', ()))
+        logger.debug(f'Loaded missing-logo manifest from {path} ({len(self._missing)} missing)')
+
+    @property
+    def available(self):
+        """Whether a manifest matching the installed simpleicons version was found."""
+        self._load()
+        return self._missing is not None
+
+    def is_missing(self, slug):
+        """Return whether Shields.io can't render the slug's logo, or None if the manifest doesn't know."""
+        self._load()
+        if self._missing is None or slug in self._unchecked:
+            return None
+        return slug in self._missing
+
+
+def build_manifest(path=None, badge_style='flat'):
+    """Probe Shields.io for every catalog slug and write the manifest.
+
+    Probes run concurrently over the shared HTTP session (see badgesort.network)
+    and bypass the probe caches, but refresh the on-disk probe cache as they go.
+    Once the circuit breaker trips, the remaining slugs are recorded as unchecked.
+
+    Args:
+        path: Output file (defaults to missing_logos.json in the catalog directory)
+        badge_style: Badge style used for the sample badges
+
+    Returns:
+        The manifest dict that was written
+    """
+    from .icons import _probe_logo, _store_logo_probe, icons
+    from .network import CircuitOpenError, thread_map
+
+    path = path or os.path.join(catalog_dir(), MANIFEST_FILE)
+    slugs = sorted(icons)
+
+    def probe(slug):
+        try:
+            status = _probe_logo(slug, icons[slug].hex, badge_style)
+        except CircuitOpenError:
+            # Shields.io kept failing; the rest of the catalog is left unchecked
+            return 'error'
+        _store_logo_probe(slug, status)
+        return status
+
+    start_time = time.perf_counter()
+    statuses = dict(zip(slugs, thread_map(probe, [(slug,) for slug in slugs])))
+    logger.info(f'Probed {len(slugs)} logos in {time.perf_counter() - start_time:.1f} s')
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'simpleicons': simpleicons_version(),
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'missing': [slug for slug in slugs if statuses[slug] == 'missing'],
+        'unchecked': [slug for slug in slugs if statuses[slug] == 'error'],
+    }
+    if manifest['unchecked']:
+        logger.warning(f'{len(manifest["unchecked"])} logo probes failed; they are recorded as unchecked')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    _atomic_write(path, (json.dumps(manifest, indent=1) + '\n').encode('utf-8'))
+    return manifest
+
+
+# Shared lazily-loaded manifest used by badgesort.icons
+manifest = MissingLogoManifest()
+
+
+def main(raw_args=None):
+    from .network import DEFAULT_CONCURRENCY, configure as configure_network
+
+    parser = argparse.ArgumentParser(prog='badgesort manifest', description='Probe Shields.io for every Simple Icons logo and write the missing-logo manifest.')
+    parser.add_argument('-o', '--output', type=str, default='', help=f'Output file (defaults to {MANIFEST_FILE} in the packaged data directory).')
+    parser.add_argument('-b', '--badge-style', type=str, default='flat', help='Shields.io badge style for the sample badges.')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Maximum concurrent requests to Shields.io.')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests per second to Shields.io (default: adapt to 429 responses).')
+    parser.add_argument('--max-unchecked', type=int, default=0, help='Exit with an error if more probes than this fail.')
+    args = parser.parse_args(raw_args)
+
+    configure_network(args.concurrency, rate_limit=args.rate_limit)
+    path = args.output or os.path.join(catalog_dir(), MANIFEST_FILE)
+    result = build_manifest(path, badge_style=args.badge_style)
+    print(f'Wrote {path}: {len(result["missing"])} missing and {len(result["unchecked"])} unchecked logos '
+          f'for simpleicons {result["simpleicons"]}')
+    sys.exit(1 if len(result['unchecked']) > args.max_unchecked else 0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
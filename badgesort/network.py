@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Shared HTTP session and thread pool helpers for badge provider requests.
+
+Logo availability probes and badge verification are network bound, so they
+are issued from a bounded pool of threads over one keep-alive
+``requests.Session``. Connections to img.shields.io are reused across probes
+instead of paying a TLS handshake per icon.
+
+Requests whose outcome is worth remembering go through ``conditional_get``:
+the ETag and Last-Modified validators of a response are stored per URL with
+the verdict the caller derived from it, and sent back as If-None-Match and
+If-Modified-Since next time, so an unchanged badge costs a bodyless 304.
+
+In offline mode (``configure(offline=True)``) ``get_session`` raises
+OfflineError, so nothing can reach the network by accident.
+
+Every attempt also waits for a slot from the run's RequestScheduler (see
+``badgesort.scheduler``): per-host token-bucket rate limits that adapt to 429
+responses, Retry-After pauses, per-host concurrency caps and fair queuing
+between stages. Rate-limited requests are retried once the host's pause is
+over instead of failing, and don't count towards the circuit breaker.
+
+Run statistics (requests made, 304s, bytes read by logo probes) are
+counted with ``count()`` and reset by ``configure()``.
+
+Badge URLs are built on ``provider_url()``. Setting ``BADGESORT_PROVIDER_URL``
+(or ``configure(provider_url=...)``) points every provider at another server,
+such as the local stand-in in ``badgesort.standin``.
+
+Every ``conditional_get`` also passes through the run's NetworkGuard: a
+budget of wall time for the run's network stages (``configure(budget=...)``,
+spent inside ``guard.stage()`` blocks) and a circuit
+breaker that trips after BREAKER_FAILURES consecutive failed or slow
+responses. Once either gives out, requests raise CircuitOpenError straight
+away and callers fall back to the guard's degradation policy.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import cache_key, get_validator_cache
+from .scheduler import MAX_RETRY_AFTER, RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+# Default number of requests in flight at once, per run
+DEFAULT_CONCURRENCY = 16
+
+# Consecutive failed (5xx, 429, connection error) or slow responses that trip the circuit breaker
+BREAKER_FAILURES = 5
+BREAKER_SLOW_SECONDS = 3.0
+
+# Retries of a request answered with 429 Too Many Requests, after the host's pause
+RATE_LIMIT_RETRIES = 4
+
+# Origin of each badge provider's URLs
+PROVIDER_URLS = {'shields': 'https://img.shields.io', 'badgen': 'https://badgen.net'}
+PROVIDER_URL_ENV = 'BADGESORT_PROVIDER_URL'
+
+_concurrency = DEFAULT_CONCURRENCY
+_offline = False
+_provider_url = None
+_stats = Counter()
+_stats_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
+
+
+class OfflineError(RuntimeError):
+    """Raised when an HTTP request is attempted in offline mode."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of making a request once the circuit breaker has tripped or the budget is spent."""
+
+
+class NetworkGuard(object):
+    """Run-wide network deadline and circuit breaker, shared by every request thread.
+
+    Args:
+        budget: Seconds of wall time allowed inside stage() blocks, or None for no limit
+        policy: Name of the fallback callers apply once the guard gives out
+        failures: Consecutive failed or slow responses that trip the breaker
+        slow: Seconds after which a response counts as a failure
+    """
+
+    def __init__(self, budget=None, policy=None, failures=BREAKER_FAILURES, slow=BREAKER_SLOW_SECONDS):
+        self.budget = budget
+        self.spent = 0.0
+        # End of the budget while a stage is running
+        self.deadline = None
+        self.policy = policy
+        self.failures = failures
+        self.slow = slow
+        self.consecutive_failures = 0
+        # Why the guard gave out, or None while requests are allowed
+        self.tripped = None
+        # kind -> items that fell back to the policy, for the run summary
+        self.degraded = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self):
+        """Count the wall time spent inside the block against the budget."""
+        start_time = time.monotonic()
+        if self.budget is not None:
+            self.deadline = start_time + self.budget - self.spent
+        try:
+            yield
+        finally:
+            self.spent += time.monotonic() - start_time
+            self.deadline = None
+
+    def remaining(self):
+        """Return the seconds left in the budget, or None if there is no budget."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def _trip(self, reason):
+        if self.tripped is None:
+            self.tripped = reason
+            logger.warning(f'Network circuit breaker tripped ({reason}); falling back to the {self.policy!r} policy')
+
+    def admit(self, timeout):
+        """Return the timeout to use for a request, clamped to the budget, or raise CircuitOpenError."""
+        with self._lock:
+            remaining = self.remaining()
+            if remaining is not None and remaining <= 0:
+                self._trip('network budget spent')
+            if self.tripped is not None:
+                raise CircuitOpenError(self.tripped)
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def expire(self):
+        """Give out because the budget ran out while a request was waiting for a slot."""
+        with self._lock:
+            self._trip('network budget spent')
+
+    def record(self, ok, elapsed):
+        """Count a response towards tripping the breaker unless it was successful and fast."""
+        with self._lock:
+            if ok and elapsed <= self.slow:
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failures:
+                self._trip(f'{self.consecutive_failures} consecutive failed or slow responses')
+
+    def sleep(self, delay):
+        """Sleep for a retry backoff, but never past the deadline."""
+        remaining = self.remaining()
+        time.sleep(max(0.0, delay if remaining is None else min(delay, remaining)))
+
+    def note_degraded(self, kind, item):
+        with self._lock:
+            self.degraded.setdefault(kind, []).append(item)
+
+
+_guard = NetworkGuard()
+_scheduler = RequestScheduler(concurrency=DEFAULT_CONCURRENCY)
+
+
+def configure(concurrency=None, offline=False, budget=None, policy=None, provider_url=None, rate_limit=None,
+              host_concurrency=None):
+    """Configure the network for a run.
+
+    Args:
+        concurrency: Requests in flight at once (None restores the default)
+        offline: Set True to refuse all HTTP requests
+        budget: Seconds of wall time allowed for the run's network stages (None: unlimited)
+        policy: Degradation policy callers apply once the budget or circuit breaker gives out
+        provider_url: Origin to use for every badge provider (None: $BADGESORT_PROVIDER_URL or the real ones)
+        rate_limit: Requests per second per host (None: adapt to 429 responses)
+        host_concurrency: Requests in flight at once per host (None: the overall concurrency)
+    """
+    global _concurrency, _offline, _guard, _scheduler, _provider_url, _stats
+    _offline = offline
+    _provider_url = provider_url or None
+    _guard = NetworkGuard(budget, policy)
+    _stats = Counter()
+    concurrency = DEFAULT_CONCURRENCY if concurrency is None else concurrency
+    if concurrency < 1:
+        raise ValueError(f'concurrency must be 1 or more, got {concurrency}')
+    if rate_limit is not None and rate_limit <= 0:
+        raise ValueError(f'rate_limit must be positive, got {rate_limit}')
+    _scheduler = RequestScheduler(rate_limit, host_concurrency or concurrency)
+    if concurrency != _concurrency:
+        _concurrency = concurrency
+        # The connection pool is sized for the old concurrency
+        close_session()
+
+
+def get_concurrency():
+    """Return the configured number of concurrent requests."""
+    return _concurrency
+
+
+def _new_session(pool_size):
+    session = requests.Session()
+    # One pool slot per worker thread so no request waits for a free connection
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def provider_url(provider):
+    """Return the origin (scheme and host, no trailing slash) badge URLs for provider are built on."""
+    override = _provider_url or os.environ.get(PROVIDER_URL_ENV)
+    if override:
+        return override.rstrip('/')
+    return PROVIDER_URLS.get(provider, PROVIDER_URLS['badgen'])
+
+
+def count(**amounts):
+    """Add to the run's network statistics, e.g. count(requests=1)."""
+    with _stats_lock:
+        _stats.update(amounts)
+
+
+def get_stats():
+    """Return a copy of the run's network statistics."""
+    with _stats_lock:
+        return Counter(_stats)
+
+
+def get_guard():
+    """Return the NetworkGuard for the current run."""
+    return _guard
+
+
+def get_scheduler():
+    """Return the RequestScheduler for the current run."""
+    return _scheduler
+
+
+def is_offline():
+    """Return whether HTTP requests are disabled."""
+    return _offline
+
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    if _offline:
+        raise OfflineError('HTTP requests are disabled in offline mode')
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _new_session(_concurrency)
+    return _session
+
+
+def close_session():
+    """Close the shared session and its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def thread_map(func, arg_tuples, concurrency=None):
+    """Call func(*args) for every tuple in arg_tuples across up to `concurrency` threads.
+
+    Uses the configured concurrency by default, and runs inline when there is a
+    single worker or fewer than two calls.
+
+    Returns:
+        List of results in input order
+    """
+    arg_tuples = list(arg_tuples)
+    workers = min(concurrency or _concurrency, len(arg_tuples))
+    if workers <= 1:
+        return [func(*args) for args in arg_tuples]
+    logger.debug(f'Running {len(arg_tuples)} {func.__name__} calls on {workers} threads')
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='badgesort-net') as executor:
+        return list(executor.map(func, *zip(*arg_tuples)))
+
+
+def _validator_key(url):
+    return cache_key('http-validators', url)
+
+
+def _load_record(url):
+    validator_cache = get_validator_cache()
+    if validator_cache is None:
+        return None
+    cached = validator_cache.get(_validator_key(url))
+    try:
+        return json.loads(cached) if cached is not None else None
+    except ValueError:
+        return None
+
+
+def cached_verdict(url):
+    """Return the verdict last stored for url by remember_verdict(), without a request."""
+    record = _load_record(url)
+    return record.get('verdict') if record else None
+
+
+def conditional_get(url, timeout, stream=False, stage='default'):
+    """GET url over the shared session, revalidating any verdict stored for it.
+
+    Raises CircuitOpenError without making a request once the run's guard has
+    given out; otherwise the timeout is clamped to the remaining budget. With
+    stream=True the body is left unread, and the caller must close the response.
+    A 429 response is retried up to RATE_LIMIT_RETRIES times, once the
+    scheduler's pause for the host is over; the last one is returned.
+
+    Args:
+        url: URL to request
+        timeout: Per-request timeout in seconds
+        stream: Leave the body unread
+        stage: Name of the calling stage, for fair queuing in the scheduler
+
+    Returns:
+        (response, verdict): verdict is the one stored by remember_verdict() when
+        the server answered 304 Not Modified, otherwise None
+    """
+    record = _load_record(url)
+    headers = {}
+    if record:
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+    session = get_session()
+    guard = _guard
+    scheduler = _scheduler
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        if not scheduler.acquire(url, stage, guard.deadline):
+            guard.expire()
+            raise CircuitOpenError(guard.tripped)
+        status = retry_after = None
+        try:
+            request_timeout = guard.admit(timeout)
+            start_time = time.monotonic()
+            try:
+                response = session.get(url, timeout=request_timeout, headers=headers, stream=stream)
+            except requests.RequestException:
+                guard.record(False, time.monotonic() - start_time)
+                raise
+            status, retry_after = response.status_code, response.headers.get('Retry-After')
+        finally:
+            pause = scheduler.release(url, status, retry_after)
+        count(requests=1, not_modified=int(status == 304))
+        if status != 429:
+            guard.record(status < 500, time.monotonic() - start_time)
+            break
+        # Being rate limited says nothing about the host's health; the scheduler slows down instead
+        count(rate_limited=1)
+        if attempt == RATE_LIMIT_RETRIES or pause >= MAX_RETRY_AFTER:
+            break
+        logger.debug(f'Rate limited, retrying in {pause:.1f} s: {url}')
+        response.close()
+    if status == 304 and record:
+        logger.debug(f'Not modified, reusing verdict {record["verdict"]!r}: {url}')
+        return response, record['verdict']
+    return response, None
+
+
+def remember_verdict(url, response, verdict):
+    """Store the response's validators with the verdict derived from it, if it has any."""
+    validator_cache = get_validator_cache()
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if validator_cache is None or not (etag or last_modified):
+        return
+    validator_cache.put(_validator_key(url), json.dumps({'etag': etag, 'last_modified': last_modified,
+                                                         'verdict': verdict}))
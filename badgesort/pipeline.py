@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""asyncio badge pipeline that overlaps network I/O with CPU work.
+
+The phased engine in ``badgesort.icons`` runs each stage over every badge
+before starting the next one: probe every logo, then compress every embedded
+logo, then rasterize every PNG fallback, then verify every badge. This engine
+moves each badge on as soon as its previous step is done:
+
+    probe logo (network threads) -> compress (CPU executor) -> rasterize (raster thread)
+        -> badge URL -> verify (network threads)
+
+so compression starts while other probes are still in flight, and
+verification streams as badge URLs become final. Every step calls the same
+functions as the phased engine and results are assembled in plan order, so the
+output is byte-identical. Select it with ``--engine async``.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .network import get_concurrency
+from .parallel import resolve_jobs
+
+logger = logging.getLogger(__name__)
+
+
+async def build_badges(plans, icon_base, args, compression='fixed', encoding='base64', jobs=None,
+                       verify=False, verify_timeout=None, verify_retries=None):
+    """Build the icon_list for planned badges with every network and CPU step overlapped.
+
+    Args:
+        plans: Badge plans from icons._plan_badge
+        icon_base: Badge provider base URL
+        args: Parsed command line arguments
+        compression: SVG compression mode for embedded logos
+        encoding: Logo encoding for embedded logos
+        jobs: Worker processes for compression (None runs it on one thread beside the event loop)
+        verify: Whether to verify every badge URL
+        verify_timeout: Per-request timeout for verification
+        verify_retries: Retries for verification requests
+
+    Returns:
+        (icon_list, verify_errors): icon_list exactly as the phased engine builds it, and
+        url -> error (None if the badge rendered) for every distinct URL, or None without verify
+    """
+    from .icons import (_badge_entry, _compute_data_uri, _data_uri_item, _finish_data_uri, _is_logo_missing_from_shields,
+                        _lookup_data_uri, _store_data_uri, _svg_to_png_data_uris, _thanks_badge, _verify_badge_url)
+
+    loop = asyncio.get_running_loop()
+    workers = resolve_jobs(jobs)
+    if workers > 1:
+        cpu_executor = ProcessPoolExecutor(max_workers=workers)
+        # Start the worker processes before any network thread exists, so none is forked mid-request
+        cpu_executor.submit(int).result()
+    else:
+        cpu_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='badgesort-cpu')
+    # PNG fallbacks are rasterized in-process so they use the configured backend and cache
+    raster_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='badgesort-raster')
+    network_executor = ThreadPoolExecutor(max_workers=get_concurrency(), thread_name_prefix='badgesort-net')
+
+    check_logos = args.provider == 'shields' and not args.skip_logo_check
+    # One future per slug and per URL, shared by every badge that needs it
+    probes = {}
+    verifications = {}
+
+    def probe(plan):
+        if plan['slug'] not in probes:
+            probes[plan['slug']] = loop.run_in_executor(network_executor, _is_logo_missing_from_shields,
+                                                        plan['slug'], plan['hex'], args.badge_style)
+        return probes[plan['slug']]
+
+    def start_verification(url):
+        if verify and url not in verifications:
+            verifications[url] = loop.run_in_executor(network_executor, _verify_badge_url, url,
+                                                      verify_timeout, verify_retries)
+
+    async def data_uri(item):
+        prepared = _lookup_data_uri(*item, compression=compression, encoding=encoding)
+        if prepared['data_uri'] is None:
+            svg_content, fill_color, max_url_length, _ = item
+            result = await loop.run_in_executor(cpu_executor, _compute_data_uri, svg_content, fill_color,
+                                                max_url_length, compression, encoding)
+            _store_data_uri(prepared, *result)
+        if prepared['fallback_svg'] is not None:
+            png_data_uris = await loop.run_in_executor(raster_executor, _svg_to_png_data_uris,
+                                                       [prepared['fallback_svg']], 14, [prepared['slug']])
+            prepared['data_uri'] = _finish_data_uri(prepared, png_data_uris[0])
+        return prepared['data_uri']
+
+    async def badge(plan):
+        if check_logos and not plan['embed']:
+            plan['embed'] = await probe(plan)
+        if plan['embed']:
+            logger.debug(f'Embedding SVG data URI for {plan["slug"]}')
+            plan['logo_data_uri'] = await data_uri(_data_uri_item(plan))
+        entry = _badge_entry(plan, icon_base, args)
+        start_verification(entry['url'])
+        return entry
+
+    start_time = time.perf_counter()
+    try:
+        icon_list = list(await asyncio.gather(*(badge(plan) for plan in plans)))
+        if args.no_thanks is True:
+            icon_list.append(_thanks_badge(icon_base, args, compression, encoding))
+            start_verification(icon_list[-1]['url'])
+        verify_errors = None
+        if verify:
+            urls = list(verifications)
+            verify_errors = dict(zip(urls, await asyncio.gather(*(verifications[url] for url in urls))))
+    finally:
+        for executor in (network_executor, raster_executor, cpu_executor):
+            executor.shutdown(wait=True)
+    logger.info(f'Built {len(plans)} badge(s) with the async engine in {(time.perf_counter() - start_time) * 1000:.0f} ms '
+                f'({len(probes)} logo checks, {len(verifications)} verifications)')
+    return icon_list, verify_errors
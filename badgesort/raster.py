@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""PNG rasterization backends for the oversized-logo fallback.
+
+Icons whose compressed SVG data URI is too long for GitHub's camo proxy are
+embedded as 14x14 PNGs instead. Rasterizers take SVG markup and return PNG
+bytes (or None on failure), and can convert a whole batch at once so ``run()``
+can collect every fallback candidate first and rasterize them together.
+
+Two backends are available:
+
+    rsvg    the ``rsvg-convert`` binary from librsvg (installed in the Docker image)
+    python  an in-process rasterizer for Simple Icons' single-fill path glyphs:
+            path parser, curve/arc flattening, scanline coverage anti-aliasing
+            and a minimal zlib-based PNG encoder
+
+``auto`` (the default) uses rsvg-convert when it is on PATH and the
+in-process rasterizer otherwise.
+"""
+
+import logging
+import math
+import os
+import re
+import shutil
+import struct
+import subprocess
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .parallel import process_map
+from .svgpath import parse_path
+
+logger = logging.getLogger(__name__)
+
+
+class RsvgRasterizer(object):
+    """Rasterize with the ``rsvg-convert`` binary from librsvg.
+
+    SVG markup is piped to stdin and the PNG read back from stdout, so no
+    temporary files touch the disk. rsvg-convert renders a single document to
+    PNG per invocation, so a batch is spread over a bounded pool of concurrent
+    processes rather than converted one after another.
+    """
+
+    name = 'rsvg-convert'
+
+    def __init__(self, binary='rsvg-convert', timeout=15):
+        self.binary = binary
+        self.timeout = timeout
+
+    def available(self):
+        return shutil.which(self.binary) is not None
+
+    def rasterize(self, svg_content, size):
+        """Return PNG bytes for svg_content at size x size pixels, or None on failure."""
+        cmd = [self.binary, f'--width={size}', f'--height={size}', '--format=png']
+        try:
+            result = subprocess.run(cmd, input=svg_content.encode('utf-8'), capture_output=True,
+                                    timeout=self.timeout)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.debug(f'{self.name} failed: {e}')
+            return None
+        if result.returncode != 0 or not result.stdout:
+            logger.debug(f'SVG to PNG conversion failed: {result.stderr.decode("utf-8", "replace")}')
+            return None
+        return result.stdout
+
+    def rasterize_batch(self, svgs, size, jobs=None):
+        """Rasterize a list of SVGs, returning a list of (png_bytes or None, seconds) in input order."""
+        if not svgs:
+            return []
+
+        def timed(svg_content):
+            start = time.perf_counter()
+            png_bytes = self.rasterize(svg_content, size)
+            return png_bytes, time.perf_counter() - start
+
+        workers = max(1, min(len(svgs), jobs or os.cpu_count() or 1))
+        if workers == 1:
+            return [timed(svg_content) for svg_content in svgs]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(timed, svgs))
+
+
+# Named colors accepted as fill values, on top of #rgb and #rrggbb
+_NAMED_COLORS = {'black': (0, 0, 0), 'white': (255, 255, 255)}
+
+_PATH_ELEMENT = re.compile(r'<path\b([^>]*)>', re.S)
+_ATTRIBUTE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_VIEWBOX = re.compile(r'<svg\b[^>]*?\bviewBox\s*=\s*["\']([^"\']+)["\']', re.S)
+
+
+def parse_color(value):
+    """Parse a fill color ('white', 'black', '#rgb' or '#rrggbb') into an (r, g, b) tuple."""
+    if value is None:
+        return _NAMED_COLORS['black']
+    value = value.strip().lower()
+    if value in _NAMED_COLORS:
+        return _NAMED_COLORS[value]
+    if value.startswith('#'):
+        digits = value[1:]
+        if len(digits) == 3:
+            digits = ''.join(c * 2 for c in digits)
+        if len(digits) == 6:
+            return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+    raise ValueError(f'unsupported fill color {value!r}')
+
+
+def _cubic_points(p0, p1, p2, p3, scale):
+    """Flatten a cubic Bezier into points (excluding p0), with ~0.5px segments."""
+    length = (math.dist(p0, p1) + math.dist(p1, p2) + math.dist(p2, p3)) * scale
+    n = max(1, min(64, math.ceil(length * 2)))
+    points = []
+    for k in range(1, n + 1):
+        t = k / n
+        mt = 1 - t
+        a, b, c, e = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+        points.append((a * p0[0] + b * p1[0] + c * p2[0] + e * p3[0],
+                       a * p0[1] + b * p1[1] + c * p2[1] + e * p3[1]))
+    return points
+
+
+def _quadratic_points(p0, p1, p2, scale):
+    """Flatten a quadratic Bezier into points (excluding p0)."""
+    length = (math.dist(p0, p1) + math.dist(p1, p2)) * scale
+    n = max(1, min(64, math.ceil(length * 2)))
+    points = []
+    for k in range(1, n + 1):
+        t = k / n
+        mt = 1 - t
+        a, b, c = mt * mt, 2 * mt * t, t * t
+        points.append((a * p0[0] + b * p1[0] + c * p2[0], a * p0[1] + b * p1[1] + c * p2[1]))
+    return points
+
+
+def _arc_points(p0, rx, ry, phi_degrees, large_arc, sweep, p1, scale):
+    """Flatten an elliptical arc into points (excluding p0), per SVG spec appendix F.6.5."""
+    if p0 == p1:
+        return []
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return [p1]
+    phi = math.radians(phi_degrees % 360)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx2, dy2 = (p0[0] - p1[0]) / 2, (p0[1] - p1[1]) / 2
+    x1p = cos_phi * dx2 + sin_phi * dy2
+    y1p = -sin_phi * dx2 + cos_phi * dy2
+
+    # Scale radii up if they can't span the endpoints
+    radii_check = (x1p * x1p) / (rx * rx) + (y1p * y1p) / (ry * ry)
+    if radii_check > 1:
+        root = math.sqrt(radii_check)
+        rx, ry = rx * root, ry * root
+
+    numerator = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    denominator = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    coef = math.sqrt(max(0.0, numerator / denominator)) if denominator else 0.0
+    if large_arc == sweep:
+        coef = -coef
+    cxp, cyp = coef * rx * y1p / ry, -coef * ry * x1p / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (p0[0] + p1[0]) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (p0[1] + p1[1]) / 2
+
+    theta1 = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    theta2 = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx)
+    dtheta = theta2 - theta1
+    if sweep and dtheta < 0:
+        dtheta += 2 * math.pi
+    elif not sweep and dtheta > 0:
+        dtheta -= 2 * math.pi
+
+    n = max(1, min(64, math.ceil(abs(dtheta) * max(rx, ry) * scale * 2)))
+    points = []
+    for k in range(1, n):
+        theta = theta1 + dtheta * k / n
+        x, y = rx * math.cos(theta), ry * math.sin(theta)
+        points.append((cos_phi * x - sin_phi * y + cx, sin_phi * x + cos_phi * y + cy))
+    points.append(p1)
+    return points
+
+
+def flatten_path(d, scale=1.0):
+    """Parse SVG path data into a list of polygons (lists of absolute (x, y) points).
+
+    Curves and arcs are flattened into line segments roughly half a device pixel
+    long, where scale converts user units to device pixels.
+    """
+    subpaths = []
+    points = None
+    current = start = (0.0, 0.0)
+    for segment in parse_path(d):
+        kind = segment[0]
+        if kind == 'Z':
+            if points is not None and len(points) > 1:
+                subpaths.append(points)
+            points = None
+            current = start
+            continue
+        if kind == 'M':
+            if points is not None and len(points) > 1:
+                subpaths.append(points)
+            current = start = segment[1:]
+            points = [current]
+            continue
+        if points is None:
+            # Drawing after closepath starts a new subpath at the current point
+            points = [current]
+        end = segment[-2:]
+        if kind == 'L':
+            points.append(end)
+        elif kind == 'C':
+            points.extend(_cubic_points(current, segment[1:3], segment[3:5], end, scale))
+        elif kind == 'Q':
+            points.extend(_quadratic_points(current, segment[1:3], end, scale))
+        elif kind == 'A':
+            points.extend(_arc_points(current, *segment[1:6], end, scale))
+        current = end
+
+    if points is not None and len(points) > 1:
+        subpaths.append(points)
+    return subpaths
+
+
+def rasterize_polygons(polygons, width, height, evenodd=False, samples=16):
+    """Compute per-pixel coverage (0.0-1.0) of filled polygons given in device pixels.
+
+    Each pixel row is sampled at `samples` sub-scanlines; along each sub-scanline
+    the covered span is accumulated with exact fractional coverage at its ends.
+
+    Returns:
+        List of rows, each a list of coverage values
+    """
+    edges = []
+    for polygon in polygons:
+        for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+            if y0 == y1:
+                continue
+            direction = 1 if y1 > y0 else -1
+            if y0 > y1:
+                x0, y0, x1, y1 = x1, y1, x0, y0
+            edges.append((y0, y1, x0, (x1 - x0) / (y1 - y0), direction))
+    edges.sort()
+
+    coverage = [[0.0] * width for _ in range(height)]
+    weight = 1.0 / samples
+    active = []
+    next_edge = 0
+    for row in range(height):
+        acc = coverage[row]
+        for k in range(samples):
+            y = row + (k + 0.5) / samples
+            while next_edge < len(edges) and edges[next_edge][0] <= y:
+                active.append(edges[next_edge])
+                next_edge += 1
+            active = [edge for edge in active if edge[1] > y]
+            if not active:
+                continue
+            crossings = sorted((x0 + (y - y0) * slope, direction)
+                               for y0, y1, x0, slope, direction in active if y0 <= y)
+            winding = 0
+            span_start = 0.0
+            for x, direction in crossings:
+                was_inside = (winding & 1) if evenodd else winding != 0
+                winding += direction
+                inside = (winding & 1) if evenodd else winding != 0
+                if inside and not was_inside:
+                    span_start = x
+                elif was_inside and not inside:
+                    _add_span(acc, span_start, x, width, weight)
+    return coverage
+
+
+def _add_span(acc, xa, xb, width, weight):
+    """Add weighted horizontal coverage of [xa, xb) to a row accumulator."""
+    xa = max(0.0, xa)
+    xb = min(float(width), xb)
+    if xb <= xa:
+        return
+    ia, ib = int(xa), int(xb)
+    if ia == ib:
+        acc[ia] += (xb - xa) * weight
+        return
+    acc[ia] += (ia + 1 - xa) * weight
+    for i in range(ia + 1, ib):
+        acc[i] += weight
+    if ib < width:
+        acc[ib] += (xb - ib) * weight
+
+
+def encode_png(width, height, rgb, coverage):
+    """Encode a single-color image with per-pixel alpha coverage as a PNG.
+
+    Gray fills are written as 8-bit gray+alpha, other fills as 8-bit RGBA.
+    """
+    gray = rgb[0] == rgb[1] == rgb[2]
+    color_prefix = bytes(rgb[:1]) if gray else bytes(rgb)
+    raw = bytearray()
+    for row in coverage:
+        raw.append(0)  # filter type: None
+        for value in row:
+            raw += color_prefix
+            raw.append(min(255, int(value * 255 + 0.5)))
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    color_type = 4 if gray else 6
+    header = struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(bytes(raw), 9)) + chunk(b'IEND', b''))
+
+
+class PythonRasterizer(object):
+    """In-process rasterizer for single-fill path glyphs such as Simple Icons.
+
+    Renders every <path> element with its own fill (default black) and
+    fill-rule, scaled from the viewBox into a size x size square like
+    preserveAspectRatio="xMidYMid meet".
+    """
+
+    name = 'python'
+
+    def available(self):
+        return True
+
+    def rasterize(self, svg_content, size):
+        """Return PNG bytes for svg_content at size x size pixels, or None on failure."""
+        try:
+            return self._rasterize(svg_content, size)
+        except (ValueError, IndexError, ZeroDivisionError) as e:
+            logger.debug(f'In-process rasterization failed: {e}')
+            return None
+
+    def _rasterize(self, svg_content, size):
+        viewbox = _VIEWBOX.search(svg_content)
+        min_x, min_y, vb_width, vb_height = [float(v) for v in
+                                             (viewbox.group(1).replace(',', ' ').split() if viewbox else (0, 0, 24, 24))]
+        scale = min(size / vb_width, size / vb_height)
+        offset_x = (size - vb_width * scale) / 2 - min_x * scale
+        offset_y = (size - vb_height * scale) / 2 - min_y * scale
+
+        coverage = None
+        rgb = None
+        for element in _PATH_ELEMENT.finditer(svg_content):
+            attrs = {m.group(1): m.group(2) if m.group(2) is not None else m.group(3)
+                     for m in _ATTRIBUTE.finditer(element.group(1))}
+            if 'd' not in attrs or attrs.get('fill') == 'none':
+                continue
+            fill = parse_color(attrs.get('fill'))
+            if rgb is not None and fill != rgb:
+                raise ValueError('multiple fill colors are not supported')
+            rgb = fill
+            polygons = [[(x * scale + offset_x, y * scale + offset_y) for x, y in polygon]
+                        for polygon in flatten_path(attrs['d'], scale)]
+            layer = rasterize_polygons(polygons, size, size, evenodd=attrs.get('fill-rule') == 'evenodd')
+            if coverage is None:
+                coverage = layer
+            else:
+                # Composite additional paths with "over" on coverage
+                coverage = [[a + b - a * b for a, b in zip(row_a, row_b)] for row_a, row_b in zip(coverage, layer)]
+
+        if coverage is None:
+            raise ValueError('no filled <path> elements found')
+        return encode_png(size, size, rgb, coverage)
+
+    def rasterize_batch(self, svgs, size, jobs=None):
+        """Rasterize a list of SVGs, returning a list of (png_bytes or None, seconds) in input order.
+
+        Runs in-process unless jobs asks for several worker processes (0 for one per CPU).
+        """
+        return process_map(_python_rasterize_timed, [(svg_content, size) for svg_content in svgs], jobs)
+
+
+def _python_rasterize_timed(svg_content, size):
+    """Rasterize with PythonRasterizer, returning (png_bytes or None, seconds); runs in worker processes."""
+    start = time.perf_counter()
+    png_bytes = PythonRasterizer().rasterize(svg_content, size)
+    return png_bytes, time.perf_counter() - start
+
+
+RASTER_BACKENDS = ('auto', 'rsvg', 'python')
+
+_rasterizer = None
+_backend = 'auto'
+
+
+def configure(backend='auto'):
+    """Select the rasterizer backend: 'auto', 'rsvg' or 'python'."""
+    global _rasterizer, _backend
+    if backend not in RASTER_BACKENDS:
+        raise ValueError(f'unknown raster backend {backend!r}, expected one of {", ".join(RASTER_BACKENDS)}')
+    _backend = backend
+    _rasterizer = None
+
+
+def get_rasterizer():
+    """Return the process-wide rasterizer backend."""
+    global _rasterizer
+    if _rasterizer is None:
+        if _backend == 'python':
+            _rasterizer = PythonRasterizer()
+        elif _backend == 'rsvg':
+            _rasterizer = RsvgRasterizer()
+        else:
+            rsvg = RsvgRasterizer()
+            _rasterizer = rsvg if rsvg.available() else PythonRasterizer()
+            logger.debug(f'Using {_rasterizer.name} rasterizer for PNG fallbacks')
+    return _rasterizer
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Rate-limit-aware scheduler for outbound requests, per provider host.
+
+Every request made by ``badgesort.network.conditional_get`` takes a slot from
+the run's RequestScheduler first, and hands it back with the response status.
+Each host gets:
+
+- a token bucket of requests per second. With a configured limit that limit
+  is the ceiling; otherwise the rate starts unlimited. A 429 halves the rate
+  observed over the last second, and successful responses raise it again by
+  RATE_INCREASE requests per second every second, so the rate settles near
+  the highest one the host tolerates (additive increase, multiplicative
+  decrease).
+- a pause honouring Retry-After (seconds or an HTTP date) on 429 and 503
+  responses, or an exponential backoff for 429s without one.
+- its own concurrency cap.
+- fair queuing: waiting requests are granted round-robin between stages
+  (logo probes and verification run side by side in the async engine), and
+  first come, first served within a stage.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Rate (requests per second) never drops below this after a 429
+MIN_RATE = 0.5
+# Factor applied to the request rate when a host answers 429
+RATE_DECREASE = 0.5
+# Requests per second added per second of successful responses once a host has throttled us
+RATE_INCREASE = 4.0
+# Window over which the request rate is measured when a 429 arrives
+RATE_WINDOW = 1.0
+# Pause after the first 429 without a Retry-After header, doubled for each one after it
+RATE_LIMIT_BACKOFF = 1.0
+# Longest pause a host may impose; callers stop retrying when asked to wait longer
+MAX_RETRY_AFTER = 60.0
+
+
+def parse_retry_after(value, now=None):
+    """Return the delay in seconds a Retry-After header value asks for, or None if it is malformed."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class _Host(object):
+    """Scheduling state for one host; guarded by the scheduler's condition."""
+
+    def __init__(self, rate, concurrency):
+        self.ceiling = rate
+        # Current rate in requests per second, or None for unlimited
+        self.rate = rate
+        self.tokens = max(1.0, rate or 0.0)
+        self.refilled = time.monotonic()
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.consecutive_throttles = 0
+        self.last_decrease = 0.0
+        # Grant times within RATE_WINDOW, to measure the rate a 429 answered
+        self.sent = deque()
+        # stage -> waiting tickets, and the stages with waiters in round-robin order
+        self.queues = {}
+        self.rotation = deque()
+
+    def refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+    def wait_time(self, now):
+        """Seconds until a request may be sent, 0 if it may go now, or None to wait for a release."""
+        if self.in_flight >= self.concurrency:
+            return None
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.refill(now)
+        if self.rate is not None and self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    def head(self):
+        return self.queues[self.rotation[0]][0] if self.rotation else None
+
+    def dequeue(self, stage, ticket):
+        queue = self.queues[stage]
+        queue.remove(ticket)
+        if stage in self.rotation:
+            self.rotation.remove(stage)
+            if queue:
+                # Granted stages go to the back of the rotation, so every stage gets its turn
+                self.rotation.append(stage)
+
+
+class RequestScheduler(object):
+    """Per-host rate limits, concurrency caps and fair queuing for request threads.
+
+    Args:
+        rate_limit: Requests per second per host, or None to adapt to 429 responses
+        concurrency: Requests in flight at once per host
+    """
+
+    def __init__(self, rate_limit=None, concurrency=16):
+        self.rate_limit = rate_limit
+        self.concurrency = concurrency
+        self._hosts = {}
+        self._cond = threading.Condition()
+
+    def _host(self, url):
+        name = urlsplit(url).netloc
+        if name not in self._hosts:
+            self._hosts[name] = _Host(self.rate_limit, self.concurrency)
+        return self._hosts[name]
+
+    def current_rate(self, url):
+        """Return the current rate limit for url's host, or None if it is unlimited."""
+        with self._cond:
+            return self._host(url).rate
+
+    def acquire(self, url, stage='default', deadline=None):
+        """Wait for a slot to request url, taking turns with other stages.
+
+        Args:
+            url: URL about to be requested
+            stage: Name of the calling stage, for fair queuing
+            deadline: time.monotonic() value after which to stop waiting, or None
+
+        Returns:
+            True once the request may be sent (call release() afterwards), False if the deadline passed
+        """
+        ticket = object()
+        with self._cond:
+            host = self._host(url)
+            host.queues.setdefault(stage, deque()).append(ticket)
+            if stage not in host.rotation:
+                host.rotation.append(stage)
+            while True:
+                now = time.monotonic()
+                wait = host.wait_time(now) if host.head() is ticket else None
+                if wait == 0:
+                    host.dequeue(stage, ticket)
+                    host.in_flight += 1
+                    if host.rate is not None:
+                        host.tokens -= 1
+                    host.sent.append(now)
+                    while host.sent and host.sent[0] < now - RATE_WINDOW:
+                        host.sent.popleft()
+                    # The next ticket may be able to go too
+                    self._cond.notify_all()
+                    return True
+                if deadline is not None:
+                    if now >= deadline:
+                        if host.head() is ticket:
+                            host.dequeue(stage, ticket)
+                        else:
+                            host.queues[stage].remove(ticket)
+                            if not host.queues[stage] and stage in host.rotation:
+                                host.rotation.remove(stage)
+                        self._cond.notify_all()
+                        return False
+                    wait = deadline - now if wait is None else min(wait, deadline - now)
+                self._cond.wait(wait)
+
+    def release(self, url, status=None, retry_after=None):
+        """Hand back a slot taken by acquire(), adapting the host's rate to the response.
+
+        Args:
+            url: URL that was requested
+            status: HTTP status of the response, or None if the request failed
+            retry_after: Value of the response's Retry-After header, if any
+
+        Returns:
+            Seconds the host is now paused for (0 if it isn't)
+        """
+        with self._cond:
+            host = self._host(url)
+            host.in_flight -= 1
+            now = time.monotonic()
+            delay = parse_retry_after(retry_after) if status in (429, 503) else None
+            if status == 429:
+                host.consecutive_throttles += 1
+                if delay is None:
+                    delay = RATE_LIMIT_BACKOFF * 2 ** (host.consecutive_throttles - 1)
+                # Requests that were in flight together share one decrease
+                if now - host.last_decrease >= RATE_WINDOW:
+                    observed = len(host.sent) / RATE_WINDOW
+                    current = observed if host.rate is None else min(host.rate, observed)
+                    host.rate = max(MIN_RATE, current * RATE_DECREASE)
+                    host.tokens = min(host.tokens, 0.0)
+                    host.last_decrease = now
+                    logger.debug(f'Rate limited by {urlsplit(url).netloc}: now {host.rate:.1f} requests/s')
+            elif status is not None and status < 400:
+                host.consecutive_throttles = 0
+                if host.rate is not None and (host.ceiling is None or host.rate < host.ceiling):
+                    host.rate += RATE_INCREASE / host.rate
+                    if host.ceiling is not None:
+                        host.rate = min(host.rate, host.ceiling)
+            if delay:
+                host.paused_until = max(host.paused_until, now + min(delay, MAX_RETRY_AFTER))
+            self._cond.notify_all()
+            return max(0.0, host.paused_until - now)
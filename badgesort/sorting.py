@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Batch sort keys for the ``--color-sort`` modes.
+
+``run()`` used to sort badges with a Python key function per badge. This
+module computes the keys for a whole batch of colours at once, from an (N, 3)
+array of 8-bit channels or any sequence of (r, g, b) triples:
+
+    sort_keys(colors, method)   key columns, primary key first
+    sort_order(colors, method)  permutation that sorts the colours
+
+With NumPy installed every key is computed with array operations, using the
+same float64 formulas in the same order as colorsys and the per-colour key
+functions below, so the keys are bit-identical and the stable sort gives
+exactly the order of ``list.sort`` with those functions. Without NumPy the
+per-colour functions are used directly.
+"""
+
+import logging
+import math
+from colorsys import rgb_to_hsv
+
+from .hilbert import _RGB_ENCODE, _RGB_SPREAD, _RGB_START, Hilbert_to_int_rgb
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Modes with a key per colour ('random' shuffles instead), and how they sort
+SORT_METHODS = {
+    'hilbert': 'a Hilbert walk',
+    'hsv': 'HSV',
+    'step': 'a step function',
+    'step_invert': 'an inverted step function',
+    'luminance': 'luminance',
+}
+# Hue and value bands used by the step modes
+STEP_REPETITIONS = 8
+
+
+def lum(r, g, b):
+    return math.sqrt( .241 * r + .691 * g + .068 * b )
+
+
+def step(r, g, b, repetitions=1, rotate=0, invert=False):
+    l = lum(r,g,b)
+    h, s, v = rgb_to_hsv(r,g,b)
+    h = (h + rotate / 255) % 1
+    h2 = int(h * repetitions)
+    v2 = int(v * repetitions)
+    if h2 % 2 == 1 and invert:
+        v2 = repetitions - v2
+        l = repetitions - l
+    return (h2, l, v2)
+
+
+def color_key(method, hue_rotate=0):
+    """Return the per-colour key function for a sort method.
+
+    Args:
+        method: One of SORT_METHODS
+        hue_rotate: Hue rotation for the step modes
+
+    Returns:
+        Function of an (r, g, b) triple returning its sort key
+    """
+    if method == 'hilbert':
+        return Hilbert_to_int_rgb
+    if method == 'hsv':
+        return lambda rgb: rgb_to_hsv(*rgb)
+    if method == 'step':
+        return lambda rgb: step(*rgb, STEP_REPETITIONS, hue_rotate)
+    if method == 'step_invert':
+        return lambda rgb: step(*rgb, STEP_REPETITIONS, hue_rotate, True)
+    if method == 'luminance':
+        return lambda rgb: lum(*rgb)
+    raise ValueError(f'Unknown sort method {method!r}, expected one of {", ".join(SORT_METHODS)}')
+
+
+def _channels(colors):
+    """Split colours into r, g and b int64 arrays."""
+    array = np.asarray(colors, dtype=np.uint8).reshape(-1, 3).astype(np.int64)
+    return array[:, 0], array[:, 1], array[:, 2]
+
+
+def _hilbert_np(r, g, b):
+    encode = np.asarray(_RGB_ENCODE, dtype=np.int64)
+    spread = np.asarray(_RGB_SPREAD, dtype=np.int64)
+    m = spread[r] << 2 | spread[g] << 1 | spread[b]
+    e = encode[_RGB_START | m >> 18]
+    i = e & 63
+    for shift in (12, 6, 0):
+        e = encode[e >> 6 | m >> shift & 63]
+        i = i << 6 | e & 63
+    return i
+
+
+def _hsv_np(r, g, b):
+    """colorsys.rgb_to_hsv over arrays, with the same operations in the same order."""
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    rangec = maxc - minc
+    gray = rangec == 0
+    # Grays are (0.0, 0.0, v); divide them by 1 to keep the arithmetic quiet
+    divisor = np.where(gray, 1, rangec).astype(np.float64)
+    s = np.where(gray, 0.0, rangec / np.where(maxc == 0, 1, maxc).astype(np.float64))
+    rc = (maxc - r) / divisor
+    gc = (maxc - g) / divisor
+    bc = (maxc - b) / divisor
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = np.where(gray, 0.0, np.remainder(h / 6.0, 1.0))
+    return h, s, maxc
+
+
+def _lum_np(r, g, b):
+    return np.sqrt( .241 * r + .691 * g + .068 * b )
+
+
+def _step_np(r, g, b, repetitions, rotate, invert):
+    l = _lum_np(r, g, b)
+    h, s, v = _hsv_np(r, g, b)
+    h = np.remainder(h + rotate / 255, 1.0)
+    h2 = (h * repetitions).astype(np.int64)
+    v2 = v * repetitions
+    if invert:
+        odd = h2 % 2 == 1
+        v2 = np.where(odd, repetitions - v2, v2)
+        l = np.where(odd, repetitions - l, l)
+    return h2, l, v2
+
+
+def sort_keys(colors, method, hue_rotate=0):
+    """Compute the sort keys of a batch of colours.
+
+    Args:
+        colors: (N, 3) array of 8-bit channels, or a sequence of (r, g, b) triples
+        method: One of SORT_METHODS
+        hue_rotate: Hue rotation for the step modes
+
+    Returns:
+        List of key columns, primary key first: NumPy arrays when NumPy is available,
+        tuples otherwise. Comparing rows of the columns orders colours like color_key(method).
+    """
+    if np is None:
+        key = color_key(method, hue_rotate)
+        keys = [key(tuple(rgb)) for rgb in colors]
+        if method in ('hilbert', 'luminance'):
+            return [tuple(keys)]
+        return list(zip(*keys)) if keys else [(), (), ()]
+
+    r, g, b = _channels(colors)
+    if method == 'hilbert':
+        return [_hilbert_np(r, g, b)]
+    if method == 'hsv':
+        return list(_hsv_np(r, g, b))
+    if method in ('step', 'step_invert'):
+        return list(_step_np(r, g, b, STEP_REPETITIONS, hue_rotate, method == 'step_invert'))
+    if method == 'luminance':
+        return [_lum_np(r, g, b)]
+    raise ValueError(f'Unknown sort method {method!r}, expected one of {", ".join(SORT_METHODS)}')
+
+
+def sort_order(colors, method, hue_rotate=0, keys=None):
+    """Return the permutation that sorts a batch of colours by a --color-sort method.
+
+    The sort is stable, so colours with equal keys keep their input order, as with list.sort.
+
+    Args:
+        colors: (N, 3) array of 8-bit channels, or a sequence of (r, g, b) triples
+        method: One of SORT_METHODS
+        hue_rotate: Hue rotation for the step modes
+        keys: Precomputed color_key(method, hue_rotate) keys aligned with colors, None
+            for those to compute (see badgesort.sortkeys), or None to compute them all
+
+    Returns:
+        List of indices into colors, in sorted order
+    """
+    if keys is not None:
+        key = color_key(method, hue_rotate)
+        keys = [key(tuple(colors[i])) if k is None else k for i, k in enumerate(keys)]
+        return sorted(range(len(keys)), key=keys.__getitem__)
+
+    if np is None:
+        key = color_key(method, hue_rotate)
+        keys = [key(tuple(rgb)) for rgb in colors]
+        return sorted(range(len(keys)), key=keys.__getitem__)
+
+    columns = sort_keys(colors, method, hue_rotate)
+    if len(columns) == 1:
+        order = np.argsort(columns[0], kind='stable')
+    else:
+        # lexsort takes the primary key last, and is stable
+        order = np.lexsort(columns[::-1])
+    return order.tolist()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Prebuilt ``--color-sort`` keys for every colour in the icon catalog.
+
+Sort keys are a pure function of a badge's colour, and brand colours only
+change with the simpleicons version, so this module computes every built-in
+key for every distinct catalog colour at build time and stores them next to
+the icon catalog:
+
+    sortkeys.json  column name -> [typecode, offset, count] plus the build fingerprint
+    sortkeys.bin   the columns as packed native arrays
+
+Columns are ``colors`` (sorted 24-bit RGB values) and one array per key
+component: ``hilbert.0``, ``hsv.0`` to ``hsv.2``, ``luminance.0``, and
+``step:<hue_rotate>.0`` to ``.2`` and ``step_invert:<hue_rotate>.0`` to ``.2``
+for each hue rotation built, plus a ``.rank`` column per table: the colour's
+position among the distinct keys of the catalog.
+
+When every colour being sorted is in the table, its rank is the sort key, so
+sorting is one pass over small ints. Otherwise lookups rebuild the exact key
+``badgesort.sorting.color_key`` returns (floats are stored as float64), and
+the colours that aren't in the table, such as custom ``color`` params, are
+computed on the fly. Either way the order is the same.
+
+Build it with ``python -m badgesort.sortkeys`` after building the catalog.
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import sys
+from array import array
+
+from .catalog import _atomic_write, catalog_dir, simpleicons_version
+from .sorting import SORT_METHODS, STEP_REPETITIONS, color_key
+
+logger = logging.getLogger(__name__)
+
+SORTKEYS_FORMAT = 1
+INDEX_FILE = 'sortkeys.json'
+BLOB_FILE = 'sortkeys.bin'
+
+# Hue rotations built by default; 0 is the CLI and action default
+DEFAULT_HUE_ROTATIONS = (0,)
+
+# Array typecodes of each method's key components (hilbert < 2**24, v <= 255, step v2 in [-2032, 2040])
+_COMPONENTS = {
+    'hilbert': ('I',),
+    'hsv': ('d', 'd', 'B'),
+    'step': ('B', 'd', 'h'),
+    'step_invert': ('B', 'd', 'h'),
+    'luminance': ('d',),
+}
+# Columns are padded to this many bytes so every array is aligned
+_ALIGNMENT = 8
+
+
+def _table_name(method, hue_rotate):
+    """Name of the stored table for a method: step modes have one per hue rotation."""
+    return f'{method}:{hue_rotate}' if method in ('step', 'step_invert') else method
+
+
+def sortkeys_fingerprint():
+    """Return the settings a key table must have been built with to be usable."""
+    return {
+        'format': SORTKEYS_FORMAT,
+        'simpleicons': simpleicons_version(),
+        'step_repetitions': STEP_REPETITIONS,
+        'byteorder': sys.byteorder,
+    }
+
+
+class CatalogSortKeys(object):
+    """Lazily opened, memory-mapped view of the prebuilt sort key table."""
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._columns = None
+        self._blob = None
+        self._loaded = False
+        # column name -> array, read from the blob on first use
+        self._arrays = {}
+        self._index = None
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        directory = self._directory or catalog_dir()
+        try:
+            with open(os.path.join(directory, INDEX_FILE), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('fingerprint') != sortkeys_fingerprint():
+                logger.debug(f'Sort key table ignored: built with {index.get("fingerprint")}')
+                return
+            with open(os.path.join(directory, index.get('blob', BLOB_FILE)), 'rb') as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.debug(f'Sort key table unavailable: {e}')
+            return
+        self._columns = index['columns']
+        logger.debug(f'Loaded sort key table from {directory} ({index["colors"]} colours)')
+
+    def _array(self, name):
+        if name not in self._arrays:
+            typecode, offset, count = self._columns[name]
+            column = array(typecode)
+            column.frombytes(self._blob[offset:offset + count * column.itemsize])
+            self._arrays[name] = column
+        return self._arrays[name]
+
+    def has(self, method, hue_rotate=0):
+        """Return whether keys for the method (and hue rotation, for the step modes) were built."""
+        self._load()
+        return self._columns is not None and f'{_table_name(method, hue_rotate)}.0' in self._columns
+
+    def lookup(self, colors, method, hue_rotate=0):
+        """Look up the sort keys of colours.
+
+        Args:
+            colors: Sequence of (r, g, b) triples
+            method: One of SORT_METHODS
+            hue_rotate: Hue rotation for the step modes
+
+        Returns:
+            None if the table doesn't hold this method and rotation. Otherwise a key per
+            colour: ranks if every colour is in the table, else color_key(method, hue_rotate)'s
+            key for the colours in the table and None for the others.
+        """
+        if not self.has(method, hue_rotate):
+            return None
+        if self._index is None:
+            self._index = {value: i for i, value in enumerate(self._array('colors'))}
+        table = _table_name(method, hue_rotate)
+        positions = [self._index.get(r << 16 | g << 8 | b) for r, g, b in colors]
+        if None not in positions:
+            ranks = self._array(f'{table}.rank')
+            return [ranks[i] for i in positions]
+        components = [self._array(f'{table}.{i}') for i in range(len(_COMPONENTS[method]))]
+        if len(components) == 1:
+            return [None if i is None else components[0][i] for i in positions]
+        return [None if i is None else tuple(component[i] for component in components) for i in positions]
+
+
+def build_sort_keys(directory=None, source=None, hue_rotations=DEFAULT_HUE_ROTATIONS):
+    """Compute every sort key for every distinct catalog colour and write the table.
+
+    Args:
+        directory: Output directory (defaults to the catalog directory)
+        source: Mapping of slug -> icon to build from (defaults to the icon catalog)
+        hue_rotations: Hue rotations to build the step and step_invert keys for
+
+    Returns:
+        Number of distinct colours written
+    """
+    from .catalog import icons
+
+    directory = directory or catalog_dir()
+    source = icons if source is None else source
+    os.makedirs(directory, exist_ok=True)
+
+    colors = sorted({int(source[slug].hex, 16) for slug in source})
+    rgbs = [(value >> 16, value >> 8 & 255, value & 255) for value in colors]
+    columns = {'colors': array('I', colors)}
+    for method in SORT_METHODS:
+        for hue_rotate in (hue_rotations if method in ('step', 'step_invert') else (0,)):
+            key = color_key(method, hue_rotate)
+            keys = [key(rgb) for rgb in rgbs]
+            table = _table_name(method, hue_rotate)
+            for i, typecode in enumerate(_COMPONENTS[method]):
+                columns[f'{table}.{i}'] = array(typecode, [k[i] if isinstance(k, tuple) else k for k in keys])
+            # Equal keys share a rank, so ties keep their input order like they do with keys
+            ranks = {k: rank for rank, k in enumerate(sorted(set(keys)))}
+            columns[f'{table}.rank'] = array('H', [ranks[k] for k in keys])
+
+    index_columns = {}
+    chunks = []
+    offset = 0
+    for name, column in columns.items():
+        data = column.tobytes()
+        padding = -offset % _ALIGNMENT
+        chunks.append(b'\0' * padding)
+        offset += padding
+        index_columns[name] = [column.typecode, offset, len(column)]
+        chunks.append(data)
+        offset += len(data)
+
+    index = {
+        'fingerprint': sortkeys_fingerprint(),
+        'blob': BLOB_FILE,
+        'colors': len(colors),
+        'columns': index_columns,
+    }
+    _atomic_write(os.path.join(directory, BLOB_FILE), b''.join(chunks))
+    _atomic_write(os.path.join(directory, INDEX_FILE),
+                  json.dumps(index, separators=(',', ':')).encode('utf-8'))
+    return len(colors)
+
+
+# Shared lazily-loaded key table used by badgesort.icons
+sort_keys_table = CatalogSortKeys()
+
+
+def main(raw_args=None):
+    parser = argparse.ArgumentParser(description='Build the prebuilt colour sort key table used by BadgeSort.')
+    parser.add_argument('-o', '--output', type=str, default='', help='Output directory (defaults to the packaged data directory).')
+    parser.add_argument('--hue-rotate', type=int, nargs='+', default=list(DEFAULT_HUE_ROTATIONS),
+                        help='Hue rotations to build the step and step_invert keys for.')
+    args = parser.parse_args(raw_args)
+
+    directory = args.output or catalog_dir()
+    count = build_sort_keys(directory, hue_rotations=args.hue_rotate)
+    logger.info(f'Wrote sort keys for {count} colours to {directory}')
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.DEBUG)
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Local stand-in for the Shields.io and Badgen.net badge servers.
+
+Serves badge-like SVGs for ``/badge/...`` URLs so logo checks, ``--verify``
+and benchmarks exercise the real HTTP code paths on a machine without network
+access. A badge gets an ``<image>`` logo when its ``logo`` (Shields.io) or
+``icon`` (Badgen) parameter is a data URI or a slug the stand-in doesn't
+treat as missing, and no logo otherwise, like Shields.io for logos it doesn't
+bundle.
+
+Misbehaviour is configurable and deterministic for a given seed:
+
+- ``latency``: seconds to wait before every response
+- ``error_rate``: fraction of requests answered with 503 (decided per URL and attempt)
+- ``rate_limit``/``burst``: token bucket of requests per second; requests
+  beyond it get 429 with a Retry-After header
+- ``missing``/``missing_rate``: slugs (or a fraction of slugs) rendered without a logo
+
+Responses carry an ETag, and If-None-Match gets a 304, so revalidation works.
+Point badgesort at a running stand-in with ``BADGESORT_PROVIDER_URL`` or
+``--provider-url``:
+
+    $ python -m badgesort.standin --port 8080 --latency 0.05 &
+    $ BADGESORT_PROVIDER_URL=http://127.0.0.1:8080 python -m badgesort.icons -r 10 --verify
+"""
+
+import argparse
+import hashlib
+import logging
+import math
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Logo drawn for slugs the stand-in "bundles"; only its presence matters to badgesort
+PLACEHOLDER_LOGO = 'data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciLz4='
+
+
+def _fraction(*parts):
+    """Map the parts to a stable number in [0, 1)."""
+    return zlib.crc32(':'.join(str(part) for part in parts).encode('utf-8')) / 2 ** 32
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'BadgeSortStandin/1'
+    # Keep connections alive like the real providers, so session pooling is exercised
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.standin._respond(self)
+
+    def log_message(self, format, *args):
+        logger.debug(f'{self.address_string()} {format % args}')
+
+
+class StandinServer(object):
+    """Threaded stand-in badge server on a background thread.
+
+    Use as a context manager, or call start() and stop(). Options are read on
+    every request, so they can be changed while the server runs.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one)
+        latency: Seconds to wait before every response
+        error_rate: Fraction of requests answered with 503 Service Unavailable
+        rate_limit: Requests per second before answering 429 (None: unlimited)
+        burst: Requests allowed at once above the rate (defaults to the rate, at least 1)
+        missing: Slugs rendered without a logo
+        missing_rate: Fraction of the other slugs rendered without a logo
+        seed: Varies which URLs fail and which slugs are missing
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, rate_limit=None, burst=None,
+                 missing=(), missing_rate=0.0, seed=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.missing = set(missing)
+        self.missing_rate = missing_rate
+        self.seed = seed
+        # Status code of every response, and every requested path with its query
+        self.statuses = Counter()
+        self.paths = []
+        self._attempts = Counter()
+        self._tokens = None
+        self._refilled = None
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """Origin to pass as the provider URL."""
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.standin = self
+        self.port = self._httpd.server_address[1]
+        # A short poll interval keeps stop() quick
+        self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name='badgesort-standin', daemon=True)
+        self._thread.start()
+        logger.debug(f'Stand-in badge server listening on {self.url}')
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def is_missing(self, slug):
+        """Return whether the stand-in renders the slug's logo as missing."""
+        return slug in self.missing or _fraction(self.seed, 'missing', slug) < self.missing_rate
+
+    def _retry_after(self):
+        """Take a token from the rate limit bucket; return None, or the seconds until one is available."""
+        if self.rate_limit is None:
+            return None
+        burst = self.burst or max(1, self.rate_limit)
+        now = time.monotonic()
+        with self._lock:
+            if self._tokens is None:
+                self._tokens, self._refilled = burst, now
+            self._tokens = min(burst, self._tokens + (now - self._refilled) * self.rate_limit)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self.rate_limit
+
+    def _badge(self, path, query):
+        segments = path.split('/')
+        # /badge/<label>-<color>.svg (Shields.io), /badge/<label>/<status> or /badge/icon/<label> (Badgen)
+        label = unquote(segments[-1].rsplit('.svg', 1)[0].split('-')[0])
+        logo = (query.get('logo') or query.get('icon') or [''])[0]
+        if logo.startswith('data:'):
+            image = logo
+        elif logo and not self.is_missing(logo):
+            image = PLACEHOLDER_LOGO
+        else:
+            image = None
+        width = 6 * len(label) + (30 if image else 10)
+        logo_element = f'<image x="5" y="3" width="14" height="14" href="{escape(image)}"/>' if image else ''
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="20" role="img" aria-label="{escape(label)}">'
+                f'<title>{escape(label)}</title>{logo_element}'
+                f'<text x="{width - 5}" y="14" text-anchor="end">{escape(label)}</text></svg>').encode('utf-8')
+
+    def _respond(self, handler):
+        parts = urlsplit(handler.path)
+        with self._lock:
+            self.paths.append(handler.path)
+            self._attempts[handler.path] += 1
+            attempt = self._attempts[handler.path]
+        if self.latency:
+            time.sleep(self.latency)
+
+        headers = {}
+        body = b''
+        retry_after = self._retry_after()
+        if retry_after is not None:
+            status = 429
+            headers['Retry-After'] = str(math.ceil(retry_after))
+        elif _fraction(self.seed, 'error', handler.path, attempt) < self.error_rate:
+            status = 503
+        elif not parts.path.startswith('/badge/'):
+            status = 404
+        else:
+            body = self._badge(parts.path, parse_qs(parts.query, keep_blank_values=True))
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            headers['ETag'] = etag
+            headers['Content-Type'] = 'image/svg+xml;charset=utf-8'
+            if handler.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+            else:
+                status = 200
+
+        with self._lock:
+            self.statuses[status] += 1
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def main(raw_args=None):
+    parser = argparse.ArgumentParser(prog='badgesort standin', description='Serve stand-in Shields.io/Badgen.net badges locally for offline tests and benchmarks.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to listen on.')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (0 picks a free one).')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before every response.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503.')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests per second before answering 429 with Retry-After.')
+    parser.add_argument('--burst', type=float, default=None, help='Requests allowed at once above --rate-limit.')
+    parser.add_argument('--missing', type=str, default='', help='Comma-separated slugs to render without a logo.')
+    parser.add_argument('--missing-rate', type=float, default=0.0, help='Fraction of the other slugs to render without a logo.')
+    parser.add_argument('--seed', type=int, default=0, help='Varies which requests fail and which slugs are missing.')
+    args = parser.parse_args(raw_args)
+
+    server = StandinServer(args.host, args.port, latency=args.latency, error_rate=args.error_rate,
+                           rate_limit=args.rate_limit, burst=args.burst,
+                           missing=[slug for slug in args.missing.split(',') if slug],
+                           missing_rate=args.missing_rate, seed=args.seed)
+    with server:
+        print(f'Serving stand-in badges on {server.url} (set BADGESORT_PROVIDER_URL={server.url})')
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""SVG path data parsing and compact re-serialization.
+
+``parse_path`` turns path data into a list of absolute, normalized segments:
+
+    ('M', x, y)
+    ('L', x, y)                            H/V are folded into L
+    ('C', x1, y1, x2, y2, x, y)            S is expanded to C
+    ('Q', x1, y1, x, y)                    T is expanded to Q
+    ('A', rx, ry, rotation, large_arc, sweep, x, y)
+    ('Z',)
+
+The PNG rasterizer flattens these segments, and adaptive compression
+re-serializes them at decreasing precision with ``serialize_path`` without
+re-parsing the original path for every attempt.
+"""
+
+import math
+import re
+
+_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+class _PathScanner(object):
+    """Tokenizer for SVG path data, including compact arc flags like 'a1 1 0 011 1'."""
+
+    def __init__(self, d):
+        self.d = d
+        self.i = 0
+
+    def _skip(self):
+        d, i = self.d, self.i
+        while i < len(d) and d[i] in ' \t\r\n,':
+            i += 1
+        self.i = i
+
+    def at_end(self):
+        self._skip()
+        return self.i >= len(self.d)
+
+    def has_number(self):
+        self._skip()
+        return self.i < len(self.d) and self.d[self.i] in '+-.0123456789'
+
+    def command(self):
+        self._skip()
+        c = self.d[self.i]
+        if not c.isalpha():
+            raise ValueError(f'expected path command at {self.i} in {self.d[:40]!r}...')
+        self.i += 1
+        return c
+
+    def number(self):
+        self._skip()
+        match = _NUMBER.match(self.d, self.i)
+        if not match:
+            raise ValueError(f'expected number at {self.i} in {self.d[:40]!r}...')
+        self.i = match.end()
+        return float(match.group(0))
+
+    def flag(self):
+        self._skip()
+        c = self.d[self.i] if self.i < len(self.d) else ''
+        if c not in ('0', '1'):
+            raise ValueError(f'expected arc flag at {self.i}')
+        self.i += 1
+        return c == '1'
+
+
+def parse_path(d):
+    """Parse SVG path data into a list of absolute, normalized segments (see module docstring)."""
+    scanner = _PathScanner(d)
+    segments = []
+    cx = cy = sx = sy = 0.0
+    last_control = None  # control point to reflect for S/s and T/t
+    last_command = ''
+    command = None
+
+    while not scanner.at_end():
+        if not scanner.has_number():
+            command = scanner.command()
+        elif command is None:
+            raise ValueError('path data must start with a command')
+        elif command in 'Mm':
+            # Coordinate pairs following a moveto are implicit linetos
+            command = 'L' if command == 'M' else 'l'
+
+        upper = command.upper()
+        ox, oy = (cx, cy) if command.islower() else (0.0, 0.0)
+
+        if upper == 'Z':
+            segments.append(('Z',))
+            cx, cy = sx, sy
+            last_control = None
+            last_command = upper
+            # closepath takes no parameters, so a command must follow
+            command = None
+            continue
+
+        if upper == 'M':
+            cx, cy = ox + scanner.number(), oy + scanner.number()
+            sx, sy = cx, cy
+            segments.append(('M', cx, cy))
+            last_control = None
+        elif upper == 'L':
+            cx, cy = ox + scanner.number(), oy + scanner.number()
+            segments.append(('L', cx, cy))
+            last_control = None
+        elif upper == 'H':
+            cx = ox + scanner.number()
+            segments.append(('L', cx, cy))
+            last_control = None
+        elif upper == 'V':
+            cy = oy + scanner.number()
+            segments.append(('L', cx, cy))
+            last_control = None
+        elif upper in 'CS':
+            if upper == 'C':
+                x1, y1 = ox + scanner.number(), oy + scanner.number()
+            elif last_command in 'CS' and last_control is not None:
+                x1, y1 = 2 * cx - last_control[0], 2 * cy - last_control[1]
+            else:
+                x1, y1 = cx, cy
+            x2, y2 = ox + scanner.number(), oy + scanner.number()
+            cx, cy = ox + scanner.number(), oy + scanner.number()
+            segments.append(('C', x1, y1, x2, y2, cx, cy))
+            last_control = (x2, y2)
+        elif upper in 'QT':
+            if upper == 'Q':
+                x1, y1 = ox + scanner.number(), oy + scanner.number()
+            elif last_command in 'QT' and last_control is not None:
+                x1, y1 = 2 * cx - last_control[0], 2 * cy - last_control[1]
+            else:
+                x1, y1 = cx, cy
+            cx, cy = ox + scanner.number(), oy + scanner.number()
+            segments.append(('Q', x1, y1, cx, cy))
+            last_control = (x1, y1)
+        elif upper == 'A':
+            rx, ry, rotation = scanner.number(), scanner.number(), scanner.number()
+            large_arc, sweep = scanner.flag(), scanner.flag()
+            cx, cy = ox + scanner.number(), oy + scanner.number()
+            segments.append(('A', rx, ry, rotation, large_arc, sweep, cx, cy))
+            last_control = None
+        else:
+            raise ValueError(f'unsupported path command {command!r}')
+        last_command = upper
+
+    return segments
+
+
+def _quantize(value, precision):
+    """Round to `precision` significant digits and at most precision - 1 decimal places."""
+    magnitude = abs(value)
+    if magnitude < 10:
+        return round(value, precision - 1)
+    if magnitude < 100:
+        return round(value, precision - 2)
+    return round(value, precision - 1 - int(math.log10(magnitude)))
+
+
+class _PathWriter(object):
+    """Accumulates compact path data: repeated commands and redundant separators are omitted."""
+
+    def __init__(self, precision):
+        self.decimals = precision - 1
+        self.parts = []
+        self.command = None
+        self.last_token = None
+        # Quantized values repeat a lot within a path, so their text is memoized
+        self._formatted = {}
+
+    def _format(self, value):
+        text = self._formatted.get(value)
+        if text is not None:
+            return text
+        text = f'{value:.{self.decimals}f}'
+        if '.' in text:
+            text = text.rstrip('0').rstrip('.')
+        if text in ('-0', ''):
+            text = '0'
+        if text.startswith('0.'):
+            text = text[1:]
+        elif text.startswith('-0.'):
+            text = '-' + text[2:]
+        self._formatted[value] = text
+        return text
+
+    def _token(self, text):
+        previous = self.last_token
+        if previous is not None and text[0] != '-' and not (text[0] == '.' and '.' in previous):
+            self.parts.append(' ')
+        self.parts.append(text)
+        self.last_token = text
+
+    def emit(self, command, values, flags_at=None):
+        """Append a command and its values; flags_at is the index where two arc flags start."""
+        # Pairs after a moveto are implicit linetos, so 'm' can't be repeated implicitly
+        implicit = command == self.command and command != 'm' or (command == 'l' and self.command == 'm')
+        if not implicit:
+            self.parts.append(command)
+            self.last_token = None
+        self.command = command
+        for i, value in enumerate(values):
+            if flags_at is not None and i in (flags_at, flags_at + 1):
+                # Arc flags are single digits that never need a following separator
+                if i == flags_at:
+                    self._token('1' if value else '0')
+                else:
+                    self.parts.append('1' if value else '0')
+                    self.last_token = None
+            else:
+                self._token(self._format(value))
+
+    def close(self):
+        self.parts.append('z')
+        self.command = 'z'
+        self.last_token = None
+
+    def text(self):
+        return ''.join(self.parts)
+
+
+def serialize_path(segments, precision):
+    """Serialize parse_path() segments as compact relative path data at the given precision.
+
+    Coordinates are written relative to the previous *rounded* point, so rounding
+    errors never accumulate along a path: every point is within one rounding
+    step of its original position. Curves whose first control point reflects
+    the previous one are written with the s/t shorthands.
+    """
+    writer = _PathWriter(precision)
+    # Current and subpath start points as they will be decoded from the output
+    cx = cy = sx = sy = 0.0
+    last_type = None
+    last_control = None
+
+    def delta(x, y):
+        return _quantize(x - cx, precision), _quantize(y - cy, precision)
+
+    for segment in segments:
+        kind = segment[0]
+        if kind == 'Z':
+            writer.close()
+            cx, cy = sx, sy
+            last_type, last_control = None, None
+            continue
+
+        if kind == 'M':
+            dx, dy = delta(segment[1], segment[2])
+            writer.emit('m', (dx, dy))
+            cx, cy = cx + dx, cy + dy
+            sx, sy = cx, cy
+            last_type, last_control = None, None
+        elif kind == 'L':
+            dx, dy = delta(segment[1], segment[2])
+            if dx == 0 and dy == 0:
+                # Zero-length lines don't change the filled area
+                continue
+            if dy == 0:
+                writer.emit('h', (dx,))
+            elif dx == 0:
+                writer.emit('v', (dy,))
+            else:
+                writer.emit('l', (dx, dy))
+            cx, cy = cx + dx, cy + dy
+            last_type, last_control = None, None
+        elif kind == 'C':
+            d1 = delta(segment[1], segment[2])
+            d2 = delta(segment[3], segment[4])
+            end = delta(segment[5], segment[6])
+            if last_type == 'C' and d1 == (_quantize(cx - last_control[0], precision),
+                                           _quantize(cy - last_control[1], precision)):
+                writer.emit('s', d2 + end)
+            else:
+                writer.emit('c', d1 + d2 + end)
+            last_type, last_control = 'C', (cx + d2[0], cy + d2[1])
+            cx, cy = cx + end[0], cy + end[1]
+        elif kind == 'Q':
+            d1 = delta(segment[1], segment[2])
+            end = delta(segment[3], segment[4])
+            if last_type == 'Q' and d1 == (_quantize(cx - last_control[0], precision),
+                                           _quantize(cy - last_control[1], precision)):
+                writer.emit('t', end)
+            else:
+                writer.emit('q', d1 + end)
+            last_type, last_control = 'Q', (cx + d1[0], cy + d1[1])
+            cx, cy = cx + end[0], cy + end[1]
+        elif kind == 'A':
+            _, rx, ry, rotation, large_arc, sweep, x, y = segment
+            end = delta(x, y)
+            writer.emit('a', (_quantize(rx, precision), _quantize(ry, precision),
+                              _quantize(rotation, precision), large_arc, sweep) + end, flags_at=3)
+            cx, cy = cx + end[0], cy + end[1]
+            last_type, last_control = None, None
+        else:
+            raise ValueError(f'unsupported segment {kind!r}')
+
+    return writer.text()
+
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Artifact cache benchmark: a badgen run over many slugs with a cold vs warm cache.
+
+Badgen always embeds a data URI, so every slug exercises compression (and the
+PNG fallback for oversized icons). The first run fills a fresh cache directory,
+the second run is served from it.
+
+Usage: python benchmarks/bench_cache.py [--slugs N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort.catalog import icons
+from badgesort.icons import run
+
+
+def _run_badgen(slugs, cache_dir):
+    args = argparse.Namespace(
+        slugs=[','.join(slugs)], random=1, output='', id='bench', format='markdown',
+        badge_style='flat', color_sort='hilbert', hue_rotate=0, no_thanks=True,
+        reverse=False, provider='badgen', verify=False, embed_svg=False,
+        skip_logo_check=True, cache_dir=cache_dir,
+    )
+    start = time.perf_counter()
+    with redirect_stdout(StringIO()) as out:
+        run(args)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--slugs', type=int, default=300, help='Number of catalog slugs to render.')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    slugs = list(icons)[:args.slugs]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold_time, cold_output = _run_badgen(slugs, cache_dir)
+        warm_time, warm_output = _run_badgen(slugs, cache_dir)
+
+    print(f'slugs: {len(slugs)}')
+    print(f'cold cache: {cold_time:8.3f} s')
+    print(f'warm cache: {warm_time:8.3f} s')
+    print(f'identical output: {cold_output == warm_output}')
+
+
+if __name__ == '__main__':
+    main()
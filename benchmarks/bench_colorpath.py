@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Colour path benchmark: OKLab nearest-neighbour path vs the hilbert and step sorts.
+
+Draws random slug selections of each --sizes from the icon catalog (the last
+size defaults to the whole catalog) and sorts their colours with hilbert,
+step and oklab. Reports, per sort, the total and the largest OKLab distance
+between adjacent badges (lower means smoother) and the best runtime of
+--repeat runs.
+
+Usage: python benchmarks/bench_colorpath.py [--sizes 10 30 100 500 0] [--repeat 3]
+"""
+
+import argparse
+import logging
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort.catalog import icons
+from badgesort.colorpath import path_order, rgb_to_oklab
+from badgesort.sorting import sort_order
+
+SORTS = {
+    'hilbert': lambda colours: sort_order(colours, 'hilbert'),
+    'step': lambda colours: sort_order(colours, 'step'),
+    'oklab': path_order,
+}
+
+
+def _best_ms(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _jumps(colours, order):
+    points = [rgb_to_oklab(*colours[i]) for i in order]
+    return [math.dist(a, b) for a, b in zip(points, points[1:])] or [0.0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 30, 100, 500, 0], help='Selection sizes (0 for the whole catalog).')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (the best is reported).')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    slugs = sorted(icons)
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        selection = slugs if size == 0 else rng.sample(slugs, size)
+        colours = [tuple(int(icons[slug].hex[i:i + 2], 16) for i in (0, 2, 4)) for slug in selection]
+        print(f'{len(colours)} badges')
+        for name, sort in SORTS.items():
+            ms, order = _best_ms(lambda: sort(colours), args.repeat)
+            jumps = _jumps(colours, order)
+            print(f'  {name:8s} total distance {sum(jumps):8.3f}   largest jump {max(jumps):6.3f}   {ms:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SVG compression benchmark: in-process scour API vs the `python -m scour.scour` subprocess.
+
+Compresses every icon in the catalog (white fill, as embedded in badges) with
+both engines, reports total and per-icon time, and checks that both produce
+identical output.
+
+Usage: python benchmarks/bench_compress.py [--limit N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort.catalog import icons
+from badgesort.icons import _compress_svg_with_scour_api, _compress_svg_with_scour_subprocess
+
+
+def _bench(compress, svgs):
+    outputs = []
+    start = time.perf_counter()
+    for svg in svgs:
+        outputs.append(compress(svg))
+    return time.perf_counter() - start, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--limit', type=int, default=0, help='Only compress the first N icons (default: whole catalog).')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    slugs = list(icons)
+    if args.limit > 0:
+        slugs = slugs[:args.limit]
+    svgs = [icons[slug].svg.replace('<path ', '<path fill="white" ') for slug in slugs]
+
+    in_process_time, in_process_out = _bench(_compress_svg_with_scour_api, svgs)
+    subprocess_time, subprocess_out = _bench(_compress_svg_with_scour_subprocess, svgs)
+
+    mismatches = [slug for slug, a, b in zip(slugs, in_process_out, subprocess_out) if a != b]
+
+    print(f'icons compressed: {len(svgs)}')
+    for label, elapsed in (('in-process', in_process_time), ('subprocess', subprocess_time)):
+        print(f'{label:<12}{elapsed:>9.2f} s total {elapsed / len(svgs) * 1000:>9.2f} ms/icon')
+    print(f'speedup: {subprocess_time / in_process_time:.1f}x')
+    print(f'output mismatches: {len(mismatches)}' + (f' ({", ".join(mismatches[:10])})' if mismatches else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Logo encoding benchmark: base64 vs shortest (base64 or percent-encoded UTF-8).
+
+Compresses every catalog icon with each bundled fill (white, black and the
+brand colour) and encodes it with both --logo-encoding modes. Reports the PNG
+fallback count of each mode and, for logos embedded as SVG in both modes, the
+length they add to badge URLs (quoted data URI) and to camo URLs (hex-encoded,
+so twice that).
+
+Usage: python benchmarks/bench_encoding.py [--max-url-length N] [--limit N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort.catalog import icons
+from badgesort.icons import _compress_svg_for_badge, _encode_svg_data_uri
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-url-length', type=int, default=3550, help='Data URI size limit that triggers the PNG fallback.')
+    parser.add_argument('--limit', type=int, default=0, help='Only benchmark the first N catalog icons.')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    slugs = list(icons)[:args.limit or None]
+    compressed = [_compress_svg_for_badge(icons[slug].svg.replace('<path ', f'<path fill="{fill}" '))
+                  for slug in slugs for fill in ('white', 'black', f'#{icons[slug].hex}')]
+
+    results = {}
+    for encoding in ('base64', 'shortest'):
+        start = time.perf_counter()
+        results[encoding] = [_encode_svg_data_uri(svg, args.max_url_length, encoding) for svg in compressed]
+        results[encoding + '_time'] = time.perf_counter() - start
+
+    both = [(b[0], s[0]) for b, s in zip(results['base64'], results['shortest']) if b[1] and s[1]]
+    base64_total = sum(len(quote(b, safe='')) for b, _ in both)
+    shortest_total = sum(len(quote(s, safe='')) for _, s in both)
+    percent_encoded = sum(1 for _, s in both if not s.startswith('data:image/svg+xml;base64,'))
+
+    print(f'data URIs: {len(compressed)} ({len(slugs)} icons x 3 fills)')
+    for encoding in ('base64', 'shortest'):
+        fallbacks = sum(1 for _, fits in results[encoding] if not fits)
+        print(f'{encoding:>8}: PNG fallbacks {fallbacks:4d}, encoding time '
+              f'{results[encoding + "_time"] / len(compressed) * 1000:.3f} ms/logo')
+    print(f'embedded as SVG in both modes: {len(both)} ({percent_encoded} percent-encoded in shortest mode)')
+    print(f'  badge URL bytes, base64:   {base64_total:10d} (mean {base64_total / len(both):7.1f})')
+    print(f'  badge URL bytes, shortest: {shortest_total:10d} (mean {shortest_total / len(both):7.1f}, '
+          f'{(1 - shortest_total / base64_total) * 100:.1f}% smaller)')
+    print(f'  camo URL bytes saved:      {2 * (base64_total - shortest_total):10d}')
+
+
+if __name__ == '__main__':
+    main()
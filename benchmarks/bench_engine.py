@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-end latency benchmark: phased vs async engine on 10, 100 and all catalog slugs.
+
+Runs Shields.io badges with logo checks and --verify over HTTP against the
+local stand-in server (badgesort.standin), which answers after --latency
+seconds and renders roughly one logo in seven as missing so those get
+embedded. The artifact cache is disabled so every embedded logo is
+compressed. Checks that both engines produce byte-identical output.
+
+Usage: python benchmarks/bench_engine.py [--sizes 10 100 0] [--latency 0.05] [--jobs N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort import icons as badgesort_icons
+from badgesort import network
+from badgesort.catalog import icons
+from badgesort.icons import ENGINES, run
+from badgesort.standin import StandinServer
+
+
+def _run_engine(slugs, engine, jobs):
+    # Every run starts with cold probe caches
+    badgesort_icons._logo_availability_cache.clear()
+    args = argparse.Namespace(
+        slugs=[','.join(slugs)], random=1, output='', id='bench', format='markdown',
+        badge_style='flat', color_sort='hilbert', hue_rotate=0, no_thanks=True,
+        reverse=False, provider='shields', verify=True, embed_svg=False,
+        skip_logo_check=False, no_cache=True, raster_backend='python', jobs=jobs, engine=engine,
+    )
+    start = time.perf_counter()
+    with redirect_stdout(StringIO()) as out:
+        run(args)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 0], help='Slug counts to render (0: whole catalog).')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated Shields.io response time in seconds.')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes for compression.')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f'latency: {args.latency * 1000:.0f} ms, concurrency: {network.get_concurrency()}, CPUs: {os.cpu_count()}')
+    with StandinServer(latency=args.latency, missing_rate=1 / 7) as server:
+        os.environ[network.PROVIDER_URL_ENV] = server.url
+        for size in args.sizes:
+            slugs = list(icons)[:size or None]
+            results = {engine: _run_engine(slugs, engine, args.jobs) for engine in ENGINES}
+            phased_time, phased_output = results['phased']
+            for engine, (elapsed, output) in results.items():
+                print(f'{len(slugs):5d} slugs, {engine:6s}: {elapsed:8.3f} s, speedup {phased_time / elapsed:5.2f}x, '
+                      f'identical output: {output == phased_output}')
+
+
+if __name__ == '__main__':
+    main()
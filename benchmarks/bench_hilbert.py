@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hilbert colour key benchmark: generic n-dimensional codec vs the table-driven 8-bit RGB codec.
+
+Encodes --colours random colours with Hilbert_to_int_rgb, and a --generic
+sample of them with the generic Hilbert_to_int (which is far slower), then
+decodes with int_to_Hilbert_rgb. Reports nanoseconds per colour and checks
+that both encoders agree on the sample.
+
+Usage: python benchmarks/bench_hilbert.py [--colours 2000000] [--generic 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort.hilbert import Hilbert_to_int, Hilbert_to_int_rgb, int_to_Hilbert_rgb
+
+
+def _time_per_item(func, items):
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return (time.perf_counter() - start) / len(items) * 1e9, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--colours', type=int, default=2000000, help='Random colours to encode with the table-driven codec.')
+    parser.add_argument('--generic', type=int, default=100000, help='How many of them to encode with the generic codec.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    colours = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(args.colours)]
+    sample = colours[:args.generic]
+
+    generic_ns, generic_keys = _time_per_item(Hilbert_to_int, sample)
+    table_ns, table_keys = _time_per_item(Hilbert_to_int_rgb, colours)
+    decode_ns, decoded = _time_per_item(int_to_Hilbert_rgb, table_keys)
+    print(f'colours: {len(colours)}, generic sample: {len(sample)}')
+    print(f'generic Hilbert_to_int:     {generic_ns:8.0f} ns/colour')
+    print(f'table Hilbert_to_int_rgb:   {table_ns:8.0f} ns/colour, speedup {generic_ns / table_ns:5.1f}x')
+    print(f'table int_to_Hilbert_rgb:   {decode_ns:8.0f} ns/colour')
+    print(f'identical keys: {generic_keys == table_keys[:len(sample)]}, round trip: {decoded == colours}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel badge construction benchmark: --jobs 1/2/4/8 on an uncached badgen run.
+
+Renders badgen badges (which always embed a data URI) for the whole catalog,
+or the first --slugs icons, with the artifact cache disabled and the
+percent-encoding selector on so the prebuilt bundle is bypassed. Every icon is
+therefore compressed, encoded and, if oversized, rasterized. Checks that every
+worker count produces byte-identical output.
+
+Usage: python benchmarks/bench_jobs.py [--slugs N] [--jobs 1 2 4 8]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort.catalog import icons
+from badgesort.icons import run
+
+
+def _run_badgen(slugs, jobs):
+    args = argparse.Namespace(
+        slugs=[','.join(slugs)], random=1, output='', id='bench', format='markdown',
+        badge_style='flat', color_sort='hilbert', hue_rotate=0, no_thanks=True,
+        reverse=False, provider='badgen', verify=False, embed_svg=False,
+        skip_logo_check=True, no_cache=True, logo_encoding='shortest',
+        compression='adaptive', raster_backend='python', jobs=jobs,
+    )
+    start = time.perf_counter()
+    with redirect_stdout(StringIO()) as out:
+        run(args)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--slugs', type=int, default=0, help='Number of catalog slugs to render (default: all).')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8], help='Worker counts to compare.')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    slugs = list(icons)[:args.slugs or None]
+    print(f'slugs: {len(slugs)}, CPUs: {os.cpu_count()}')
+    baseline_time = baseline_output = None
+    for jobs in args.jobs:
+        elapsed, output = _run_badgen(slugs, jobs)
+        if baseline_output is None:
+            baseline_time, baseline_output = elapsed, output
+        print(f'jobs {jobs:2d}: {elapsed:8.3f} s, speedup {baseline_time / elapsed:5.2f}x, '
+              f'identical output: {output == baseline_output}')
+
+
+if __name__ == '__main__':
+    main()
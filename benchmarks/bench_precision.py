@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive compression benchmark: how many catalog icons move off the PNG fallback.
+
+Compresses every catalog icon with each bundled fill (white, black and the
+brand colour) and, for each data URI that is too long at scour's fixed
+precision, runs the adaptive precision search. Reports how many fall back to
+PNG in fixed vs adaptive mode, which precision the adaptive search settled on,
+and the time spent searching.
+
+Usage: python benchmarks/bench_precision.py [--max-url-length N] [--limit N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort import icons as badgesort_icons
+from badgesort.catalog import icons
+from badgesort.icons import _compress_svg_for_badge, _reduce_svg_precision, _svg_base64_data_uri
+
+
+def _fitting_precision(compressed, max_url_length):
+    """Return the precision the adaptive search settles on, or None if it falls back to PNG."""
+    for precision in badgesort_icons.ADAPTIVE_PRECISIONS:
+        badgesort_icons.ADAPTIVE_PRECISIONS, saved = (precision,), badgesort_icons.ADAPTIVE_PRECISIONS
+        try:
+            if _reduce_svg_precision(compressed, max_url_length) is not None:
+                return precision
+        finally:
+            badgesort_icons.ADAPTIVE_PRECISIONS = saved
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-url-length', type=int, default=3550, help='Data URI size limit that triggers the PNG fallback.')
+    parser.add_argument('--limit', type=int, default=0, help='Only benchmark the first N catalog icons.')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    slugs = list(icons)[:args.limit or None]
+    oversized = []
+    for slug in slugs:
+        for fill in ('white', 'black', f'#{icons[slug].hex}'):
+            compressed = _compress_svg_for_badge(icons[slug].svg.replace('<path ', f'<path fill="{fill}" '))
+            if len(_svg_base64_data_uri(compressed)) > args.max_url_length:
+                oversized.append(compressed)
+
+    start = time.perf_counter()
+    results = [_reduce_svg_precision(compressed, args.max_url_length) for compressed in oversized]
+    search_time = time.perf_counter() - start
+    rescued = sum(1 for data_uri in results if data_uri is not None)
+    precisions = Counter(_fitting_precision(compressed, args.max_url_length) for compressed in oversized)
+
+    print(f'icons: {len(slugs)}, data URIs: {len(slugs) * 3}')
+    print(f'PNG fallbacks, fixed precision:    {len(oversized)}')
+    print(f'PNG fallbacks, adaptive precision: {len(oversized) - rescued}')
+    print(f'moved off the PNG path:            {rescued}')
+    for precision in badgesort_icons.ADAPTIVE_PRECISIONS:
+        print(f'  fits at precision {precision}: {precisions[precision]}')
+    if oversized:
+        print(f'adaptive search time: {search_time:.3f} s total, {search_time / len(oversized) * 1000:.2f} ms per oversized icon')
+
+
+if __name__ == '__main__':
+    main()
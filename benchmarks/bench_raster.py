@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PNG fallback benchmark: in-process Python rasterizer vs the rsvg-convert binary.
+
+Rasterizes every catalog icon whose white-filled, compressed SVG data URI is
+too long for GitHub's camo proxy (the icons that actually take the PNG
+fallback) at 14x14 with each available backend, and reports time per icon
+and the resulting PNG data URI sizes.
+
+Usage: python benchmarks/bench_raster.py [--max-url-length N] [--size N]
+"""
+
+import argparse
+import base64
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort.catalog import icons
+from badgesort.icons import _compress_svg_for_badge
+from badgesort.raster import PythonRasterizer, RsvgRasterizer
+
+
+def _fallback_svgs(max_url_length):
+    svgs = []
+    for slug in icons:
+        svg = icons[slug].svg.replace('<path ', '<path fill="white" ')
+        encoded = base64.b64encode(_compress_svg_for_badge(svg).encode('utf-8')).decode('utf-8')
+        if len(f'data:image/svg+xml;base64,{encoded}') > max_url_length:
+            svgs.append(svg)
+    return svgs
+
+
+def _bench(rasterizer, svgs, size):
+    start = time.perf_counter()
+    results = rasterizer.rasterize_batch(svgs, size)
+    elapsed = time.perf_counter() - start
+    sizes = [len(base64.b64encode(png)) + len('data:image/png;base64,') for png, _ in results if png]
+    failures = sum(1 for png, _ in results if png is None)
+    return elapsed, sizes, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-url-length', type=int, default=3550, help='Data URI size limit that triggers the PNG fallback.')
+    parser.add_argument('--size', type=int, default=14, help='Output size in pixels.')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    svgs = _fallback_svgs(args.max_url_length)
+    print(f'icons needing the PNG fallback: {len(svgs)}')
+    for rasterizer in (PythonRasterizer(), RsvgRasterizer()):
+        if not rasterizer.available():
+            print(f'{rasterizer.name:>12}: not available')
+            continue
+        elapsed, sizes, failures = _bench(rasterizer, svgs, args.size)
+        mean_size = sum(sizes) / len(sizes) if sizes else 0
+        print(f'{rasterizer.name:>12}: {elapsed:8.3f} s total, {elapsed / len(svgs) * 1000:7.2f} ms/icon, '
+              f'mean data URI {mean_size:6.0f} chars, max {max(sizes, default=0)}, failures {failures}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sort benchmark: per-badge key functions vs the batch sort-key engine, for every --color-sort mode.
+
+Sorts --colours random colours (drawn from a palette of --palette colours, so
+keys tie like real brand colours do) with list.sort and one key function call
+per colour, as run() used to, and with badgesort.sorting.sort_order. Reports
+milliseconds per sort, whether NumPy was used, and whether the orders match.
+Then sorts every catalog colour with keys computed on the fly and with the
+prebuilt key table (built into a temporary directory first).
+
+Usage: python benchmarks/bench_sorting.py [--colours 200000] [--palette 20000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from badgesort import sorting
+from badgesort.catalog import icons
+from badgesort.sortkeys import CatalogSortKeys, build_sort_keys
+from badgesort.sorting import SORT_METHODS, color_key, sort_order
+
+
+def _best_ms(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--colours', type=int, default=200000, help='Colours to sort.')
+    parser.add_argument('--palette', type=int, default=20000, help='Distinct colours they are drawn from.')
+    parser.add_argument('--hue-rotate', type=int, default=0, help='Hue rotation for the step modes.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (the best is reported).')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    palette = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(args.palette)]
+    colours = [rng.choice(palette) for _ in range(args.colours)]
+    if sorting.np is not None:
+        batch = sorting.np.array(colours, dtype=sorting.np.uint8)
+        backend = f'NumPy {sorting.np.__version__}'
+    else:
+        batch = colours
+        backend = 'pure Python (NumPy not installed)'
+
+    print(f'colours: {len(colours)}, palette: {len(palette)}, engine: {backend}')
+    for method in SORT_METHODS:
+        key = color_key(method, args.hue_rotate)
+
+        def per_colour():
+            indexed = list(range(len(colours)))
+            indexed.sort(key=lambda i: key(colours[i]))
+            return indexed
+
+        base_ms, expected = _best_ms(per_colour, args.repeat)
+        batch_ms, order = _best_ms(lambda: sort_order(batch, method, args.hue_rotate), args.repeat)
+        print(f'{method:12s} per-colour {base_ms:9.1f} ms   batch {batch_ms:9.1f} ms   '
+              f'speedup {base_ms / batch_ms:5.1f}x   identical: {order == expected}')
+
+    catalog = [(int(icons[slug].hex[0:2], 16), int(icons[slug].hex[2:4], 16), int(icons[slug].hex[4:6], 16))
+               for slug in icons]
+    with tempfile.TemporaryDirectory() as directory:
+        build_sort_keys(directory, hue_rotations=(args.hue_rotate,))
+        table = CatalogSortKeys(directory)
+        table.lookup(catalog[:1], 'hilbert')
+        print(f'\ncatalog colours: {len(catalog)}')
+        for method in SORT_METHODS:
+            computed_ms, expected = _best_ms(lambda: sort_order(catalog, method, args.hue_rotate), args.repeat)
+            table_ms, order = _best_ms(lambda: sort_order(catalog, method, args.hue_rotate,
+                                                          keys=table.lookup(catalog, method, args.hue_rotate)),
+                                       args.repeat)
+            print(f'{method:12s} computed {computed_ms:9.2f} ms   table {table_ms:9.2f} ms   '
+                  f'speedup {computed_ms / table_ms:5.1f}x   identical: {order == expected}')
+
+
+if __name__ == '__main__':
+    main()
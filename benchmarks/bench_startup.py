@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup benchmark: eager simpleicons.all import vs the prebuilt icon catalog.
+
+Measures, in fresh interpreters, the time to ``import badgesort.icons`` and to
+complete a 10-slug CLI run (logo checks skipped so no network is involved).
+"Before" reproduces the old eager import of simpleicons.all and points
+BADGESORT_CATALOG_DIR at an empty directory so the run also falls back to it;
+"after" uses a freshly built catalog.
+
+With --cold every interpreter gets an empty PYTHONPYCACHEPREFIX, reproducing
+a container whose bytecode caches were never written; this is where compiling
+the multi-megabyte simpleicons.all module dominates.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--cold]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SLUGS = ['github', 'python', 'docker', 'kubernetes', 'react', 'typescript',
+         'rust', 'go', 'nodedotjs', 'postgresql']
+
+EAGER_IMPORT_CMD = [sys.executable, '-c', 'import badgesort.icons, simpleicons.all']
+LAZY_IMPORT_CMD = [sys.executable, '-c', 'import badgesort.icons']
+RUN_CMD = [sys.executable, '-c',
+           'from badgesort.icons import icons, main; main(%r)' %
+           (['--skip-logo-check', '--no-thanks', '-s'] + SLUGS,)]
+
+
+def _time_command(cmd, env, repeat, cold=False):
+    samples = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as pycache:
+            if cold:
+                env = dict(env, PYTHONPYCACHEPREFIX=pycache)
+            start = time.perf_counter()
+            subprocess.run(cmd, env=env, cwd=REPO_ROOT, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, check=False)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--cold', action='store_true', help='Run every interpreter without bytecode caches.')
+    args = parser.parse_args()
+
+    from badgesort.catalog import build_catalog
+
+    with tempfile.TemporaryDirectory() as empty_dir, tempfile.TemporaryDirectory() as catalog_dir:
+        build_catalog(catalog_dir)
+
+        results = []
+        variants = (
+            ('before (simpleicons.all)', empty_dir, EAGER_IMPORT_CMD),
+            ('after (catalog)', catalog_dir, LAZY_IMPORT_CMD),
+        )
+        for label, directory, import_cmd in variants:
+            env = dict(os.environ, BADGESORT_CATALOG_DIR=directory)
+            # Warm up bytecode caches so both variants are measured hot
+            _time_command(RUN_CMD, env, 1)
+            results.append((label,
+                            _time_command(import_cmd, env, args.repeat, args.cold),
+                            _time_command(RUN_CMD, env, args.repeat, args.cold)))
+
+    print(f'{"variant":<26}{"import badgesort.icons":>24}{"10-slug run":>14}')
+    for label, import_time, run_time in results:
+        print(f'{label:<26}{import_time * 1000:>21.1f} ms{run_time * 1000:>11.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared pytest configuration for BadgeSort tests.
+"""
+
+import os
+
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cache_dir(tmp_path_factory):
+    """Point the persistent artifact cache at a per-session temporary directory."""
+    cache_dir = str(tmp_path_factory.mktemp('badgesort-cache'))
+    previous = os.environ.get('BADGESORT_CACHE_DIR')
+    os.environ['BADGESORT_CACHE_DIR'] = cache_dir
+    yield cache_dir
+    if previous is None:
+        os.environ.pop('BADGESORT_CACHE_DIR', None)
+    else:
+        os.environ['BADGESORT_CACHE_DIR'] = previous
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    """Run a local stand-in badge server and point every provider URL at it."""
+    from badgesort import icons as badgesort_icons
+    from badgesort import network
+    from badgesort.standin import StandinServer
+
+    with StandinServer() as server:
+        monkeypatch.setenv(network.PROVIDER_URL_ENV, server.url)
+        # Logo verdicts from other tests' fake sessions don't apply here
+        monkeypatch.setattr(badgesort_icons, '_logo_availability_cache', {})
+        network.configure()
+        yield server
+        network.configure()
+        network.close_session()
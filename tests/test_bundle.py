@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the prebuilt data URI bundle.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from unittest import mock
+
+from badgesort import cache as badgesort_cache
+from badgesort import icons as badgesort_icons
+from badgesort.bundle import DataUriBundle, INDEX_FILE, build_bundle
+from badgesort.icons import run, svg_to_base64_data_uri
+from simpleicons.all import icons
+
+
+SAMPLE_SLUGS = ['github', 'python', 'docker', 'githubsponsors']
+
+
+def _build_sample_bundle(directory):
+    return build_bundle(directory, source={slug: icons[slug] for slug in SAMPLE_SLUGS})
+
+
+def test_bundle_matches_computed_data_uris():
+    """Test that bundled data URIs equal freshly computed ones for every fill."""
+    with tempfile.TemporaryDirectory() as directory:
+        assert _build_sample_bundle(directory) == len(SAMPLE_SLUGS) * 3
+        bundle = DataUriBundle(directory)
+        with badgesort_cache.disabled():
+            for slug in SAMPLE_SLUGS:
+                icon = icons[slug]
+                for fill_color in ('white', 'black', f'#{icon.hex}'):
+                    expected = svg_to_base64_data_uri(icon.svg, fill_color)
+                    assert bundle.lookup(slug, icon.hex, fill_color, 3550) == expected, \
+                        f"Bundled {fill_color} data URI for {slug} should match"
+
+
+def test_bundle_ignored_on_fingerprint_mismatch():
+    """Test that a bundle built with other settings is never served."""
+    with tempfile.TemporaryDirectory() as directory:
+        _build_sample_bundle(directory)
+        icon = icons['github']
+        assert DataUriBundle(directory).lookup('github', icon.hex, 'white', 1000) is None, \
+            "A bundle built for another max_url_length should be ignored"
+
+        index_path = os.path.join(directory, INDEX_FILE)
+        with open(index_path) as f:
+            index = json.load(f)
+        index['fingerprint']['simpleicons'] = '0.0.0'
+        with open(index_path, 'w') as f:
+            json.dump(index, f)
+        assert DataUriBundle(directory).lookup('github', icon.hex, 'white', 3550) is None, \
+            "A bundle built for another simpleicons version should be ignored"
+
+
+def test_bundle_skips_unbundled_fills():
+    """Test that arbitrary fill colours fall through to compression."""
+    with tempfile.TemporaryDirectory() as directory:
+        _build_sample_bundle(directory)
+        assert DataUriBundle(directory).lookup('github', icons['github'].hex, '#123456', 3550) is None
+
+
+def test_badgen_run_does_no_compression_with_bundle():
+    """Test that a badgen run served from the bundle never compresses or forks."""
+    with tempfile.TemporaryDirectory() as directory:
+        _build_sample_bundle(directory)
+        args = argparse.Namespace(
+            slugs=['github', 'python', 'docker'],
+            random=1,
+            output=os.path.join(directory, 'README.md'),
+            id='test',
+            format='markdown',
+            badge_style='flat',
+            color_sort='hilbert',
+            hue_rotate=0,
+            no_thanks=True,  # Include the BadgeSort badge, which embeds the brand-coloured sponsor icon
+            reverse=False,
+            provider='badgen',
+            verify=False,
+            embed_svg=False,
+            skip_logo_check=True,
+            no_cache=True
+        )
+        with mock.patch.object(badgesort_icons, 'bundle', DataUriBundle(directory)), \
+                mock.patch.object(badgesort_icons, '_compress_svg_for_badge') as compress_mock, \
+                mock.patch.object(badgesort_icons.subprocess, 'run') as subprocess_mock:
+            run(args)
+        badgesort_cache.configure()
+
+        assert not compress_mock.called, "Bundled icons should not be compressed"
+        assert not subprocess_mock.called, "Bundled icons should not spawn subprocesses"
+        with open(args.output) as f:
+            assert f.read().count('badgen.net/badge/icon/') == 4
+
+
+def test_bundle_leaves_out_png_fallbacks():
+    """Test that rasterized fallbacks are not bundled, since they depend on the runtime backend."""
+    with tempfile.TemporaryDirectory() as directory:
+        # A tiny size limit turns every icon into a PNG fallback, which isn't even rasterized
+        with mock.patch.object(badgesort_icons, '_svg_to_png_data_uri') as rasterize, \
+                mock.patch.object(badgesort_icons, '_svg_to_png_data_uris') as rasterize_batch:
+            assert build_bundle(directory, source={'github': icons['github']}, max_url_length=100) == 0
+        rasterize.assert_not_called()
+        rasterize_batch.assert_not_called()
+        assert DataUriBundle(directory).lookup('github', icons['github'].hex, 'white', 100) is None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the content-addressed artifact cache.
+"""
+
+import os
+import tempfile
+import time
+from unittest import mock
+
+import pytest
+
+from badgesort import cache as badgesort_cache
+from badgesort import icons as badgesort_icons
+from badgesort.cache import EVICT_LOW_WATER, ArtifactCache, cache_key, read_stats
+from badgesort.icons import main, svg_to_base64_data_uri
+from simpleicons.all import icons
+
+
+def test_cache_key_is_stable_and_unambiguous():
+    """Test that keys are deterministic and that part boundaries matter."""
+    assert cache_key('a', 1, None) == cache_key('a', 1, None)
+    assert cache_key('ab', 'c') != cache_key('a', 'bc'), "Part boundaries should change the key"
+    assert cache_key(b'svg') == cache_key('svg'), "bytes and str parts hash their UTF-8 content"
+    assert len(cache_key('x')) == 64
+
+
+def test_put_get_round_trip_is_atomic():
+    """Test that entries round-trip and no temporary files are left behind."""
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_cache = ArtifactCache(directory)
+        key = cache_key('entry')
+        assert artifact_cache.get(key) is None
+        artifact_cache.put(key, 'data:image/svg+xml;base64,AAAA')
+        assert artifact_cache.get(key) == 'data:image/svg+xml;base64,AAAA'
+        assert artifact_cache.hits == 1 and artifact_cache.misses == 1
+
+        leftovers = [name for _, _, names in os.walk(directory) for name in names if name.startswith('.tmp-')]
+        assert leftovers == [], "Atomic writes should not leave temporary files"
+
+
+def test_eviction_removes_least_recently_used():
+    """Test that exceeding the size cap evicts the least recently used entries first."""
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_cache = ArtifactCache(directory, max_bytes=350)
+        keys = [cache_key(i) for i in range(3)]
+        for age, key in zip((300, 200, 100), keys):
+            artifact_cache.put(key, 'x' * 100)
+            past = os.path.getmtime(artifact_cache._path(key)) - age
+            os.utime(artifact_cache._path(key), (past, past))
+
+        # Reading the oldest entry makes it the most recently used
+        assert artifact_cache.get(keys[0]) is not None
+
+        artifact_cache.put(cache_key('new'), 'y' * 100)
+        assert artifact_cache.total_bytes() <= 350
+        assert artifact_cache.get(keys[0]) is not None, "Recently read entry should survive eviction"
+        assert artifact_cache.get(keys[1]) is None, "Least recently used entry should be evicted"
+
+
+def test_eviction_goes_to_low_water_mark(monkeypatch):
+    """Test that a full cache is evicted below its cap so the next writes don't rescan it."""
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_cache = ArtifactCache(directory, max_bytes=1000)
+        for i in range(10):
+            artifact_cache.put(cache_key(i), 'x' * 100)
+        scans = []
+        entries = artifact_cache.entries
+        monkeypatch.setattr(artifact_cache, 'entries', lambda: scans.append(1) or entries())
+
+        artifact_cache.put(cache_key('over'), 'y' * 100)
+        assert len(scans) == 1
+        assert artifact_cache._size <= 1000 * EVICT_LOW_WATER
+        artifact_cache.put(cache_key('fits'), 'z' * 50)
+        assert len(scans) == 1, "A write that still fits under the cap should not rescan the cache"
+
+
+def test_data_uri_served_from_cache():
+    """Test that a repeated data URI request skips compression entirely."""
+    with tempfile.TemporaryDirectory() as directory:
+        badgesort_cache.configure(directory=directory)
+        try:
+            svg = icons['github'].svg
+            first = svg_to_base64_data_uri(svg, 'white')
+            with mock.patch.object(badgesort_icons, '_compress_svg_for_badge') as compress_mock:
+                second = svg_to_base64_data_uri(svg, 'white')
+            assert not compress_mock.called, "Cached data URI should not be recompressed"
+            assert first == second
+
+            # A different fill color is a different artifact
+            with mock.patch.object(badgesort_icons, '_compress_svg_for_badge', return_value='<svg/>') as compress_mock:
+                svg_to_base64_data_uri(svg, 'black')
+            assert compress_mock.called
+        finally:
+            badgesort_cache.configure()
+
+
+def test_disabled_cache():
+    """Test that configure(enabled=False) disables the process-wide cache."""
+    badgesort_cache.configure(enabled=False)
+    try:
+        assert badgesort_cache.get_artifact_cache() is None
+    finally:
+        badgesort_cache.configure()
+
+
+def test_evict_older_than():
+    """Test that age-based pruning only removes entries unused for longer than max_age."""
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_cache = ArtifactCache(directory)
+        for name in ('old', 'new'):
+            artifact_cache.put(cache_key(name), name)
+        old_path = artifact_cache._path(cache_key('old'))
+        two_days_ago = time.time() - 2 * 86400
+        os.utime(old_path, (two_days_ago, two_days_ago))
+
+        assert artifact_cache.evict_older_than(86400) == 1
+        assert not os.path.exists(old_path)
+        assert artifact_cache.get(cache_key('new')) == 'new'
+
+
+def test_flush_stats_accumulates_across_runs():
+    """Test that hit and miss counts are added to the persisted totals and then reset."""
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(2):
+            artifact_cache = ArtifactCache(directory)
+            artifact_cache.get(cache_key('missing'))
+            artifact_cache.put(cache_key('present'), 'value')
+            artifact_cache.get(cache_key('present'))
+            artifact_cache.flush_stats()
+            assert artifact_cache.hits == 0 and artifact_cache.misses == 0
+        assert read_stats(directory) == {'artifacts': {'hits': 2, 'misses': 2}}
+
+
+def _cache_command(*args):
+    with pytest.raises(SystemExit) as exit_info:
+        main(['cache', *args])
+    assert exit_info.value.code == 0
+
+
+def test_cache_subcommand_warm_stats_prune(capsys):
+    """Test warming slugs, reporting stats and pruning through the main() CLI."""
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            _cache_command('warm', 'github,python', '--logo-encoding', 'shortest', '--jobs', '1', '--cache-dir', directory)
+            assert 'Warmed 2 icons' in capsys.readouterr().out
+            assert len(ArtifactCache(directory).entries()) == 4, "Two slugs x two fills should be cached"
+
+            # A warmed icon is served from the cache without compression
+            with mock.patch.object(badgesort_icons, '_compress_svg_for_badge') as compress_mock:
+                svg_to_base64_data_uri(icons['github'].svg, 'white', encoding='shortest')
+            assert not compress_mock.called
+            badgesort_cache.get_artifact_cache().flush_stats()
+
+            _cache_command('stats', '--cache-dir', directory)
+            out = capsys.readouterr().out
+            assert 'artifacts: 4 entries' in out
+            assert 'hit rate 100.0% (1 of 1 lookups)' in out
+
+            _cache_command('prune', '--max-size', '0', '--cache-dir', directory)
+            assert 'artifacts: removed 4 entries, 0 B left' in capsys.readouterr().out
+        finally:
+            badgesort_cache.configure()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the lazy, memory-mapped icon catalog.
+"""
+
+import json
+import os
+import tempfile
+
+from simpleicons.all import icons as all_icons
+
+from badgesort.catalog import Catalog, CatalogIcon, build_catalog, INDEX_FILE
+
+
+SAMPLE_SLUGS = ['github', 'python', 'docker', 'dotnet', 'e']
+
+
+def _build_sample_catalog(directory):
+    source = {slug: all_icons[slug] for slug in SAMPLE_SLUGS}
+    return build_catalog(directory, source=source)
+
+
+def test_catalog_round_trips_icon_fields():
+    """Test that icons read from the catalog match simpleicons.all exactly."""
+    with tempfile.TemporaryDirectory() as directory:
+        assert _build_sample_catalog(directory) == len(SAMPLE_SLUGS)
+        catalog = Catalog(directory)
+
+        assert catalog.is_prebuilt, "Catalog should be served from the prebuilt files"
+        assert list(catalog) == SAMPLE_SLUGS, "Catalog should preserve simpleicons ordering"
+        for slug in SAMPLE_SLUGS:
+            icon = catalog.get(slug)
+            assert isinstance(icon, CatalogIcon)
+            assert icon.slug == all_icons[slug].slug
+            assert icon.title == all_icons[slug].title
+            assert icon.hex == all_icons[slug].hex
+            assert icon.svg == all_icons[slug].svg, f"SVG for {slug} should be byte-identical"
+
+
+def test_catalog_is_lazy_until_first_access():
+    """Test that constructing a catalog does not touch the disk."""
+    catalog = Catalog('/nonexistent/badgesort/catalog')
+    assert catalog._entries is None and catalog._fallback is None, \
+        "Catalog should not load anything before first use"
+
+
+def test_catalog_membership_and_get_fallbacks():
+    """Test slug membership and the case-insensitive slug/title lookup of get()."""
+    with tempfile.TemporaryDirectory() as directory:
+        _build_sample_catalog(directory)
+        catalog = Catalog(directory)
+
+        assert 'github' in catalog
+        assert 'notarealslug' not in catalog
+        assert len(catalog) == len(SAMPLE_SLUGS)
+        assert catalog.get('GitHub').slug == 'github', "get() should match titles case-insensitively"
+        assert catalog.get('.NET').slug == 'dotnet'
+        assert catalog.get('notarealslug') is None
+
+
+def test_catalog_falls_back_when_missing():
+    """Test that a missing catalog falls back to simpleicons.all."""
+    catalog = Catalog('/nonexistent/badgesort/catalog')
+    assert not catalog.is_prebuilt
+    assert 'github' in catalog
+    assert catalog.get('github').svg == all_icons['github'].svg
+
+
+def test_catalog_ignored_on_version_mismatch():
+    """Test that a catalog built for a different simpleicons version is ignored."""
+    with tempfile.TemporaryDirectory() as directory:
+        _build_sample_catalog(directory)
+        index_path = os.path.join(directory, INDEX_FILE)
+        with open(index_path) as f:
+            index = json.load(f)
+        index['simpleicons'] = '0.0.0'
+        with open(index_path, 'w') as f:
+            json.dump(index, f)
+
+        catalog = Catalog(directory)
+        assert not catalog.is_prebuilt, "Stale catalog should be ignored"
+        assert len(catalog) == len(all_icons)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the OKLab nearest-neighbour path colour sort.
+"""
+
+import math
+import random
+
+import pytest
+
+from badgesort.colorpath import KDTree, _greedy_path, path_order, rgb_to_oklab
+from badgesort.sorting import sort_order
+
+
+def _colours(count, seed=0):
+    rng = random.Random(seed)
+    return [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(count)]
+
+
+def _length(colours, order):
+    points = [rgb_to_oklab(*colours[i]) for i in order]
+    return sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+
+
+def test_oklab_reference_values():
+    """Test the conversion against OKLab's white, black and pure red."""
+    assert rgb_to_oklab(0, 0, 0) == pytest.approx((0, 0, 0), abs=1e-6)
+    assert rgb_to_oklab(255, 255, 255) == pytest.approx((1, 0, 0), abs=1e-4)
+    assert rgb_to_oklab(255, 0, 0) == pytest.approx((0.62796, 0.22486, 0.12585), abs=1e-4)
+
+
+def test_kdtree_matches_brute_force():
+    """Test nearest() with removals and neighbours() against exhaustive search."""
+    points = [rgb_to_oklab(*rgb) for rgb in _colours(300)]
+    tree = KDTree(points)
+    for i in (0, 17, 299):
+        expected = sorted((j for j in range(len(points)) if j != i), key=lambda j: (math.dist(points[i], points[j]), j))
+        assert tree.neighbours(i, 8) == expected[:8]
+
+    removed = set(range(0, 300, 3))
+    for i in removed:
+        tree.remove(i)
+    for query in points[:20]:
+        remaining = [j for j in range(len(points)) if j not in removed]
+        assert tree.nearest(query) == min(remaining, key=lambda j: (math.dist(query, points[j]), j))
+
+
+def test_path_is_a_permutation_with_identical_colours_together():
+    """Test that every badge appears once and equal colours stay adjacent in input order."""
+    colours = _colours(40, seed=1)
+    colours = colours + colours[:10] + [(0, 0, 0), (0, 0, 0)]
+    order = path_order(colours)
+    assert sorted(order) == list(range(len(colours)))
+    for i in range(10):
+        assert order[order.index(i) + 1] == 40 + i
+    assert path_order(colours) == order
+    assert path_order([]) == []
+    assert path_order([(9, 9, 9), (255, 255, 255), (9, 9, 9)]) == [0, 2, 1]
+
+
+def test_two_opt_shortens_greedy_and_beats_one_dimensional_sorts():
+    """Test that refinement only shortens the path, which ends up shorter than hilbert and step."""
+    colours = list(dict.fromkeys(_colours(400, seed=2)))
+    points = [rgb_to_oklab(*rgb) for rgb in colours]
+    greedy = _greedy_path(KDTree(points), min(range(len(points)), key=lambda i: points[i][0]))
+    refined = path_order(colours, budget=10)
+    assert _length(colours, refined) <= _length(colours, greedy)
+    assert _length(colours, refined) < _length(colours, sort_order(colours, 'hilbert'))
+    assert _length(colours, refined) < _length(colours, sort_order(colours, 'step'))
+    # Without refinement it is still a valid path
+    assert sorted(path_order(colours, budget=0)) == list(range(len(colours)))
+
+
+def test_refinement_is_capped_by_moves_not_time(caplog):
+    """Test that the move cap makes the path independent of the time budget, which only warns."""
+    colours = list(dict.fromkeys(_colours(400, seed=3)))
+    capped = path_order(colours, max_moves=10)
+    assert path_order(colours, budget=100, max_moves=10) == capped
+    assert _length(colours, path_order(colours)) < _length(colours, capped)
+    assert not [record for record in caplog.records if record.levelname == 'WARNING']
+
+    path_order(colours, budget=0)
+    assert any('safety net' in record.getMessage() for record in caplog.records if record.levelname == 'WARNING')
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the fixed-depth, table-driven 3D Hilbert codec for 8-bit colours.
+"""
+
+import random
+
+import pytest
+
+from badgesort.hilbert import Hilbert_to_int, Hilbert_to_int_rgb, int_to_Hilbert, int_to_Hilbert_rgb
+
+CORNERS = [(r, g, b) for r in (0, 255) for g in (0, 255) for b in (0, 255)]
+
+
+def _random_colours(count, seed=0):
+    rng = random.Random(seed)
+    return [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(count)]
+
+
+def test_encode_matches_generic_codec_at_fixed_depth():
+    """Test that the table-driven encoder equals the generic codec on an 8-bit curve."""
+    for rgb in CORNERS + _random_colours(5000):
+        assert Hilbert_to_int_rgb(rgb) == Hilbert_to_int(rgb, nChunks=8)
+
+
+def test_decode_matches_generic_codec_at_fixed_depth():
+    """Test that the decoder equals the generic codec and inverts the encoder."""
+    rng = random.Random(1)
+    for i in [0, 1, 2 ** 24 - 1] + [rng.randrange(2 ** 24) for _ in range(5000)]:
+        rgb = int_to_Hilbert_rgb(i)
+        assert rgb == tuple(int_to_Hilbert(i, 3, nChunks=8))
+        assert Hilbert_to_int_rgb(rgb) == i
+
+
+def test_consecutive_indices_are_adjacent_colours():
+    """Test that every step along the curve changes one channel by one."""
+    previous = int_to_Hilbert_rgb(0)
+    for i in range(1, 1 << 15):
+        current = int_to_Hilbert_rgb(i)
+        assert sum(abs(a - b) for a, b in zip(previous, current)) == 1
+        previous = current
+
+
+def test_adaptive_depth_curves_are_nested():
+    """Test that the generic codec's depth-per-colour gives the fixed-depth index, so sort order is unchanged."""
+    rng = random.Random(2)
+    for _ in range(5000):
+        # Channels of every bit length, so colours land on curves of every depth
+        rgb = tuple(rng.randrange(1 << rng.randrange(1, 9)) for _ in range(3))
+        assert Hilbert_to_int(rgb) == Hilbert_to_int_rgb(rgb)
+
+
+def test_out_of_range():
+    """Test that values outside the requested depth are rejected."""
+    with pytest.raises(ValueError):
+        int_to_Hilbert_rgb(2 ** 24)
+    with pytest.raises(ValueError):
+        Hilbert_to_int((256, 0, 0), nChunks=8)
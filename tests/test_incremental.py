@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for incremental updates of an existing badge block.
+"""
+
+import argparse
+
+import pytest
+
+from badgesort import icons as badgesort_icons
+from badgesort.icons import run
+from badgesort.incremental import MANIFEST_PREFIX, encode_manifest, insert_entries, make_entry, parse_block
+
+
+def _args(output, slugs, **overrides):
+    args = argparse.Namespace(
+        slugs=slugs,
+        random=1,
+        output=str(output),
+        id='incremental-test',
+        format='markdown',
+        badge_style='flat',
+        color_sort='hilbert',
+        hue_rotate=0,
+        no_thanks=True,
+        reverse=False,
+        provider='shields',
+        verify=False,
+        embed_svg=False,
+        skip_logo_check=True,
+        incremental=True,
+    )
+    for name, value in overrides.items():
+        setattr(args, name, value)
+    return args
+
+
+def _badge_lines(path):
+    return [line for line in path.read_text().splitlines() if not line.startswith('<!--')]
+
+
+@pytest.fixture
+def planned(monkeypatch):
+    """Record the specs of the badges each run plans."""
+    specs = []
+    plan_badge = badgesort_icons._plan_badge
+
+    def record(slug_config, args):
+        specs.append(slug_config['spec'])
+        return plan_badge(slug_config, args)
+
+    monkeypatch.setattr(badgesort_icons, '_plan_badge', record)
+    return specs
+
+
+@pytest.mark.parametrize('before, after, built', [
+    (['react', 'go', 'python', 'vuedotjs', 'github'],
+     ['github', 'python?text=Py', 'docker', 'rust', 'npm', 'react', 'go'],
+     ['python?text=Py', 'docker', 'rust', 'npm']),
+    # Equal colours (all 000000) are ordered by their position in the slug list
+    (['apple', 'vercel', 'notion'], ['notion', 'vercel', 'apple', 'github'], ['github']),
+])
+@pytest.mark.parametrize('overrides', [
+    {},
+    {'color_sort': 'step', 'reverse': True},
+    {'color_sort': 'hsv', 'format': 'html'},
+    {'color_sort': 'luminance', 'no_thanks': False},
+])
+def test_update_matches_full_regeneration(tmp_path, planned, overrides, before, after, built):
+    """Test that adding, changing, removing and reordering slugs gives the block a full run writes,
+    building only new badges."""
+    incremental = tmp_path / 'incremental.md'
+    full = tmp_path / 'full.md'
+    run(_args(incremental, before, **overrides))
+    unchanged = {line for line in _badge_lines(incremental) if 'Python' not in line and 'Vue' not in line}
+
+    del planned[:]
+    run(_args(incremental, after, **overrides))
+    assert planned == built
+    run(_args(full, after, **overrides))
+    assert incremental.read_text() == full.read_text()
+    assert unchanged <= set(_badge_lines(incremental))
+    assert not any('Vue' in line for line in _badge_lines(incremental))
+
+
+def test_settings_change_regenerates_block(tmp_path, planned):
+    """Test that a block written with other settings, or without a manifest, is rebuilt from scratch."""
+    output = tmp_path / 'README.md'
+    run(_args(output, ['github', 'python']))
+    del planned[:]
+    run(_args(output, ['github', 'python'], badge_style='for-the-badge'))
+    assert planned == ['github', 'python']
+    assert 'style=for-the-badge' in output.read_text()
+
+    run(_args(output, ['github', 'python'], incremental=False))
+    assert MANIFEST_PREFIX not in output.read_text()
+    del planned[:]
+    run(_args(output, ['github', 'python', 'docker']))
+    assert planned == ['github', 'python', 'docker']
+
+
+def test_manifest_round_trip_and_hand_edits():
+    """Test that manifests survive "--" in specs and that edited blocks aren't trusted."""
+    settings = {'format': 'markdown', 'color_sort': 'step', 'hue_rotate': 0, 'reverse': False}
+    entries = [make_entry('github?text=a--b', [24, 23, 23], '[![GitHub](#)](#)\n', settings),
+               make_entry(None, [0, 0, 0], '[![BadgeSort](#)](#)\n', settings)]
+    manifest = encode_manifest(settings, entries)
+    assert '--b' not in manifest
+    block = manifest + ''.join(entry['line'] for entry in entries)
+    assert parse_block(block, settings) == entries
+    assert parse_block(block + '[![Extra](#)](#)\n', settings) is None
+    assert parse_block(block, dict(settings, reverse=True)) is None
+    assert parse_block(''.join(entry['line'] for entry in entries), settings) is None
+
+
+def test_oklab_and_random_insertion():
+    """Test that oklab inserts at the cheapest spot of the path and every new entry is inserted."""
+    settings = {'color_sort': 'oklab', 'hue_rotate': 0, 'reverse': False}
+    path = [make_entry(str(v), [v, v, v], '', settings) for v in (0, 100, 200, 255)]
+    merged = insert_entries(path, [make_entry('150', [150, 150, 150], '', settings)], settings)
+    assert [entry['spec'] for entry in merged] == ['0', '100', '150', '200', '255']
+
+    settings = dict(settings, color_sort='random')
+    merged = insert_entries(path, [make_entry('new', [1, 2, 3], '', settings)], settings)
+    assert sorted(entry['spec'] for entry in merged) == sorted(['0', '100', '200', '255', 'new'])
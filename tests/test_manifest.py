@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the missing-logo manifest and offline mode.
+"""
+
+import argparse
+import json
+
+import pytest
+
+from badgesort import cache as badgesort_cache
+from badgesort import icons as badgesort_icons
+from badgesort import network
+from badgesort.catalog import simpleicons_version
+from badgesort.manifest import MissingLogoManifest, build_manifest, main as manifest_main
+
+
+def _fake_probe(slug, icon_hex, badge_style):
+    return {'docker': 'missing', 'rust': 'error'}.get(slug, 'present')
+
+
+@pytest.fixture
+def manifest_path(tmp_path, monkeypatch):
+    """Build a manifest for the whole catalog against a fake Shields.io."""
+    monkeypatch.setattr(badgesort_icons, '_probe_logo', _fake_probe)
+    # Recording every probe in the on-disk probe cache is slow and not under test here
+    badgesort_cache.configure(enabled=False)
+    path = str(tmp_path / 'missing_logos.json')
+    build_manifest(path)
+    yield path
+    badgesort_cache.configure()
+
+
+def test_build_manifest(manifest_path):
+    """Test that the manifest records missing and unchecked slugs for the installed version."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest['simpleicons'] == simpleicons_version()
+    assert manifest['missing'] == ['docker']
+    assert manifest['unchecked'] == ['rust']
+
+
+def test_manifest_lookup(manifest_path):
+    """Test that the manifest answers known slugs and doesn't guess about unchecked ones."""
+    manifest = MissingLogoManifest(manifest_path)
+    assert manifest.available
+    assert manifest.is_missing('docker') is True
+    assert manifest.is_missing('github') is False
+    assert manifest.is_missing('rust') is None
+
+
+def test_manifest_ignored_for_other_simpleicons_version(tmp_path):
+    """Test that a manifest generated for another simpleicons release isn't used."""
+    path = tmp_path / 'missing_logos.json'
+    path.write_text(json.dumps({'format': 1, 'simpleicons': '0.0.0', 'missing': ['github'], 'unchecked': []}))
+    manifest = MissingLogoManifest(str(path))
+    assert not manifest.available
+    assert manifest.is_missing('github') is None
+
+
+def test_manifest_command_fails_on_unchecked_probes(manifest_path, monkeypatch):
+    """Test that the manifest command exits with an error when too many probes fail."""
+    with pytest.raises(SystemExit) as e:
+        manifest_main(['-o', manifest_path])
+    assert e.value.code == 1
+    with pytest.raises(SystemExit) as e:
+        manifest_main(['-o', manifest_path, '--max-unchecked', '1'])
+    assert e.value.code == 0
+
+
+def test_offline_run_uses_manifest_without_http(manifest_path, monkeypatch, capsys):
+    """Test that --offline takes embed decisions from the manifest and makes no HTTP requests."""
+    monkeypatch.setattr(badgesort_icons, 'logo_manifest', MissingLogoManifest(manifest_path))
+    monkeypatch.setattr(badgesort_icons, '_logo_availability_cache', {})
+
+    def no_http(*args, **kwargs):
+        raise AssertionError('offline runs must not make HTTP requests')
+    monkeypatch.setattr(badgesort_icons, '_probe_logo', no_http)
+    monkeypatch.setattr(badgesort_icons.requests, 'get', no_http)
+
+    args = argparse.Namespace(
+        slugs=['github', 'docker', 'rust'],
+        random=1,
+        output='',
+        id='offline-test',
+        format='markdown',
+        badge_style='flat',
+        color_sort='hilbert',
+        hue_rotate=0,
+        no_thanks=False,
+        reverse=False,
+        provider='shields',
+        verify=True,
+        embed_svg=False,
+        skip_logo_check=False,
+        offline=True,
+    )
+    try:
+        badgesort_icons.run(args)
+        with pytest.raises(network.OfflineError):
+            network.get_session()
+    finally:
+        network.configure()
+
+    badges = {line.split(']')[0][3:]: line for line in capsys.readouterr().out.splitlines() if line.startswith('[![')}
+    assert 'logo=github&' in badges['GitHub']
+    # Missing from Shields.io, and unknown to the manifest: both embedded
+    assert 'logo=data%3Aimage' in badges['Docker']
+    assert 'logo=data%3Aimage' in badges['Rust']
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for concurrent logo availability probing and badge verification over the
+shared HTTP session, and for the on-disk probe cache.
+"""
+
+import argparse
+import threading
+import time
+
+import pytest
+import requests
+
+from badgesort import cache as badgesort_cache
+from badgesort import icons as badgesort_icons
+from badgesort import network
+from badgesort import scheduler
+
+
+class _FakeResponse(object):
+    def __init__(self, status_code, text, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        body = self.text.encode('utf-8')
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeSession(object):
+    """Answers badge probes after a delay, recording URLs and peak concurrency."""
+
+    def __init__(self, delay=0.1, missing=(), failing=()):
+        self.delay = delay
+        self.missing = set(missing)
+        self.failing = set(failing)
+        self.urls = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, headers=None, stream=False):
+        with self._lock:
+            self.urls.append(url)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if any(f'logo={slug}&' in url for slug in self.failing):
+            return _FakeResponse(503, 'Service Unavailable')
+        if any(f'logo={slug}&' in url for slug in self.missing):
+            return _FakeResponse(200, '<svg><text>Test</text></svg>')
+        return _FakeResponse(200, '<svg><image href="data:..."/></svg>')
+
+
+@pytest.fixture(autouse=True)
+def fresh_network():
+    """Give every test its own circuit breaker and budget."""
+    network.configure()
+    yield
+    network.configure()
+
+
+@pytest.fixture
+def fake_session(monkeypatch, tmp_path):
+    session = _FakeSession(missing={'docker'}, failing={'rust'})
+    monkeypatch.setattr(network, 'get_session', lambda: session)
+    monkeypatch.setattr(badgesort_icons, '_logo_availability_cache', {})
+    badgesort_cache.configure(directory=str(tmp_path))
+    yield session
+    badgesort_cache.configure()
+
+
+def _probed_slugs(session):
+    return sorted(url.split('logo=')[1].split('&')[0] for url in session.urls)
+
+
+def test_thread_map_preserves_order():
+    """Test that results come back in input order from worker threads."""
+    def slow_square(value):
+        time.sleep(0.01 * (5 - value % 5))
+        return value * value
+    assert network.thread_map(slow_square, [(i,) for i in range(20)], concurrency=4) == [i * i for i in range(20)]
+
+
+def test_configure_rejects_invalid_concurrency():
+    """Test that at least one request must be allowed in flight."""
+    with pytest.raises(ValueError):
+        network.configure(0)
+    network.configure(None)
+    assert network.get_concurrency() == network.DEFAULT_CONCURRENCY
+
+
+def test_prefetch_probes_concurrently(fake_session):
+    """Test that all probes are issued at once and their results cached."""
+    slugs = ['github', 'python', 'docker', 'rust', 'go', 'nodedotjs', 'kubernetes', 'linux']
+    plans = [{'slug': slug, 'hex': '000000'} for slug in slugs]
+
+    start_time = time.perf_counter()
+    logo_missing = badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    elapsed = time.perf_counter() - start_time
+
+    assert fake_session.peak == len(slugs), "Every probe should be in flight at once"
+    assert elapsed < fake_session.delay * len(slugs) / 2
+    assert logo_missing == {slug: slug in ('docker', 'rust') for slug in slugs}
+    # Errors are reported as missing but not remembered for the rest of the run
+    assert badgesort_icons._logo_availability_cache == {slug: slug == 'docker' for slug in slugs if slug != 'rust'}
+
+    # Later per-badge checks are served from the cache
+    assert badgesort_icons._is_logo_missing_from_shields('docker', '2496ED', 'flat') is True
+    assert len(fake_session.urls) == len(slugs)
+
+
+def test_prefetch_deduplicates_and_skips_cached(fake_session):
+    """Test that repeated slugs are probed once and cached slugs not at all."""
+    badgesort_icons._logo_availability_cache['github'] = False
+    plans = [{'slug': slug, 'hex': '000000'} for slug in ['github', 'python', 'python', 'go']]
+    badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    assert _probed_slugs(fake_session) == ['go', 'python']
+
+
+def test_prefetch_respects_concurrency_limit(fake_session):
+    """Test that no more than the configured number of probes run at once."""
+    network.configure(2)
+    try:
+        plans = [{'slug': slug, 'hex': '000000'} for slug in ['github', 'python', 'rust', 'go', 'linux']]
+        badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    finally:
+        network.configure(None)
+    assert fake_session.peak == 2
+    assert len(fake_session.urls) == 5
+
+
+def test_probe_cache_survives_process_exit(fake_session):
+    """Test that probe outcomes are reused from disk by a later run, whatever the badge style."""
+    plans = [{'slug': slug, 'hex': '000000'} for slug in ['github', 'docker']]
+    assert badgesort_icons._prefetch_logo_availability(plans, 'flat') == {'github': False, 'docker': True}
+
+    # A new process starts with an empty in-memory cache
+    badgesort_icons._logo_availability_cache.clear()
+    badgesort_cache.configure(directory=badgesort_cache.get_probe_cache().directory)
+    fake_session.urls.clear()
+    assert badgesort_icons._prefetch_logo_availability(plans, 'for-the-badge') == {'github': False, 'docker': True}
+    assert fake_session.urls == []
+
+
+def test_probe_cache_expires_by_outcome(fake_session, monkeypatch):
+    """Test that negative and error outcomes expire on their own TTLs."""
+    plans = [{'slug': slug, 'hex': '000000'} for slug in ['github', 'docker', 'rust']]
+    badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    badgesort_icons._logo_availability_cache.clear()
+    fake_session.urls.clear()
+
+    # Within every TTL nothing is probed again, not even the failed slug
+    badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    assert fake_session.urls == []
+
+    # Past the error TTL only the failed slug is retried
+    now = time.time()
+    monkeypatch.setattr(badgesort_icons.time, 'time', lambda: now + badgesort_icons.LOGO_PROBE_TTLS['error'] + 1)
+    badgesort_icons._logo_availability_cache.clear()
+    badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    assert _probed_slugs(fake_session) == ['rust']
+
+    # Past the negative TTL the missing logo is probed again too
+    monkeypatch.setattr(badgesort_icons.time, 'time', lambda: now + badgesort_icons.LOGO_PROBE_TTLS['missing'] + 1)
+    badgesort_icons._logo_availability_cache.clear()
+    fake_session.urls.clear()
+    badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    assert _probed_slugs(fake_session) == ['docker', 'rust']
+
+
+def test_probe_cache_keyed_by_simpleicons_version(fake_session, monkeypatch):
+    """Test that a new Simple Icons release re-probes every slug."""
+    plans = [{'slug': 'github', 'hex': '000000'}]
+    badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    badgesort_icons._logo_availability_cache.clear()
+    monkeypatch.setattr(badgesort_icons, 'simpleicons_version', lambda: '0.0.0-test')
+    badgesort_icons._prefetch_logo_availability(plans, 'flat')
+    assert _probed_slugs(fake_session) == ['github', 'github']
+
+
+class _ScriptedSession(object):
+    """Returns a scripted sequence of status codes (or exceptions) per URL."""
+
+    def __init__(self, script):
+        self.script = {url: list(responses) for url, responses in script.items()}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, headers=None, stream=False):
+        with self._lock:
+            self.calls.append(url)
+            response = self.script[url].pop(0) if len(self.script[url]) > 1 else self.script[url][0]
+        if isinstance(response, Exception):
+            raise response
+        return _FakeResponse(response, '')
+
+
+@pytest.fixture
+def scripted_session(monkeypatch):
+    monkeypatch.setattr(badgesort_icons, 'VERIFY_BACKOFF', 0)
+    # Rate limiting itself is covered in test_scheduler.py
+    monkeypatch.setattr(scheduler, 'RATE_LIMIT_BACKOFF', 0)
+    monkeypatch.setattr(scheduler, 'MIN_RATE', 1000)
+
+    def install(script):
+        session = _ScriptedSession(script)
+        monkeypatch.setattr(network, 'get_session', lambda: session)
+        return session
+    return install
+
+
+def test_verify_retries_server_errors_and_rate_limits(scripted_session):
+    """Test that 5xx, 429 and dropped connections are retried and 4xx is not, and 429s only in one layer."""
+    session = scripted_session({
+        'flaky': [503, 429, 200],
+        'limited': [429],
+        'dropped': [requests.ConnectionError('reset'), 200],
+        'broken': [404],
+        'down': [500],
+        'slow': [requests.Timeout('read timeout')],
+    })
+    assert badgesort_icons._verify_badge_url('flaky') is None
+    assert badgesort_icons._verify_badge_url('dropped') is None
+    assert badgesort_icons._verify_badge_url('broken') == 'HTTP 404'
+    assert badgesort_icons._verify_badge_url('down', retries=2) == 'HTTP 500'
+    assert badgesort_icons._verify_badge_url('slow', timeout=1).startswith('timed out')
+    assert badgesort_icons._verify_badge_url('limited') == 'HTTP 429'
+    assert [session.calls.count(url) for url in ('flaky', 'dropped', 'broken', 'down', 'slow')] == [3, 2, 1, 3, 1]
+    assert session.calls.count('limited') == network.RATE_LIMIT_RETRIES + 1
+
+
+def test_verify_deduplicates_and_reports_every_failure(scripted_session):
+    """Test that each distinct URL is requested once and all failures are returned together."""
+    session = scripted_session({'a': [200], 'b': [404], 'c': [500]})
+    icon_list = [{'slug': slug, 'url': url} for slug, url in
+                 [('one', 'a'), ('two', 'b'), ('three', 'a'), ('four', 'c'), ('five', 'b')]]
+    failures = badgesort_icons._verify_badges(icon_list, retries=1)
+    assert [(icon['slug'], error) for icon, error in failures] == [
+        ('two', 'HTTP 404'), ('four', 'HTTP 500'), ('five', 'HTTP 404')]
+    assert sorted(session.calls) == ['a', 'b', 'c', 'c']
+
+
+def test_run_reports_all_verification_failures(monkeypatch, caplog, tmp_path):
+    """Test that --verify fails the run once, listing every broken badge, before writing output."""
+    class BrokenSession(object):
+        def get(self, url, timeout=None, headers=None, stream=False):
+            return _FakeResponse(404 if '/Docker-' in url or '/Rust-' in url else 200, '')
+    monkeypatch.setattr(network, 'get_session', lambda: BrokenSession())
+    output = tmp_path / 'README.md'
+    args = argparse.Namespace(
+        slugs=['github', 'docker', 'rust'], random=1, output=str(output), id='verify-test', format='markdown',
+        badge_style='flat', color_sort='hilbert', hue_rotate=0, no_thanks=True, reverse=False,
+        provider='shields', verify=True, embed_svg=False, skip_logo_check=True,
+    )
+    with pytest.raises(SystemExit) as e:
+        badgesort_icons.run(args)
+    assert e.value.code == 1
+    report = [record.getMessage() for record in caplog.records if record.levelname == 'CRITICAL']
+    assert len(report) == 1 and 'failed for 2 of 4 badges' in report[0]
+    assert '  docker: HTTP 404' in report[0] and '  rust: HTTP 404' in report[0]
+    assert not output.exists()
+
+
+class _RevalidatingSession(object):
+    """Serves badges with an ETag and answers matching If-None-Match requests with 304."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, timeout=None, headers=None, stream=False):
+        headers = headers or {}
+        self.requests.append((url, dict(headers)))
+        etag = '"v1"'
+        if headers.get('If-None-Match') == etag:
+            return _FakeResponse(304, '', {'ETag': etag})
+        body = '<svg><text>Test</text></svg>' if 'logo=docker&' in url else '<svg><image href="data:..."/></svg>'
+        return _FakeResponse(200, body, {'ETag': etag, 'Last-Modified': 'Wed, 01 Oct 2026 00:00:00 GMT'})
+
+
+def test_probes_and_verification_revalidate_with_etags(monkeypatch, tmp_path):
+    """Test that later runs send stored validators and reuse the stored verdict on 304."""
+    session = _RevalidatingSession()
+    monkeypatch.setattr(network, 'get_session', lambda: session)
+    monkeypatch.setattr(badgesort_icons, '_logo_availability_cache', {})
+    badgesort_cache.configure(directory=str(tmp_path))
+    try:
+        for _ in range(2):
+            assert badgesort_icons._probe_logo('github', '181717', 'flat') == 'present'
+            assert badgesort_icons._probe_logo('docker', '2496ED', 'flat') == 'missing'
+            assert badgesort_icons._verify_badge_url('https://img.shields.io/badge/GitHub-181717.svg') is None
+    finally:
+        badgesort_cache.configure()
+
+    first_run, second_run = session.requests[:3], session.requests[3:]
+    assert all(headers == {} for _, headers in first_run)
+    assert all(headers == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 01 Oct 2026 00:00:00 GMT'}
+               for _, headers in second_run)
+    assert [url for url, _ in second_run] == [url for url, _ in first_run]
+
+
+def test_unconditional_without_cache(monkeypatch):
+    """Test that no validators are stored or sent when caching is disabled."""
+    session = _RevalidatingSession()
+    monkeypatch.setattr(network, 'get_session', lambda: session)
+    with badgesort_cache.disabled():
+        for _ in range(2):
+            assert badgesort_icons._verify_badge_url('https://img.shields.io/badge/Rust-000000.svg') is None
+    assert [headers for _, headers in session.requests] == [{}, {}]
+
+
+class _SlowSession(object):
+    """Takes `delay` seconds per request, timing out like requests does when the timeout is shorter."""
+
+    def __init__(self, delay, status_code=200):
+        self.delay = delay
+        self.status_code = status_code
+        self.calls = 0
+
+    def get(self, url, timeout=None, headers=None, stream=False):
+        self.calls += 1
+        if timeout is not None and timeout < self.delay:
+            time.sleep(timeout)
+            raise requests.Timeout(f'read timeout={timeout}')
+        time.sleep(self.delay)
+        return _FakeResponse(self.status_code, '<svg><image href="data:..."/></svg>')
+
+
+@pytest.mark.parametrize('policy, expected', [('embed', True), ('slug', False), ('cache', False)])
+def test_circuit_breaker_degrades_by_policy(policy, expected, monkeypatch, tmp_path):
+    """Test that consecutive failures trip the breaker and the rest of the logos follow the policy."""
+    monkeypatch.setattr(badgesort_icons, '_logo_availability_cache', {})
+    badgesort_cache.configure(directory=str(tmp_path))
+    try:
+        # An expired probe record for github is what the cache policy falls back to
+        monkeypatch.setattr(network, 'get_session', lambda: _SlowSession(0))
+        badgesort_icons._is_logo_missing_from_shields('github', '181717', 'flat')
+        now = time.time()
+        monkeypatch.setattr(badgesort_icons.time, 'time', lambda: now + badgesort_icons.LOGO_PROBE_TTLS['present'] + 1)
+        badgesort_icons._logo_availability_cache.clear()
+
+        session = _SlowSession(0, status_code=503)
+        monkeypatch.setattr(network, 'get_session', lambda: session)
+        network.configure(concurrency=1, policy=policy)
+        slugs = ['python', 'docker', 'rust', 'go', 'linux', 'github', 'kubernetes', 'nodedotjs']
+        logo_missing = badgesort_icons._prefetch_logo_availability([{'slug': slug, 'hex': '000000'} for slug in slugs], 'flat')
+    finally:
+        badgesort_cache.configure()
+
+    assert session.calls == network.BREAKER_FAILURES
+    guard = network.get_guard()
+    assert guard.tripped and guard.degraded['logo checks'] == ['github', 'kubernetes', 'nodedotjs']
+    # Probed before the breaker tripped: failures count as missing, as before
+    assert all(logo_missing[slug] for slug in slugs[:network.BREAKER_FAILURES])
+    assert logo_missing['github'] is expected
+    # Nothing known about these, so even the cache policy embeds them
+    assert logo_missing['kubernetes'] is (policy != 'slug')
+
+
+def test_network_budget_bounds_wall_time(monkeypatch):
+    """Test that a slow provider can't hold the run past its network budget."""
+    session = _SlowSession(0.5)
+    monkeypatch.setattr(network, 'get_session', lambda: session)
+    monkeypatch.setattr(badgesort_icons, '_logo_availability_cache', {})
+    network.configure(concurrency=2, budget=0.3, policy='slug')
+    slugs = ['github', 'python', 'docker', 'rust', 'go', 'linux']
+
+    start_time = time.perf_counter()
+    with badgesort_cache.disabled(), network.get_guard().stage():
+        logo_missing = badgesort_icons._prefetch_logo_availability([{'slug': slug, 'hex': '000000'} for slug in slugs], 'flat')
+        failures = badgesort_icons._verify_badges([{'slug': slug, 'url': slug} for slug in slugs])
+    elapsed = time.perf_counter() - start_time
+
+    assert elapsed < 0.6
+    guard = network.get_guard()
+    assert guard.tripped == 'network budget spent'
+    # Only the first batch of probes was sent, and no verification requests at all
+    assert len(guard.degraded['logo checks']) == len(slugs) - session.calls
+    assert len(guard.degraded['badge verifications']) == len(slugs)
+    assert failures == []
+    assert not any(logo_missing[slug] for slug in guard.degraded['logo checks'])
+
+
+def test_budget_only_counts_network_stages():
+    """Test that time outside stage() blocks doesn't use up the budget."""
+    guard = network.NetworkGuard(budget=0.2)
+    with guard.stage():
+        time.sleep(0.05)
+    time.sleep(0.3)
+    with guard.stage():
+        assert 0.1 < guard.remaining() <= 0.15
+        assert guard.admit(5) <= 0.15
+
+
+class _BodySession(object):
+    """Answers every request with the same body, optionally announcing its Content-Length."""
+
+    def __init__(self, body, content_length=False, status_code=200):
+        self.body = body
+        self.content_length = content_length
+        self.status_code = status_code
+        self.responses = []
+
+    def get(self, url, timeout=None, headers=None, stream=False):
+        response = _FakeResponse(self.status_code, self.body, {'Content-Length': str(len(self.body))} if self.content_length else {})
+        self.responses.append(response)
+        return response
+
+
+@pytest.mark.parametrize('body, content_length, expected, stopped_early', [
+    # A logo near the start of a long body: stop reading there
+    ('<svg><image href="data:' + 'A' * 100000 + '"/></svg>', True, 'present', 1),
+    # A marker split across two chunks is still found
+    ('<svg>' + ' ' * (badgesort_icons.PROBE_CHUNK_BYTES - 8) + '<IMAGE href="x"/></svg>', True, 'present', 0),
+    ('<svg><text>Test</text></svg>', False, 'missing', 0),
+    # No marker within the byte cap: undecided
+    ('<svg>' + ' ' * 100000 + '</svg>', False, 'error', 0),
+])
+def test_probe_streams_until_logo_marker(body, content_length, expected, stopped_early, monkeypatch):
+    """Test that probes stop at the first logo marker or the byte cap, and count the bytes they read."""
+    session = _BodySession(body, content_length)
+    monkeypatch.setattr(network, 'get_session', lambda: session)
+    with badgesort_cache.disabled():
+        assert badgesort_icons._probe_logo('github', '181717', 'flat') == expected
+
+    stats = network.get_stats()
+    assert session.responses[0].closed
+    assert stats['requests'] == 1
+    assert stats['probes_stopped_early'] == stopped_early
+    if expected == 'present' and stopped_early:
+        assert stats['probe_bytes'] == badgesort_icons.PROBE_CHUNK_BYTES
+    elif expected == 'error':
+        assert stats['probe_bytes'] == badgesort_icons.PROBE_MAX_BYTES
+    else:
+        assert stats['probe_bytes'] == len(body)
+
+
+def test_probe_error_responses_are_not_read(monkeypatch):
+    """Test that an error page is closed unread instead of being scanned for a logo."""
+    session = _BodySession('<html>' + 'x' * 100000 + '</html>', status_code=503)
+    monkeypatch.setattr(network, 'get_session', lambda: session)
+    with badgesort_cache.disabled():
+        assert badgesort_icons._probe_logo('github', '181717', 'flat') == 'error'
+    assert session.responses[0].closed
+    assert network.get_stats()['probe_bytes'] == 0
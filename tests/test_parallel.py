@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for process pool fan-out of per-icon work.
+"""
+
+import os
+
+import pytest
+
+from badgesort import cache as badgesort_cache
+from badgesort.icons import svg_to_base64_data_uris
+from badgesort.parallel import process_map, resolve_jobs
+from badgesort.raster import PythonRasterizer
+from simpleicons.all import icons
+
+
+def _square(value):
+    return value * value, os.getpid()
+
+
+def test_resolve_jobs():
+    """Test that None is sequential, 0 is one per CPU and negatives are rejected."""
+    assert resolve_jobs(None) == 1
+    assert resolve_jobs(3) == 3
+    assert resolve_jobs(0) == (os.cpu_count() or 1)
+    with pytest.raises(ValueError):
+        resolve_jobs(-1)
+
+
+def test_process_map_preserves_order_across_workers():
+    """Test that results come back in input order from worker processes."""
+    results = process_map(_square, [(i,) for i in range(50)], jobs=3)
+    assert [value for value, _ in results] == [i * i for i in range(50)]
+    assert all(pid != os.getpid() for _, pid in results), "Work should run in worker processes"
+
+
+def test_process_map_runs_in_process_when_sequential():
+    """Test that a single worker doesn't start a pool."""
+    results = process_map(_square, [(2,), (3,)], jobs=None)
+    assert results == [(4, os.getpid()), (9, os.getpid())]
+
+
+def test_parallel_data_uris_match_sequential():
+    """Test that fanning data URI construction out to workers gives identical results."""
+    slugs = ['github', 'python', 'docker', 'kubernetes', 'amazonaws', 'dotnet']
+    items = [(icons[slug].svg, fill, 3550, slug) for slug in slugs for fill in ('white', f'#{icons[slug].hex}')]
+    with badgesort_cache.disabled():
+        sequential = svg_to_base64_data_uris(items, encoding='shortest', compression='adaptive')
+        parallel = svg_to_base64_data_uris(items, encoding='shortest', compression='adaptive', jobs=2)
+    assert parallel == sequential
+
+
+def test_python_rasterizer_batch_in_workers():
+    """Test that the in-process rasterizer gives identical PNGs when fanned out."""
+    svgs = [icons[slug].svg for slug in ['github', 'kubernetes', 'dotnet']]
+    rasterizer = PythonRasterizer()
+    sequential = [png for png, _ in rasterizer.rasterize_batch(svgs, 14)]
+    parallel = [png for png, _ in rasterizer.rasterize_batch(svgs, 14, jobs=2)]
+    assert parallel == sequential and all(sequential)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the asyncio pipeline engine: output must match the phased engine.
+"""
+
+import argparse
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+
+from badgesort import cache as badgesort_cache
+from badgesort import icons as badgesort_icons
+from badgesort import network
+from tests.test_network import _FakeSession
+
+
+@pytest.fixture
+def fake_session(monkeypatch, tmp_path):
+    session = _FakeSession(delay=0.01, missing={'docker'}, failing={'rust'})
+    monkeypatch.setattr(network, 'get_session', lambda: session)
+    network.configure()
+    yield session
+    network.configure()
+    badgesort_cache.configure()
+
+
+def _run(monkeypatch, tmp_path, engine, **overrides):
+    # Every engine starts from cold probe and artifact caches
+    monkeypatch.setattr(badgesort_icons, '_logo_availability_cache', {})
+    options = dict(
+        slugs=['github,docker,rust,python,amazonaws,linux'], random=1, output='', id='engine-test',
+        format='markdown', badge_style='flat', color_sort='hilbert', hue_rotate=0, no_thanks=True,
+        reverse=False, provider='shields', verify=True, embed_svg=False, skip_logo_check=False,
+        raster_backend='python', engine=engine, cache_dir=str(tmp_path / engine),
+    )
+    options.update(overrides)
+    with redirect_stdout(StringIO()) as out:
+        badgesort_icons.run(argparse.Namespace(**options))
+    return out.getvalue()
+
+
+def test_async_engine_matches_phased_shields(fake_session, monkeypatch, tmp_path):
+    """Test that probing, embedding and verification give the same output with both engines."""
+    phased = _run(monkeypatch, tmp_path, 'phased')
+    fake_session.urls.clear()
+    output = _run(monkeypatch, tmp_path, 'async')
+    assert output == phased
+    # Missing and failed probes fall back to data URIs
+    assert output.count('logo=data%3Aimage') == 2
+    # One probe per slug and one verification per badge URL, thanks badge included
+    assert len([url for url in fake_session.urls if url.startswith('https://img.shields.io/badge/Test-')]) == 6
+    assert len(fake_session.urls) == 6 + 7
+
+
+@pytest.mark.parametrize('jobs', [None, 2])
+def test_async_engine_matches_phased_badgen(fake_session, monkeypatch, tmp_path, jobs):
+    """Test that embedded logos, PNG fallbacks and worker processes give the same output with both engines."""
+    overrides = dict(provider='badgen', verify=False, no_cache=True, compression='adaptive',
+                     logo_encoding='shortest', jobs=jobs)
+    assert _run(monkeypatch, tmp_path, 'async', **overrides) == _run(monkeypatch, tmp_path, 'phased', **overrides)
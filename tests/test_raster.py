@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for PNG rasterization backends and batched PNG fallbacks.
+"""
+
+import struct
+import subprocess
+import tempfile
+import zlib
+from unittest import mock
+
+import pytest
+
+from badgesort import cache as badgesort_cache
+from badgesort import icons as badgesort_icons
+from badgesort import raster
+from badgesort.icons import svg_to_base64_data_uris
+from badgesort.raster import PythonRasterizer, RsvgRasterizer, flatten_path
+from simpleicons.all import icons
+
+
+def test_rsvg_rasterizer_uses_pipes_not_temp_files():
+    """Test that rsvg-convert receives SVG on stdin and returns PNG on stdout."""
+    completed = subprocess.CompletedProcess(args=[], returncode=0, stdout=b'\x89PNG', stderr=b'')
+    with mock.patch.object(raster.subprocess, 'run', return_value=completed) as run_mock, \
+            mock.patch.object(tempfile, 'NamedTemporaryFile') as tempfile_mock:
+        assert RsvgRasterizer().rasterize('<svg/>', 14) == b'\x89PNG'
+
+    assert not tempfile_mock.called, "Rasterization should not write temporary files"
+    cmd = run_mock.call_args[0][0]
+    assert cmd[0] == 'rsvg-convert' and '--width=14' in cmd and '--height=14' in cmd
+    assert not any(arg.endswith('.svg') for arg in cmd), "SVG should be piped, not passed as a file"
+    assert run_mock.call_args[1]['input'] == b'<svg/>'
+
+
+def test_rsvg_batch_preserves_order_and_reports_times():
+    """Test that batches come back in input order with a timing per icon."""
+    def fake_rasterize(svg_content, size):
+        return svg_content.encode('utf-8') if 'ok' in svg_content else None
+
+    rasterizer = RsvgRasterizer()
+    with mock.patch.object(rasterizer, 'rasterize', side_effect=fake_rasterize):
+        results = rasterizer.rasterize_batch(['ok-1', 'bad', 'ok-3'], 14, jobs=3)
+
+    assert [png for png, _ in results] == [b'ok-1', None, b'ok-3']
+    assert all(elapsed >= 0 for _, elapsed in results)
+
+
+def test_fallbacks_rasterized_in_one_batch():
+    """Test that every oversized icon in a run is rasterized by a single batch call."""
+    fake_rasterizer = mock.Mock()
+    fake_rasterizer.name = 'fake'
+    fake_rasterizer.rasterize_batch.side_effect = lambda svgs, size, jobs=None: [(b'png', 0.001) for _ in svgs]
+
+    slugs = ['github', 'python', 'docker']
+    with badgesort_cache.disabled(), \
+            mock.patch.object(badgesort_icons, 'get_rasterizer', return_value=fake_rasterizer):
+        # A tiny size limit forces every icon onto the PNG fallback
+        data_uris = svg_to_base64_data_uris([(icons[slug].svg, 'white', 100, None) for slug in slugs])
+
+    assert fake_rasterizer.rasterize_batch.call_count == 1, "All fallbacks should share one batch"
+    assert len(fake_rasterizer.rasterize_batch.call_args[0][0]) == len(slugs)
+    assert data_uris == ['data:image/png;base64,cG5n'] * len(slugs)
+
+
+def _decode_png(png_bytes):
+    """Decode an unfiltered 8-bit PNG into (color_type, rows of pixel tuples)."""
+    assert png_bytes[:8] == b'\x89PNG\r\n\x1a\n'
+    pos, chunks = 8, {}
+    while pos < len(png_bytes):
+        length, tag = struct.unpack('>I4s', png_bytes[pos:pos + 8])
+        data = png_bytes[pos + 8:pos + 8 + length]
+        assert struct.unpack('>I', png_bytes[pos + 8 + length:pos + 12 + length])[0] == zlib.crc32(tag + data)
+        chunks[tag] = chunks.get(tag, b'') + data
+        pos += 12 + length
+    width, height, depth, color_type = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+    channels = {4: 2, 6: 4}[color_type]
+    raw = zlib.decompress(chunks[b'IDAT'])
+    stride = width * channels + 1
+    rows = []
+    for y in range(height):
+        line = raw[y * stride:(y + 1) * stride]
+        assert line[0] == 0
+        rows.append([tuple(line[1 + x * channels:1 + (x + 1) * channels]) for x in range(width)])
+    return color_type, rows
+
+
+def _svg(d, fill='white', extra=''):
+    return f'<svg role="img" viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg"><path fill="{fill}"{extra} d="{d}"/></svg>'
+
+
+def test_python_rasterizer_fills_square_exactly():
+    """Test that a pixel-aligned square is fully opaque inside and transparent outside."""
+    # 12x12 user units in a 24 unit viewBox is exactly the left half at 14px
+    png = PythonRasterizer().rasterize(_svg('M0 0h12v24H0z'), 14)
+    color_type, rows = _decode_png(png)
+    assert color_type == 4, "White fills should be written as gray+alpha"
+    assert len(rows) == 14 and all(len(row) == 14 for row in rows)
+    for row in rows:
+        assert row[:7] == [(255, 255)] * 7
+        assert row[7:] == [(255, 0)] * 7
+
+
+def test_python_rasterizer_antialiases_and_colors():
+    """Test partial coverage at edges and RGBA output for brand colours."""
+    # Right edge at 13 user units lands mid-pixel (7.58px)
+    png = PythonRasterizer().rasterize(_svg('M0 0H13V24H0Z', fill='#FF8800'), 14)
+    color_type, rows = _decode_png(png)
+    assert color_type == 6
+    assert rows[5][0] == (255, 136, 0, 255)
+    assert 0 < rows[5][7][3] < 255, "Edge pixel should be partially covered"
+    assert rows[5][8][3] == 0
+
+
+def test_python_rasterizer_fill_rules():
+    """Test that nested same-direction subpaths leave a hole only under evenodd."""
+    d = 'M2 2h20v20H2zM8 8h8v8H8z'
+    _, nonzero = _decode_png(PythonRasterizer().rasterize(_svg(d), 14))
+    _, evenodd = _decode_png(PythonRasterizer().rasterize(_svg(d, extra=' fill-rule="evenodd"'), 14))
+    assert nonzero[7][7][1] == 255
+    assert evenodd[7][7][1] == 0
+    assert evenodd[2][2][1] == 255
+
+
+def test_flatten_path_handles_compact_arcs_and_relative_commands():
+    """Test scour-style compact arc flags and implicit lineto after moveto."""
+    polygons = flatten_path('m2 2 4 0a2 2 0 014 0l0 4-8 0z')
+    assert len(polygons) == 1
+    points = polygons[0]
+    assert points[1] == (6.0, 2.0)
+    assert points[-1] == (2.0, 6.0)
+    # The arc bulges upwards (negative y) between x=6 and x=10
+    assert min(y for _, y in points) == pytest.approx(0.0, abs=0.05)
+    assert (10.0, 2.0) in points
+
+
+def test_python_rasterizer_covers_catalog_icons():
+    """Test that real Simple Icons paths rasterize with sensible coverage."""
+    rasterizer = PythonRasterizer()
+    for slug in ['github', 'kubernetes', 'dotnet', 'amazonaws', 'python']:
+        png = rasterizer.rasterize(icons[slug].svg.replace('<path ', '<path fill="white" '), 14)
+        assert png is not None, f"{slug} should rasterize"
+        _, rows = _decode_png(png)
+        alpha = [pixel[1] for row in rows for pixel in row]
+        assert 0 < sum(alpha) < 255 * 14 * 14, f"{slug} should be partially covered"
+    assert rasterizer.rasterize('<svg><path d="M0 0Q"/></svg>', 14) is None
+
+
+def test_raster_backend_selection():
+    """Test explicit backends and the auto fallback when rsvg-convert is missing."""
+    try:
+        raster.configure('python')
+        assert raster.get_rasterizer().name == 'python'
+        raster.configure('rsvg')
+        assert raster.get_rasterizer().name == 'rsvg-convert'
+        raster.configure('auto')
+        with mock.patch.object(raster.shutil, 'which', return_value=None):
+            assert raster.get_rasterizer().name == 'python'
+        with pytest.raises(ValueError):
+            raster.configure('bogus')
+    finally:
+        raster.configure('auto')
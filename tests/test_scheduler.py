@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the per-host request scheduler: rate limits, Retry-After, concurrency
+caps and fair queuing, and for runs against a rate-limited stand-in server.
+"""
+
+import argparse
+import threading
+import time
+from contextlib import redirect_stdout
+from email.utils import formatdate
+from io import StringIO
+
+from badgesort import icons as badgesort_icons
+from badgesort import network
+from badgesort.scheduler import RequestScheduler, parse_retry_after
+
+URL = 'https://img.shields.io/badge/Test-181717.svg'
+
+
+def test_parse_retry_after():
+    """Test that Retry-After is understood as seconds or an HTTP date."""
+    assert parse_retry_after('3') == 3.0
+    assert 9 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+    assert parse_retry_after(formatdate(time.time() - 10, usegmt=True)) == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_token_bucket_limits_rate():
+    """Test that a configured rate is held after the initial burst."""
+    scheduler = RequestScheduler(rate_limit=50)
+    start = time.monotonic()
+    for _ in range(60):
+        assert scheduler.acquire(URL)
+        scheduler.release(URL, 200)
+    assert time.monotonic() - start >= 0.18
+
+
+def test_retry_after_pauses_host():
+    """Test that a 429 with Retry-After pauses that host only, and lowers its rate."""
+    scheduler = RequestScheduler()
+    for _ in range(4):
+        assert scheduler.acquire(URL)
+        scheduler.release(URL, 200)
+    assert scheduler.acquire(URL)
+    assert 0.2 <= scheduler.release(URL, 429, '0.3') <= 0.31
+    assert scheduler.current_rate(URL) == 2.5
+
+    # Another host isn't affected
+    assert scheduler.acquire('https://badgen.net/badge/a/b', deadline=time.monotonic() + 0.05)
+    assert not scheduler.acquire(URL, deadline=time.monotonic() + 0.05)
+    start = time.monotonic()
+    assert scheduler.acquire(URL)
+    assert time.monotonic() - start >= 0.2
+    scheduler.release(URL, 200)
+    assert scheduler.current_rate(URL) > 2.5
+
+
+def test_host_concurrency_cap():
+    """Test that each host has its own cap on requests in flight."""
+    scheduler = RequestScheduler(concurrency=2)
+    assert scheduler.acquire(URL) and scheduler.acquire(URL)
+    assert not scheduler.acquire(URL, deadline=time.monotonic() + 0.05)
+    assert scheduler.acquire('https://badgen.net/badge/a/b', deadline=time.monotonic() + 0.05)
+    scheduler.release(URL, 200)
+    assert scheduler.acquire(URL, deadline=time.monotonic() + 0.05)
+
+
+def test_stages_take_turns():
+    """Test that waiting requests are granted round-robin between stages, in order within a stage."""
+    scheduler = RequestScheduler(concurrency=1)
+    grants = []
+
+    def request(name, stage):
+        scheduler.acquire(URL, stage)
+        grants.append(name)
+        scheduler.release(URL, 200)
+
+    assert scheduler.acquire(URL, 'probe')
+    threads = []
+    for name, stage in [('probe1', 'probe'), ('probe2', 'probe'), ('probe3', 'probe'), ('verify1', 'verify')]:
+        threads.append(threading.Thread(target=request, args=(name, stage)))
+        threads[-1].start()
+        # Queue in a known order
+        time.sleep(0.02)
+    scheduler.release(URL, 200)
+    for thread in threads:
+        thread.join()
+    assert grants == ['probe1', 'verify1', 'probe2', 'probe3']
+
+
+def test_rate_limited_run_has_no_false_missing_logos(standin):
+    """Test that 429s slow logo checks and verification down instead of embedding logos or failing."""
+    standin.rate_limit, standin.burst = 40, 10
+    slugs = ['github', 'docker', 'python', 'go', 'linux', 'rust', 'java', 'swift', 'ruby', 'php', 'git', 'npm']
+    args = argparse.Namespace(
+        slugs=[','.join(slugs)], random=1, output='', id='rate-limit-test', format='markdown',
+        badge_style='flat', color_sort='hilbert', hue_rotate=0, no_thanks=True, reverse=False,
+        provider='shields', verify=True, embed_svg=False, skip_logo_check=False, no_cache=True,
+    )
+    with redirect_stdout(StringIO()) as out:
+        badgesort_icons.run(args)
+
+    assert standin.statuses[429] > 0
+    assert network.get_stats()['rate_limited'] == standin.statuses[429]
+    # Every logo is bundled by the stand-in, so nothing should have been embedded
+    assert 'data%3Aimage' not in out.getvalue()
+    assert out.getvalue().count('[![') == len(slugs)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the batch sort-key engine behind --color-sort.
+"""
+
+import random
+
+import pytest
+
+from badgesort import sorting
+from badgesort.sorting import SORT_METHODS, color_key, sort_keys, sort_order
+
+# Corners, grays, each primary winning the max, and hue ties across step bands
+EDGE_COLOURS = [(r, g, b) for r in (0, 128, 255) for g in (0, 128, 255) for b in (0, 128, 255)] + [
+    (1, 1, 1), (254, 254, 254), (255, 0, 1), (255, 1, 0), (0, 255, 254), (200, 100, 100), (100, 200, 100),
+]
+
+
+def _colours(count, seed=0):
+    rng = random.Random(seed)
+    # A small palette draws duplicates, so stability is exercised too
+    palette = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(count // 3)]
+    return EDGE_COLOURS + [rng.choice(palette) for _ in range(count)]
+
+
+def _reference_order(colours, method, hue_rotate=0):
+    """The order run() produced with one key function call per badge."""
+    indexed = list(range(len(colours)))
+    key = color_key(method, hue_rotate)
+    indexed.sort(key=lambda i: key(colours[i]))
+    return indexed
+
+
+@pytest.fixture
+def pure_python(monkeypatch):
+    monkeypatch.setattr(sorting, 'np', None)
+
+
+@pytest.mark.parametrize('hue_rotate', [0, 90])
+@pytest.mark.parametrize('method', list(SORT_METHODS))
+def test_fallback_matches_per_colour_sort(pure_python, method, hue_rotate):
+    """Test that the pure-Python engine sorts exactly like per-badge key functions."""
+    colours = _colours(3000)
+    assert sort_order(colours, method, hue_rotate) == _reference_order(colours, method, hue_rotate)
+
+
+@pytest.mark.parametrize('hue_rotate', [0, 90])
+@pytest.mark.parametrize('method', list(SORT_METHODS))
+def test_numpy_matches_per_colour_sort(method, hue_rotate):
+    """Test that the vectorised keys are identical to the per-colour keys, and so is the order."""
+    np = pytest.importorskip('numpy')
+    colours = _colours(3000)
+    columns = sort_keys(np.array(colours, dtype=np.uint8), method, hue_rotate)
+    key = color_key(method, hue_rotate)
+    for i, rgb in enumerate(colours):
+        expected = key(rgb)
+        expected = expected if isinstance(expected, tuple) else (expected,)
+        assert tuple(column[i].item() for column in columns) == expected
+    assert sort_order(np.array(colours, dtype=np.uint8), method, hue_rotate) == _reference_order(colours, method, hue_rotate)
+
+
+@pytest.mark.parametrize('hue_rotate', [0, 90])
+@pytest.mark.parametrize('method', list(SORT_METHODS))
+def test_numpy_matches_per_colour_sort_on_catalog(method, hue_rotate):
+    """Test that over every catalog colour, repeated brand colours included, NumPy ties break like color_key."""
+    np = pytest.importorskip('numpy')
+    from badgesort.catalog import icons
+    colours = [(int(icon.hex[0:2], 16), int(icon.hex[2:4], 16), int(icon.hex[4:6], 16))
+               for icon in (icons[slug] for slug in sorted(icons))]
+    assert len(set(colours)) < len(colours), "The catalog should contain repeated colours"
+    reference = _reference_order(colours, method, hue_rotate)
+    assert sort_order(colours, method, hue_rotate) == reference
+    assert sort_order(np.array(colours, dtype=np.uint8), method, hue_rotate) == reference
+
+
+def test_fallback_key_columns(pure_python):
+    """Test that fallback key columns hold the per-colour keys, primary key first."""
+    colours = [(255, 0, 0), (0, 0, 255), (7, 7, 7)]
+    assert sort_keys(colours, 'hsv') == [(0.0, 2 / 3, 0.0), (1.0, 1.0, 0.0), (255, 255, 7)]
+    assert sort_keys(colours, 'hilbert') == [tuple(color_key('hilbert')(rgb) for rgb in colours)]
+    assert sort_order([], 'step') == []
+
+
+def test_unknown_method():
+    """Test that methods without per-colour keys are rejected."""
+    with pytest.raises(ValueError, match='random'):
+        sort_order([(0, 0, 0)], 'random')
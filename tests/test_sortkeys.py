@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the prebuilt catalog sort key table.
+"""
+
+import json
+import os
+
+import pytest
+
+from badgesort.catalog import icons
+from badgesort.sortkeys import INDEX_FILE, CatalogSortKeys, build_sort_keys
+from badgesort.sorting import SORT_METHODS, color_key, sort_order
+
+SAMPLE_SLUGS = ['github', 'python', 'docker', 'osu', 'rust', 'kubernetes', 'npm', 'slack', 'notion', 'figma',
+                'react', 'vuedotjs', 'angular', 'svelte', 'nodedotjs', 'go', 'spotify', 'discord']
+
+
+def _rgb(slug):
+    hex_color = icons[slug].hex
+    return (int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16))
+
+
+@pytest.fixture
+def table(tmp_path):
+    build_sort_keys(str(tmp_path), source={slug: icons[slug] for slug in SAMPLE_SLUGS}, hue_rotations=(0, 90))
+    return CatalogSortKeys(str(tmp_path))
+
+
+@pytest.mark.parametrize('hue_rotate', [0, 90])
+@pytest.mark.parametrize('method', list(SORT_METHODS))
+def test_lookup_matches_computed_keys(table, method, hue_rotate):
+    """Test that table keys equal computed ones, and catalog colours alone sort by rank in the same order."""
+    colours = [_rgb(slug) for slug in SAMPLE_SLUGS] * 2
+    expected = sort_order(colours, method, hue_rotate)
+
+    ranks = table.lookup(colours, method, hue_rotate)
+    assert all(isinstance(rank, int) for rank in ranks)
+    assert sort_order(colours, method, hue_rotate, keys=ranks) == expected
+
+    custom = [(1, 2, 3), (250, 128, 0)]
+    keys = table.lookup(colours + custom, method, hue_rotate)
+    key = color_key(method, hue_rotate)
+    assert keys[:len(colours)] == [key(rgb) for rgb in colours]
+    assert keys[len(colours):] == [None, None]
+    assert (sort_order(colours + custom, method, hue_rotate, keys=keys)
+            == sort_order(colours + custom, method, hue_rotate))
+
+
+def test_missing_rotation_and_stale_table(table, tmp_path):
+    """Test that unbuilt hue rotations and tables for another simpleicons version aren't used."""
+    assert table.lookup([_rgb('github')], 'step', 45) is None
+    assert table.lookup([_rgb('github')], 'hilbert', 45) is not None
+
+    index_path = os.path.join(str(tmp_path), INDEX_FILE)
+    with open(index_path) as f:
+        index = json.load(f)
+    index['fingerprint']['simpleicons'] = '0.0.0'
+    with open(index_path, 'w') as f:
+        json.dump(index, f)
+    assert CatalogSortKeys(str(tmp_path)).lookup([_rgb('github')], 'hilbert') is None
+    assert CatalogSortKeys(str(tmp_path / 'missing')).lookup([_rgb('github')], 'hilbert') is None
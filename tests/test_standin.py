@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the local stand-in badge server, and for badge runs against it over
+real HTTP.
+"""
+
+import argparse
+from contextlib import redirect_stdout
+from io import StringIO
+
+import requests
+
+from badgesort import icons as badgesort_icons
+
+
+def _get(server, path, **kwargs):
+    return requests.get(server.url + path, timeout=5, **kwargs)
+
+
+def test_standin_renders_logos(standin):
+    """Test that bundled, missing and data URI logos render like Shields.io."""
+    standin.missing = {'docker'}
+    assert '<image' in _get(standin, '/badge/GitHub-181717.svg?logo=github').text
+    assert '<image' not in _get(standin, '/badge/Docker-2496ED.svg?logo=docker').text
+    assert '<image' in _get(standin, '/badge/Docker-2496ED.svg?logo=data%3Aimage%2Fsvg%2Bxml%3Bbase64%2CPHN2Zy8%2B').text
+    assert '<image' in _get(standin, '/badge/icon/Docker?icon=data%3Aimage%2Fpng%3Bbase64%2CiVBO&label').text
+    assert _get(standin, '/favicon.ico').status_code == 404
+
+
+def test_standin_revalidates_with_etag(standin):
+    """Test that a matching If-None-Match gets a bodyless 304."""
+    first = _get(standin, '/badge/GitHub-181717.svg?logo=github')
+    second = _get(standin, '/badge/GitHub-181717.svg?logo=github', headers={'If-None-Match': first.headers['ETag']})
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.content == b''
+
+
+def test_standin_errors_and_rate_limit(standin):
+    """Test configured 503s and 429s with Retry-After."""
+    standin.error_rate = 1.0
+    assert _get(standin, '/badge/GitHub-181717.svg').status_code == 503
+    standin.error_rate = 0.0
+    standin.rate_limit, standin.burst = 0.5, 1
+    assert _get(standin, '/badge/GitHub-181717.svg').status_code == 200
+    limited = _get(standin, '/badge/GitHub-181717.svg')
+    assert limited.status_code == 429
+    assert limited.headers['Retry-After'] == '2'
+    assert standin.statuses == {503: 1, 200: 1, 429: 1}
+
+
+def test_run_against_standin(standin):
+    """Test logo checks and verification end to end over HTTP, with badge URLs on the stand-in."""
+    standin.missing = {'docker'}
+    args = argparse.Namespace(
+        slugs=['github,docker,python'], random=1, output='', id='standin-test', format='markdown',
+        badge_style='flat', color_sort='hilbert', hue_rotate=0, no_thanks=False, reverse=False,
+        provider='shields', verify=True, embed_svg=False, skip_logo_check=False,
+    )
+    with redirect_stdout(StringIO()) as out:
+        badgesort_icons.run(args)
+
+    badges = {line.split(']')[0][3:]: line for line in out.getvalue().splitlines() if line.startswith('[![')}
+    assert all(f'({standin.url}/badge/' in badge for badge in badges.values())
+    assert 'logo=github&' in badges['GitHub']
+    assert 'logo=data%3Aimage' in badges['Docker']
+    # Three logo checks, then three verifications
+    assert len(standin.paths) == 6
+    assert set(standin.statuses) == {200}
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for SVG compression engines.
+
+The in-process scour engine must produce the same output as the scour
+subprocess it replaces, and the subprocess must remain available as a fallback.
+Adaptive compression must only lower precision for icons that don't fit, and
+the shortest-encoding selector must only pick encodings that decode to the
+same SVG.
+"""
+
+import argparse
+import base64
+import re
+from unittest import mock
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from badgesort import cache as badgesort_cache
+from badgesort import icons as badgesort_icons
+from badgesort.icons import (
+    _compress_svg_for_badge,
+    _encode_svg_data_uri,
+    _compress_svg_with_scour_api,
+    _compress_svg_with_scour_subprocess,
+    run,
+    svg_to_base64_data_uri,
+)
+from simpleicons.all import icons
+
+
+def _white(slug):
+    return icons[slug].svg.replace('<path ', '<path fill="white" ')
+
+
+def test_in_process_scour_matches_subprocess():
+    """Test that the in-process engine output is identical to the scour subprocess."""
+    for slug in ['github', 'dotnet', 'kubernetes']:
+        svg = _white(slug)
+        assert _compress_svg_with_scour_api(svg) == _compress_svg_with_scour_subprocess(svg), \
+            f"In-process scour output should match the subprocess for {slug}"
+
+
+def test_compress_svg_does_not_fork():
+    """Test that compression runs in-process without spawning a subprocess."""
+    with mock.patch.object(badgesort_icons.subprocess, 'run') as run_mock:
+        compressed = _compress_svg_for_badge(_white('github'))
+    assert not run_mock.called, "In-process compression should not spawn a subprocess"
+    assert '<title>' not in compressed, "Descriptive elements should be stripped"
+
+
+def test_compress_svg_falls_back_to_subprocess():
+    """Test that the scour subprocess is used when the in-process engine fails."""
+    svg = _white('github')
+    with mock.patch.object(badgesort_icons, '_compress_svg_with_scour_api', side_effect=RuntimeError('boom')):
+        compressed = _compress_svg_for_badge(svg)
+    assert compressed == _compress_svg_with_scour_subprocess(svg), \
+        "Subprocess fallback should produce the usual scour output"
+
+
+def test_adaptive_compression_keeps_icons_that_fit():
+    """Test that adaptive mode is identical to fixed mode when the SVG already fits."""
+    with badgesort_cache.disabled():
+        for slug in ['github', 'python']:
+            assert svg_to_base64_data_uri(icons[slug].svg, 'white', compression='adaptive') == \
+                svg_to_base64_data_uri(icons[slug].svg, 'white', compression='fixed')
+
+
+def test_adaptive_compression_avoids_png_fallback():
+    """Test that an oversized icon is embedded as a lower-precision SVG instead of a PNG."""
+    svg = icons['kubernetes'].svg
+    limit = 3000
+    with badgesort_cache.disabled():
+        fixed = svg_to_base64_data_uri(svg, 'white', max_url_length=limit, compression='fixed')
+        with mock.patch.object(badgesort_icons, '_svg_to_png_data_uris') as png_mock:
+            adaptive = svg_to_base64_data_uri(svg, 'white', max_url_length=limit, compression='adaptive')
+
+    assert fixed.startswith('data:image/png;base64,')
+    assert not png_mock.called, "No rasterization should happen when a lower precision fits"
+    assert adaptive.startswith('data:image/svg+xml;base64,') and len(adaptive) <= limit
+    decoded = base64.b64decode(adaptive.split(',', 1)[1]).decode('utf-8')
+    assert decoded.startswith('<svg') and 'fill="#fff"' in decoded
+
+
+def test_adaptive_compression_picks_highest_fitting_precision():
+    """Test that the first precision that fits wins, and PNG is used when none fit."""
+    compressed = _compress_svg_for_badge(_white('kubernetes'))
+    sizes = {}
+    for precision in badgesort_icons.ADAPTIVE_PRECISIONS:
+        with mock.patch.object(badgesort_icons, 'ADAPTIVE_PRECISIONS', (precision,)):
+            sizes[precision] = len(badgesort_icons._reduce_svg_precision(compressed, 10 ** 6))
+    assert sizes[4] > sizes[3] > sizes[2]
+
+    assert len(badgesort_icons._reduce_svg_precision(compressed, sizes[3])) == sizes[3]
+    assert badgesort_icons._reduce_svg_precision(compressed, sizes[2] - 1) is None
+
+
+def _quoted_length(data_uri):
+    return len(quote(data_uri, safe=''))
+
+
+def test_shortest_encoding_decodes_to_same_svg():
+    """Test that the percent-encoded candidate decodes to the compressed SVG with comma separators."""
+    compressed = _compress_svg_for_badge(_white('github'))
+    data_uri, fits = _encode_svg_data_uri(compressed, 3550, 'shortest')
+    assert fits
+    assert data_uri.startswith('data:image/svg+xml;charset=utf-8,')
+    payload = data_uri.split(',', 1)[1]
+    assert not any(c in payload for c in '#"<>') and not any(c.isspace() for c in payload)
+    decoded = unquote(payload)
+    assert decoded.replace(',', ' ') == compressed.replace(',', ' ')
+
+
+def test_shortest_encoding_is_never_longer_than_base64():
+    """Test that 'shortest' picks the candidate with the shortest quoted length."""
+    with badgesort_cache.disabled():
+        # Icons whose base64 data URI fits, so neither mode falls back to PNG
+        for slug in ['github', 'python', 'docker', 'dotnet', 'nodedotjs']:
+            base64_uri = svg_to_base64_data_uri(icons[slug].svg, 'white', encoding='base64')
+            shortest_uri = svg_to_base64_data_uri(icons[slug].svg, 'white', encoding='shortest')
+            assert _quoted_length(shortest_uri) <= _quoted_length(base64_uri), \
+                f"Shortest encoding for {slug} should not be longer than base64"
+    assert shortest_uri.startswith('data:image/svg+xml;charset=utf-8,'), \
+        "Path-heavy icons should be percent-encoded"
+
+
+def test_shortest_encoding_html_output(tmp_path):
+    """Test that percent-encoded logos keep HTML src attributes and URLs intact."""
+    output = tmp_path / 'README.md'
+    slugs = ['github', 'nodedotjs', 'dotnet']
+    args = argparse.Namespace(slugs=slugs, random=1, output=str(output), id='default', format='html',
+                              badge_style='flat', color_sort='hilbert', hue_rotate=0, no_thanks=False,
+                              reverse=False, provider='shields', verify=False, embed_svg=True,
+                              skip_logo_check=True, logo_encoding='shortest')
+    with badgesort_cache.disabled():
+        run(args)
+    srcs = re.findall(r'<img alt="[^"]*" src="([^"]*)"></a>\n', output.read_text())
+    assert len(srcs) == len(slugs)
+    logos = [parse_qs(urlparse(src).query)['logo'][0] for src in srcs]
+    utf8_logos = [logo for logo in logos if logo.startswith('data:image/svg+xml;charset=utf-8,')]
+    assert utf8_logos, "Path-heavy icons should be percent-encoded"
+    for logo in utf8_logos:
+        payload = logo.split(',', 1)[1]
+        assert not any(c in payload for c in '#"<>'), "Data URI payloads must not contain raw URL-invalid characters"
+        assert unquote(payload).startswith('<svg')
+
+
+def test_shortest_encoding_avoids_png_fallback():
+    """Test that an icon too long as base64 is embedded percent-encoded when that fits."""
+    compressed = _compress_svg_for_badge(_white('amazonaws'))
+    base64_uri, _ = _encode_svg_data_uri(compressed, 10 ** 6, 'base64')
+    utf8_uri, _ = _encode_svg_data_uri(compressed, 10 ** 6, 'shortest')
+    limit = _quoted_length(utf8_uri)
+    assert len(base64_uri) > limit, "Test limit should reject base64"
+
+    with badgesort_cache.disabled(), \
+            mock.patch.object(badgesort_icons, '_svg_to_png_data_uris') as png_mock:
+        data_uri = svg_to_base64_data_uri(icons['amazonaws'].svg, 'white', max_url_length=limit, encoding='shortest')
+    assert not png_mock.called
+    assert data_uri == utf8_uri
+
+
+def test_percent_encoded_candidate_must_fit_after_quoting():
+    """Test that the percent-encoded candidate is rejected when only its unquoted length fits."""
+    compressed = _compress_svg_for_badge(_white('amazonaws'))
+    utf8_uri, _ = _encode_svg_data_uri(compressed, 10 ** 6, 'shortest')
+    data_uri, fits = _encode_svg_data_uri(compressed, len(utf8_uri), 'shortest')
+    assert not fits and data_uri.startswith('data:image/svg+xml;base64,')
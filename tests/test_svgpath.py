@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for SVG path parsing and precision-controlled re-serialization.
+"""
+
+import math
+
+import pytest
+
+from badgesort.svgpath import parse_path, serialize_path
+from simpleicons.all import icons
+
+
+def _path_data(slug):
+    svg = icons[slug].svg
+    return svg[svg.index(' d="') + 4:svg.index('"', svg.index(' d="') + 4)]
+
+
+def _points(segments):
+    """Return every end and control point of parsed segments (arc radii excluded)."""
+    points = []
+    for segment in segments:
+        coordinates = segment[6:] if segment[0] == 'A' else segment[1:]
+        points.extend(coordinates[i:i + 2] for i in range(0, len(coordinates), 2))
+    return points
+
+
+def test_parse_path_normalizes_shorthands():
+    """Test that H/V, S/T and relative commands become absolute L/C/Q segments."""
+    segments = parse_path('M1 1h2v2l-1 1c1 0 2 1 2 2s1 2 2 2q1 0 1 1t1 1z')
+    assert segments[:4] == [('M', 1, 1), ('L', 3, 1), ('L', 3, 3), ('L', 2, 4)]
+    assert segments[4] == ('C', 3, 4, 4, 5, 4, 6)
+    # s reflects the previous second control point (4, 5) around (4, 6)
+    assert segments[5] == ('C', 4, 7, 5, 8, 6, 8)
+    assert segments[6] == ('Q', 7, 8, 7, 9)
+    assert segments[7] == ('Q', 7, 10, 8, 10)
+    assert segments[8] == ('Z',)
+
+
+def test_parse_path_rejects_malformed_data():
+    """Test that malformed path data raises ValueError."""
+    for d in ['1 2', 'M1', 'M1 1a1 1 0 2 1 1 1', 'M1 1X2']:
+        with pytest.raises((ValueError, IndexError)):
+            parse_path(d)
+
+
+def test_serialize_path_round_trips_at_full_precision():
+    """Test that re-serializing catalog paths at source precision preserves every point."""
+    for slug in ['github', 'kubernetes', 'amazonaws', 'dotnet']:
+        original = parse_path(_path_data(slug))
+        reparsed = parse_path(serialize_path(original, 5))
+        assert [s[0] for s in reparsed] == [s[0] for s in original]
+        for a, b in zip(_points(original), _points(reparsed)):
+            assert math.dist(a, b) < 1e-3, f"{slug} should round-trip at precision 5"
+
+
+def test_serialize_path_errors_do_not_accumulate():
+    """Test that lowering precision keeps every point within one rounding step of the original."""
+    original = parse_path(_path_data('kubernetes'))
+    previous_length = None
+    for precision, tolerance in [(4, 0.01), (3, 0.1), (2, 1.0)]:
+        serialized = serialize_path(original, precision)
+        reparsed = parse_path(serialized)
+        assert len(reparsed) <= len(original)
+        if len(reparsed) == len(original):
+            worst = max(math.dist(a, b) for a, b in zip(_points(original), _points(reparsed)))
+            assert worst <= tolerance, f"Precision {precision} drifted by {worst}"
+        if previous_length is not None:
+            assert len(serialized) < previous_length
+        previous_length = len(serialized)
+
+
+def test_serialize_path_is_compact():
+    """Test implicit repeated commands, h/v shorthands, omitted separators and compact arc flags."""
+    assert serialize_path(parse_path('M0 0L1 1L2 3L2 5L4 5Z'), 3) == 'm0 0 1 1 1 2v2h2z'
+    assert serialize_path(parse_path('M0 0L-.5 -.5L.25 .5'), 3) == 'm0 0-.5-.5.75 1'
+    assert serialize_path(parse_path('M1 1A2 2 0 0 1 5 1'), 3) == 'm1 1a2 2 0 014 0'